@@ -0,0 +1,110 @@
+"""
+Corpus check, fuzzing and throughput benchmark for the streaming agent output parser
+
+Usage: python benchmarks/agent_output_fuzz.py [fuzz_iterations]
+"""
+import json
+import os
+import random
+import sys
+import time
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, '..', 'lambda', 'ai-agent'))
+
+from stream_parser import FindingStreamParser, validate_finding, validate_recommendation  # noqa: E402
+
+CORPUS_DIR = os.path.join(HERE, 'agent_output_corpus')
+
+def parse(text, chunk_sizes=None, rng=None):
+    parser = FindingStreamParser()
+    position = 0
+    while position < len(text):
+        size = rng.choice(chunk_sizes) if chunk_sizes else len(text)
+        parser.feed(text[position:position + size])
+        position += size
+    return parser.finish()
+
+def load_corpus():
+    with open(os.path.join(CORPUS_DIR, 'expected.json')) as f:
+        expected = json.load(f)
+    corpus = {}
+    for name in expected:
+        with open(os.path.join(CORPUS_DIR, name)) as f:
+            corpus[name] = f.read()
+    return corpus, expected
+
+def check_corpus(corpus, expected):
+    failures = 0
+    for name, text in corpus.items():
+        findings, recommendations, score = parse(text)
+        actual = {'findings': len(findings), 'recommendations': len(recommendations), 'score': score}
+        ok = actual == expected[name]
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: {actual}")
+    return failures
+
+def mutate(text, rng):
+    """Truncate, inject noise or duplicate a slice of the text"""
+    choice = rng.random()
+    if choice < 0.4:
+        return text[:rng.randint(0, len(text))]
+    if choice < 0.7:
+        position = rng.randint(0, len(text))
+        noise = ''.join(rng.choice('{}[]",:\\`abc \n') for _ in range(rng.randint(1, 8)))
+        return text[:position] + noise + text[position:]
+    start = rng.randint(0, len(text))
+    end = rng.randint(start, len(text))
+    return text[:end] + text[start:end] + text[end:]
+
+def fuzz(corpus, iterations, seed=7):
+    """Invariants: never raises, only valid items, results independent of chunking"""
+    rng = random.Random(seed)
+    texts = list(corpus.values())
+    violations = 0
+
+    for _ in range(iterations):
+        text = mutate(rng.choice(texts), rng)
+        whole = parse(text)
+        chunked = parse(text, chunk_sizes=[1, 2, 3, 7, 64], rng=rng)
+
+        if whole != chunked:
+            violations += 1
+        if any(validate_finding(f) != f for f in whole[0]):
+            violations += 1
+        if any(validate_recommendation(r) != r for r in whole[1]):
+            violations += 1
+        if whole[2] is not None and not 0 <= whole[2] <= 100:
+            violations += 1
+
+    print(f"fuzz: {iterations} cases, {violations} invariant violations")
+    return violations
+
+def benchmark(finding_count=5000):
+    findings = [{
+        'id': f"finding-{i}",
+        'pillar': 'Security',
+        'title': 'Example finding',
+        'description': f"Resource {i} is misconfigured",
+        'severity': 'HIGH',
+        'service': 'EC2'
+    } for i in range(finding_count)]
+    text = "Results:\n```json\n" + json.dumps({'score': 70, 'findings': findings}, indent=2) + "\n```"
+
+    started = time.perf_counter()
+    parse(text, chunk_sizes=[48], rng=random.Random(0))
+    elapsed = time.perf_counter() - started
+
+    print(f"benchmark: {len(text) / 1024 / 1024:.2f} MB, {finding_count} findings "
+          f"in {elapsed * 1000:.0f} ms ({len(text) / 1024 / 1024 / elapsed:.2f} MB/s)")
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    corpus, expected = load_corpus()
+    failures = check_corpus(corpus, expected)
+    failures += fuzz(corpus, iterations)
+    benchmark()
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Import-time and cold-start benchmark for the Lambda handlers
+
+Each handler module is imported in a fresh interpreter under `python -X importtime`,
+the way the Lambda runtime does during init. Reports wall time, the cumulative
+import time of the handler and its slowest imports, and compares them against a
+stored baseline so regressions fail the run.
+
+Usage: python benchmarks/cold_start_benchmark.py [--runs N] [--top N] [--update-baseline] [--tolerance 0.25]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cold_start_baseline.json')
+SHARED_LAYER = os.path.join(ROOT, 'lambda', 'layers', 'shared', 'python')
+
+HANDLER_ENVIRONMENT = {
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'AWS_REGION': 'us-east-1',
+    'AWS_ACCESS_KEY_ID': 'benchmark',
+    'AWS_SECRET_ACCESS_KEY': 'benchmark',
+    'DYNAMODB_TABLE_NAME': 'well-architected-reviews',
+    'REGION': 'us-east-1',
+    'POWERTOOLS_METRICS_NAMESPACE': 'Benchmark',
+    'POWERTOOLS_TRACE_DISABLED': 'true'
+}
+
+HANDLERS = {
+    'ai-agent': {
+        'KNOWLEDGE_BASE_ID': 'kb',
+        'BEDROCK_MODEL_ID': 'model',
+        'REVIEW_RESULTS_BUCKET': 'results',
+        'INVENTORY_CACHE_BUCKET': 'cache',
+        'APPSYNC_API_URL': 'https://example.appsync-api.us-east-1.amazonaws.com/graphql',
+        'IDEMPOTENCY_TABLE_NAME': 'idempotency'
+    },
+    'api-handler': {
+        'SQS_QUEUE_URL': 'https://sqs.us-east-1.amazonaws.com/123456789012/queue',
+        'REVIEW_RESULTS_BUCKET': 'results',
+        'IDEMPOTENCY_TABLE_NAME': 'idempotency'
+    },
+    'async-processor': {
+        'AI_AGENT_FUNCTION_NAME': 'agent',
+        'ADMISSION_TABLE_NAME': 'admission'
+    }
+}
+
+def import_handler(name):
+    """Import one handler's main module in a fresh interpreter; returns (wall_ms, importtime rows)"""
+    env = {**os.environ, **HANDLER_ENVIRONMENT, **HANDLERS[name]}
+    env['PYTHONPATH'] = os.pathsep.join([os.path.join(ROOT, 'lambda', name), SHARED_LAYER])
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        env=env, capture_output=True, text=True, cwd=os.path.join(ROOT, 'lambda', name)
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {name} failed:\n{completed.stderr[-2000:]}")
+
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        # import time: <self us> | <cumulative us> | <indented module name>
+        self_us, cumulative_us, module = line[len('import time:'):].split('|', 2)
+        rows.append({
+            'module': module.rstrip(),
+            'depth': (len(module) - len(module.lstrip()) - 1) // 2,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us)
+        })
+    return wall_ms, rows
+
+def measure(name, runs, top):
+    walls = []
+    main_ms = []
+    slowest = None
+    for _ in range(runs):
+        wall_ms, rows = import_handler(name)
+        walls.append(wall_ms)
+        main_row = next(row for row in reversed(rows) if row['module'].strip() == 'main')
+        main_ms.append(main_row['cumulative_us'] / 1000)
+        # Top-level packages only; nested rows are already part of their parent's cumulative time
+        slowest = sorted(
+            (row for row in rows if row['depth'] <= 1 and row['module'].strip() != 'main'),
+            key=lambda row: row['cumulative_us'], reverse=True
+        )[:top]
+    return {
+        'wall_ms': round(statistics.median(walls), 1),
+        'import_ms': round(statistics.median(main_ms), 1),
+        'slowest': [(row['module'].strip(), round(row['cumulative_us'] / 1000, 1)) for row in slowest]
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8)
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    for name in HANDLERS:
+        result = measure(name, args.runs, args.top)
+        results[name] = {'import_ms': result['import_ms'], 'wall_ms': result['wall_ms']}
+
+        reference = baseline.get(name, {}).get('import_ms')
+        change = f"  (baseline {reference} ms)" if reference else ''
+        print(f"{name:<16} import {result['import_ms']:7.1f} ms   process {result['wall_ms']:7.1f} ms{change}")
+        for module, cumulative_ms in result['slowest']:
+            print(f"    {cumulative_ms:7.1f} ms  {module}")
+
+        if reference and result['import_ms'] > reference * (1 + args.tolerance):
+            regressions.append(name)
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f"Baseline written to {os.path.relpath(BASELINE_PATH, ROOT)}")
+    elif regressions:
+        print(f"Import time regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
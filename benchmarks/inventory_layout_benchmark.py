@@ -0,0 +1,155 @@
+"""
+Memory and serialization benchmark for the inventory layouts
+
+Builds the same synthetic inventory as lists of dicts and as columnar
+ResourceTables, each in a fresh interpreter so peak RSS is not shared. Records
+are created one at a time from decoded JSON, the way the analyzer receives
+them from boto3, so repeated strings are separate objects unless interned.
+Reports the peak RSS added by the inventory, JSON encode and decode time and
+size, rule evaluation time, and for the columnar layout the conversion back
+to dicts.
+
+Usage: python benchmarks/inventory_layout_benchmark.py [--resources N] [--runs N]
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+AI_AGENT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'ai-agent')
+sys.path.insert(0, AI_AGENT)
+
+LAYOUTS = ('dict', 'columnar')
+
+EC2_TYPES = ['m5.large', 'm6g.large', 't2.micro', 't4g.small', 'c5.xlarge', 'm4.2xlarge', 'r6i.large']
+RDS_CLASSES = ['db.m5.large', 'db.r6g.xlarge', 'db.t2.micro', 'db.t4g.medium', 'db.m4.large']
+RUNTIMES = ['python3.12', 'python3.9', 'nodejs20.x', 'java21', 'container-image']
+STATUSES = ['CONFIGURED', 'NOT_CONFIGURED', 'ACCESS_DENIED']
+
+def record(service, i, rng):
+    """One analyzer record with about the cardinality of a real account"""
+    if service == 'ec2':
+        vpc = rng.randrange(20)
+        return {
+            'instance_id': f"i-{i:017x}",
+            'instance_type': rng.choice(EC2_TYPES),
+            'state': rng.choice(['running', 'running', 'stopped']),
+            'security_groups': [f"sg-{rng.randrange(200):08x}" for _ in range(rng.randint(1, 3))],
+            'subnet_id': f"subnet-{vpc:04x}{rng.randrange(6):04x}",
+            'vpc_id': f"vpc-{vpc:08x}"
+        }
+    if service == 's3':
+        return {
+            'name': f"bucket-{i}",
+            'creation_date': f"2024-{rng.randint(1, 12):02d}-01T00:00:00+00:00",
+            'encryption': {'status': rng.choice(STATUSES)},
+            'versioning': {'status': rng.choice(STATUSES), 'value': 'Enabled'},
+            'public_access_block': {'status': 'CONFIGURED', 'all_blocked': rng.random() > 0.1},
+            'lifecycle': {'status': rng.choice(STATUSES)},
+            'logging': {'status': rng.choice(STATUSES)}
+        }
+    if service == 'rds':
+        return {
+            'db_instance_identifier': f"db-{i}",
+            'db_instance_class': rng.choice(RDS_CLASSES),
+            'engine': rng.choice(['postgres', 'mysql', 'aurora-postgresql']),
+            'encrypted': rng.random() > 0.2,
+            'multi_az': rng.random() > 0.5,
+            'backup_retention_period': rng.choice([0, 7, 14])
+        }
+    return {
+        'function_name': f"fn-{i}",
+        'runtime': rng.choice(RUNTIMES),
+        'memory_size': rng.choice([128, 512, 1024, 4096, 10240]),
+        'timeout': rng.choice([3, 30, 900]),
+        'last_modified': f"2025-{rng.randint(1, 12):02d}-01T00:00:00.000+0000",
+        'architectures': [rng.choice(['x86_64', 'arm64'])]
+    }
+
+def build_inventory(resource_count, new_collection, seed=42):
+    rng = random.Random(seed)
+    shares = {'ec2': 0.4, 's3': 0.1, 'rds': 0.1, 'lambda': 0.4}
+    keys = {'ec2': 'instances', 's3': 'buckets', 'rds': 'instances', 'lambda': 'functions'}
+    services = {}
+    for service, share in shares.items():
+        records = new_collection()
+        for i in range(int(resource_count * share)):
+            # Decoding gives every string its own object, like parsed API responses
+            records.append(json.loads(json.dumps(record(service, i, rng))))
+        services[service] = {keys[service]: records, 'count': len(records)}
+    return {'account_id': '123456789012', 'region': 'us-east-1', 'services': services}
+
+def timed(function, runs):
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best * 1000
+
+def measure(layout, resource_count, runs):
+    """Run in the child interpreter; returns the measurements of one layout"""
+    from inventory_columns import ResourceTable, decode_columns, json_default
+    from rules import WellArchitectedEvaluator
+
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    inventory = build_inventory(resource_count, list if layout == 'dict' else ResourceTable)
+    build_ms = (time.perf_counter() - started) * 1000
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    encoded, encode_ms = timed(lambda: json.dumps(inventory, default=json_default, separators=(',', ':')), runs)
+    _, decode_ms = timed(lambda: json.loads(encoded, object_hook=decode_columns), runs)
+    evaluation, evaluate_ms = timed(lambda: WellArchitectedEvaluator().evaluate(inventory, ['all']), runs)
+
+    result = {
+        'layout': layout,
+        'peak_rss_mb': round((peak_kb - baseline_kb) / 1024, 1),
+        'build_ms': round(build_ms, 1),
+        'encode_ms': round(encode_ms, 1),
+        'decode_ms': round(decode_ms, 1),
+        'json_mb': round(len(encoded) / 1024 / 1024, 2),
+        'evaluate_ms': round(evaluate_ms, 1),
+        'findings': evaluation['total_findings']
+    }
+    if layout == 'columnar':
+        _, to_records_ms = timed(
+            lambda: [data[key].to_records() for data in inventory['services'].values()
+                     for key, value in data.items() if isinstance(value, ResourceTable)],
+            runs
+        )
+        result['to_records_ms'] = round(to_records_ms, 1)
+    return result
+
+def run_child(layout, resource_count, runs):
+    output = subprocess.run(
+        [sys.executable, __file__, '--child', layout, '--resources', str(resource_count), '--runs', str(runs)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resources', type=int, default=50_000)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--child', choices=LAYOUTS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.resources, args.runs)))
+        return
+
+    results = [run_child(layout, args.resources, args.runs) for layout in LAYOUTS]
+    print(f"resources: {args.resources}, best of {args.runs}")
+    fields = ['peak_rss_mb', 'build_ms', 'encode_ms', 'decode_ms', 'json_mb', 'evaluate_ms', 'findings', 'to_records_ms']
+    print(f"{'':<14}" + ''.join(f"{layout:>12}" for layout in LAYOUTS))
+    for field in fields:
+        print(f"{field:<14}" + ''.join(f"{str(result.get(field, '-')):>12}" for result in results))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Microbenchmark for the Well-Architected rule engine
+
+Usage: python benchmarks/rule_engine_benchmark.py [resource_count]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'ai-agent'))
+
+from rules import RULES, WellArchitectedEvaluator  # noqa: E402
+
+EC2_TYPES = ['m5.large', 'm6g.large', 't2.micro', 't4g.small', 'c5.xlarge', 'm4.2xlarge', 'r6i.large']
+RDS_CLASSES = ['db.m5.large', 'db.r6g.xlarge', 'db.t2.micro', 'db.t4g.medium', 'db.m4.large']
+STATUSES = ['CONFIGURED', 'NOT_CONFIGURED', 'ACCESS_DENIED']
+
+def build_inventory(resource_count, seed=42):
+    rng = random.Random(seed)
+    share = resource_count // 4
+
+    return {
+        'account_id': '123456789012',
+        'region': 'us-east-1',
+        'services': {
+            'ec2': {'instances': [{
+                'instance_id': f"i-{i:017x}",
+                'instance_type': rng.choice(EC2_TYPES),
+                'state': rng.choice(['running', 'running', 'stopped']),
+                'security_groups': ['sg-0123'],
+                'subnet_id': 'subnet-0123',
+                'vpc_id': 'vpc-0123'
+            } for i in range(share)]},
+            's3': {'buckets': [{
+                'name': f"bucket-{i}",
+                'encryption': {'status': rng.choice(STATUSES)},
+                'versioning': {'status': rng.choice(STATUSES), 'value': 'Enabled'},
+                'public_access_block': {'status': 'CONFIGURED', 'all_blocked': rng.random() > 0.1},
+                'lifecycle': {'status': rng.choice(STATUSES)},
+                'logging': {'status': rng.choice(STATUSES)}
+            } for i in range(share)]},
+            'rds': {'instances': [{
+                'db_instance_identifier': f"db-{i}",
+                'db_instance_class': rng.choice(RDS_CLASSES),
+                'engine': 'postgres',
+                'encrypted': rng.random() > 0.2,
+                'multi_az': rng.random() > 0.5,
+                'backup_retention_period': rng.choice([0, 7, 14])
+            } for i in range(share)]},
+            'lambda': {'functions': [{
+                'function_name': f"fn-{i}",
+                'runtime': 'python3.12',
+                'memory_size': rng.choice([128, 512, 1024, 4096, 10240]),
+                'timeout': 30,
+                'last_modified': '2025-01-01T00:00:00.000+0000',
+                'architectures': [rng.choice(['x86_64', 'arm64'])]
+            } for i in range(resource_count - 3 * share)]}
+        }
+    }
+
+def main():
+    resource_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    inventory = build_inventory(resource_count)
+    evaluator = WellArchitectedEvaluator()
+
+    evaluator.evaluate(inventory, ['all'])
+
+    runs = 5
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = evaluator.evaluate(inventory, ['all'])
+        timings.append(time.perf_counter() - started)
+
+    best = min(timings)
+    print(f"resources:        {resource_count}")
+    print(f"rules:            {len(RULES)}")
+    print(f"findings:         {result['total_findings']}")
+    print(f"best of {runs}:        {best * 1000:.1f} ms")
+    print(f"throughput:       {resource_count / best:,.0f} resources/s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Warm-invocation latency of the review status write with the baseline and shared clients
+
+Both runs perform the same keyed ReviewRepository.update_status write. The
+"baseline" run uses a default boto3 resource created once at module scope,
+as the handlers did before the shared layer; the "shared" run reuses the
+cached, tuned resource from aws_clients. Both keep their client across
+invocations, so the difference is only the client configuration (pool,
+TCP keepalive, timeouts and retry mode), not client set-up or round trips.
+
+Runs against a local fake DynamoDB endpoint so it needs no AWS account; the
+fake adds a fixed per-request delay to stand in for network round trips and,
+with --capacity-rps, throttles requests beyond that rate over the last second
+the way a table at its provisioned capacity does.
+
+Usage: python benchmarks/warm_invocation_benchmark.py [--invocations N] [--latency-ms MS] [--capacity-rps N]
+"""
+import argparse
+import collections
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'layers', 'shared', 'python'))
+
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('POWERTOOLS_LOG_LEVEL', 'WARNING')
+
+import boto3  # noqa: E402
+
+class FakeDynamoDB(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    wbufsize = -1
+    latency_ms = 5.0
+    capacity_rps = 0
+    accepted = collections.deque()
+    connections = set()
+    requests = 0
+    throttled = 0
+    _lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with FakeDynamoDB._lock:
+            FakeDynamoDB.connections.add(self.client_address)
+            FakeDynamoDB.requests += 1
+            throttle = False
+            if FakeDynamoDB.capacity_rps:
+                now = time.monotonic()
+                accepted = FakeDynamoDB.accepted
+                while accepted and accepted[0] < now - 1:
+                    accepted.popleft()
+                throttle = len(accepted) >= FakeDynamoDB.capacity_rps
+                if not throttle:
+                    accepted.append(now)
+            FakeDynamoDB.throttled += throttle
+        time.sleep(FakeDynamoDB.latency_ms / 1000)
+
+        if throttle:
+            status = 400
+            body = {'__type': 'com.amazonaws.dynamodb.v20120810#ThrottlingException', 'message': 'Rate exceeded'}
+        else:
+            status = 200
+            body = {}
+
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/x-amz-json-1.0')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+    @classmethod
+    def reset(cls):
+        cls.connections = set()
+        cls.requests = 0
+        cls.throttled = 0
+        cls.accepted.clear()
+
+def measure(label, invoke, invocations):
+    invoke()  # the cold invocation is not measured
+    FakeDynamoDB.reset()
+
+    timings = []
+    failures = 0
+    for _ in range(invocations):
+        started = time.perf_counter()
+        try:
+            invoke()
+        except Exception:
+            failures += 1
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    print(f"{label:<9} p50 {statistics.median(timings):6.2f} ms   "
+          f"p95 {timings[int(len(timings) * 0.95) - 1]:6.2f} ms   "
+          f"total {sum(timings) / 1000:5.2f} s   "
+          f"connections {len(FakeDynamoDB.connections):4d}   "
+          f"requests/invocation {FakeDynamoDB.requests / invocations:4.2f}   "
+          f"throttled {FakeDynamoDB.throttled:3d}   failures {failures}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--invocations', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    parser.add_argument('--capacity-rps', type=int, default=0)
+    args = parser.parse_args()
+
+    FakeDynamoDB.latency_ms = args.latency_ms
+    FakeDynamoDB.capacity_rps = args.capacity_rps
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeDynamoDB)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_port}"
+    # Picked up by the shared aws_clients resource as well as the per-call ones
+    os.environ['AWS_ENDPOINT_URL_DYNAMODB'] = endpoint
+
+    from review_repository import ReviewRepository
+
+    # Module-scope default resource, as in the handlers before the shared layer
+    baseline = ReviewRepository('reviews')
+    baseline._table = boto3.resource('dynamodb').Table('reviews')
+    shared = ReviewRepository('reviews')
+    measure('baseline', lambda: baseline.update_status('r', 'IN_PROGRESS', timestamp='t'), args.invocations)
+    measure('shared', lambda: shared.update_status('r', 'IN_PROGRESS', timestamp='t'), args.invocations)
+
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -42,7 +42,8 @@ interface ReviewDetailsProps {
 const ReviewDetails: React.FC<ReviewDetailsProps> = ({ reviewId, subscriptionData }) => {
   const { data, loading, error } = useQuery(GET_REVIEW, {
     variables: { reviewId },
-    pollInterval: 10000, // Poll every 10 seconds
+    // Updates are pushed over onReviewUpdated; poll only until the first one arrives
+    pollInterval: subscriptionData ? 0 : 10000,
   });
 
   const review = subscriptionData?.onReviewUpdated || data?.getReview;
@@ -0,0 +1,194 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+from aws_lambda_powertools import Logger
+from aws_clients import client_config
+from review_digest import build_review_digest, summarize_inventory
+from review_prompts import SYSTEM_PROMPT
+from pillar_fanout import expand_pillars
+from tool_memo import ToolMemo, read_only, reference, use_aws_arguments
+
+logger = Logger(child=True)
+
+BEDROCK_MODEL_ID = os.environ.get('BEDROCK_MODEL_ID')
+# Bedrock prompt-cache checkpoints after the tool specs and the system prompt
+BEDROCK_PROMPT_CACHE = os.environ.get('BEDROCK_PROMPT_CACHE', 'true').lower() == 'true'
+# Warm the runtime during init even without SnapStart or provisioned concurrency
+AGENT_PRIME_ON_INIT = os.environ.get('AGENT_PRIME_ON_INIT', 'false').lower() == 'true'
+# Set by Lambda: 'on-demand', 'provisioned-concurrency' or 'snap-start'
+INITIALIZATION_TYPE = os.environ.get('AWS_LAMBDA_INITIALIZATION_TYPE', 'on-demand')
+
+USAGE_KEYS = ('inputTokens', 'outputTokens', 'cacheReadInputTokens', 'cacheWriteInputTokens')
+
+# The review the current task works on; tools are shared, their inputs are not
+review_scope = contextvars.ContextVar('review_scope')
+
+_runtime = None
+_lock = threading.Lock()
+
+class ReviewScope:
+    """Per-review state read by the shared tools"""
+
+    def __init__(self, account_id, resources, evaluator, collect_inventory, memo=None):
+        self.account_id = account_id
+        self.resources = resources
+        self.evaluator = evaluator
+        self.collect_inventory = collect_inventory
+        self.memo = ToolMemo() if memo is None else memo
+
+class AgentRuntime:
+    """
+    The strands classes, Bedrock model and tools, built once per execution environment
+
+    Importing strands and creating the Bedrock client dominate agent start-up,
+    so both happen on first use and are kept for every later invocation.
+    """
+
+    def __init__(self, model_id=BEDROCK_MODEL_ID):
+        from strands import Agent, tool
+        from strands.models import BedrockModel
+        from strands.tools.tools import PythonAgentTool
+        from strands_tools import use_aws
+
+        cache = {'cache_tools': 'default', 'cache_prompt': 'default'} if BEDROCK_PROMPT_CACHE else {}
+        self.agent_class = Agent
+        self.model = BedrockModel(model_id=model_id, boto_client_config=client_config(), **cache)
+        self.tools = [
+            tool(analyze_aws_resources),
+            tool(evaluate_well_architected_pillars),
+            PythonAgentTool('use_aws', use_aws.TOOL_SPEC, functools.partial(call_use_aws, use_aws.use_aws))
+        ]
+
+    def agent(self, messages=None):
+        """
+        A fresh agent over the shared model and tools; conversations are never shared
+
+        Every agent gets the same tools and system prompt, in the same order, so
+        the prefix up to the cache checkpoints is byte-identical across reviews.
+        """
+        return self.agent_class(
+            model=self.model,
+            messages=messages,
+            tools=self.tools,
+            callback_handler=None,
+            system_prompt=SYSTEM_PROMPT
+        )
+
+def runtime():
+    """The cached AgentRuntime, created on first call"""
+    global _runtime
+    if _runtime is None:
+        with _lock:
+            if _runtime is None:
+                _runtime = AgentRuntime()
+    return _runtime
+
+def token_usage(agents):
+    """Bedrock token usage summed over the agents, including prompt cache reads and writes"""
+    totals = dict.fromkeys(USAGE_KEYS, 0)
+    for agent in agents:
+        usage = agent.event_loop_metrics.accumulated_usage
+        for key in USAGE_KEYS:
+            totals[key] += usage.get(key, 0)
+    return totals
+
+def analyze_aws_resources(account_id: str, region: str) -> dict:
+    """
+    Summarize AWS resources in the specified account and region
+
+    Args:
+        account_id: AWS account ID to analyze
+        region: AWS region to analyze
+
+    Returns:
+        dict: Resource counts and aggregates per service
+    """
+    try:
+        scope = review_scope.get()
+        arguments = {'account_id': str(account_id).strip(), 'region': str(region).strip().lower()}
+
+        def analyze():
+            if arguments['account_id'] == scope.account_id and arguments['region'] == scope.resources['region']:
+                return summarize_inventory(scope.resources)
+            return summarize_inventory(scope.collect_inventory(arguments['account_id'], arguments['region']))
+
+        result, repeated = scope.memo.call('analyze_aws_resources', arguments, analyze)
+        return reference('analyze_aws_resources', arguments) if repeated else result
+    except Exception as e:
+        logger.error(f"Error analyzing AWS resources: {str(e)}")
+        return {"error": str(e)}
+
+def evaluate_well_architected_pillars(pillars: list) -> dict:
+    """
+    Evaluate the collected resources against Well-Architected Framework pillars
+
+    Args:
+        pillars: List of pillars to evaluate
+
+    Returns:
+        dict: Digest of findings grouped by rule with example resources
+    """
+    try:
+        scope = review_scope.get()
+        arguments = {'pillars': sorted(expand_pillars([str(pillar).strip().lower() for pillar in pillars]))}
+        result, repeated = scope.memo.call(
+            'evaluate_well_architected_pillars', arguments,
+            lambda: build_review_digest(scope.resources, scope.evaluator.evaluate(scope.resources, arguments['pillars']))
+        )
+        return reference('evaluate_well_architected_pillars', arguments) if repeated else result
+    except Exception as e:
+        logger.error(f"Error evaluating Well-Architected pillars: {str(e)}")
+        return {"error": str(e)}
+
+def call_use_aws(use_aws, tool_use, **kwargs):
+    """
+    Run use_aws, serving read-only operations from the review's ToolMemo
+
+    Operations that may change resources always run. Results are only
+    stored when the call succeeded.
+    """
+    tool_input = tool_use.get('input', {})
+    scope = review_scope.get(None)
+    if scope is None or not read_only(tool_input.get('operation_name', '')):
+        return use_aws(tool_use, **kwargs)
+
+    arguments = use_aws_arguments(tool_input)
+    result, repeated = scope.memo.call(
+        'use_aws', arguments, lambda: use_aws(tool_use, **kwargs),
+        lambda result: result.get('status') == 'success'
+    )
+    if repeated:
+        return {
+            'toolUseId': tool_use['toolUseId'],
+            'status': 'success',
+            'content': [{'text': json.dumps(reference('use_aws', arguments))}]
+        }
+    # A stored result may come from another agent's call
+    return {**result, 'toolUseId': tool_use['toolUseId']}
+
+def install_priming(prime):
+    """
+    Run prime before the first invocation when init time is not billed to a request
+
+    Under SnapStart prime runs before the snapshot is taken, so restored
+    environments start with everything loaded; with provisioned concurrency,
+    or AGENT_PRIME_ON_INIT, it runs during init. On-demand cold starts
+    otherwise load lazily on first use. Failures only cost the head start.
+    """
+    def guarded_prime():
+        try:
+            prime()
+        except Exception as e:
+            logger.warning(f"Priming the agent runtime failed: {str(e)}")
+
+    if INITIALIZATION_TYPE == 'snap-start':
+        try:
+            from snapshot_restore_py import register_before_snapshot
+        except ImportError:
+            guarded_prime()
+            return
+        register_before_snapshot(guarded_prime)
+    elif INITIALIZATION_TYPE == 'provisioned-concurrency' or AGENT_PRIME_ON_INIT:
+        guarded_prime()
@@ -0,0 +1,183 @@
+import gzip
+import json
+import os
+import time
+from botocore.exceptions import ClientError
+from aws_lambda_powertools import Logger
+from aws_clients import get_client
+from inventory_columns import decode_columns, json_default
+
+logger = Logger(child=True)
+
+INVENTORY_CACHE_BUCKET = os.environ.get('INVENTORY_CACHE_BUCKET')
+INVENTORY_CACHE_DIR = os.environ.get('INVENTORY_CACHE_DIR')
+INVENTORY_CACHE_PREFIX = os.environ.get('INVENTORY_CACHE_PREFIX', 'inventory/')
+DEFAULT_TTL_SECONDS = int(os.environ.get('INVENTORY_CACHE_TTL', '900'))
+
+# Slow-changing services can be reused for longer than compute inventories
+SERVICE_TTL_SECONDS = {
+    'ec2': 900,
+    's3': 3600,
+    'rds': 1800,
+    'lambda': 1800,
+    'iam': 3600,
+    'cloudformation': 1800
+}
+
+def encode_entry(data, collected_at):
+    """Serialize a service snapshot into a gzip-compressed JSON blob"""
+    payload = json.dumps({'collected_at': collected_at, 'data': data}, default=json_default)
+    return gzip.compress(payload.encode('utf-8'))
+
+def decode_entry(blob):
+    """Inverse of encode_entry"""
+    return json.loads(gzip.decompress(blob).decode('utf-8'), object_hook=decode_columns)
+
+class InventoryCacheBackend:
+    """Storage interface for compressed inventory snapshots"""
+
+    def get(self, account_id, region, service):
+        """Return the stored blob, or None if there is none"""
+        raise NotImplementedError
+
+    def put(self, account_id, region, service, blob):
+        """Store a blob, replacing any previous snapshot"""
+        raise NotImplementedError
+
+class S3InventoryCacheBackend(InventoryCacheBackend):
+    """Store snapshots as one gzip object per (account, region, service)"""
+
+    def __init__(self, bucket_name, prefix=INVENTORY_CACHE_PREFIX, s3_client=None):
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self._s3 = s3_client
+
+    @property
+    def s3(self):
+        if self._s3 is None:
+            self._s3 = get_client('s3')
+        return self._s3
+
+    def object_key(self, account_id, region, service):
+        return f"{self.prefix}{account_id}/{region}/{service}.json.gz"
+
+    def get(self, account_id, region, service):
+        try:
+            response = self.s3.get_object(
+                Bucket=self.bucket_name,
+                Key=self.object_key(account_id, region, service)
+            )
+            return response['Body'].read()
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise
+
+    def put(self, account_id, region, service, blob):
+        self.s3.put_object(
+            Bucket=self.bucket_name,
+            Key=self.object_key(account_id, region, service),
+            Body=blob,
+            ContentType='application/json',
+            ContentEncoding='gzip'
+        )
+
+class LocalFileInventoryCacheBackend(InventoryCacheBackend):
+    """Store snapshots under a local directory, for tests and local runs"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, account_id, region, service):
+        return os.path.join(self.directory, account_id, region, f"{service}.json.gz")
+
+    def get(self, account_id, region, service):
+        try:
+            with open(self.path(account_id, region, service), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, account_id, region, service, blob):
+        path = self.path(account_id, region, service)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so readers never observe a truncated snapshot
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(blob)
+        os.replace(tmp_path, path)
+
+class InventoryCache:
+    """Per-service TTL cache in front of AWSResourceAnalyzer"""
+
+    def __init__(self, backend, ttls=None, default_ttl=DEFAULT_TTL_SECONDS):
+        self.backend = backend
+        self.ttls = {**SERVICE_TTL_SECONDS, **(ttls or {})}
+        self.default_ttl = default_ttl
+
+    def ttl(self, service):
+        return self.ttls.get(service, self.default_ttl)
+
+    def lookup(self, account_id, region, services, now=None):
+        """Split services into fresh cached snapshots and ones that need collecting"""
+        now = now or time.time()
+        fresh = {}
+        stale = []
+
+        for service in services:
+            try:
+                blob = self.backend.get(account_id, region, service)
+                entry = decode_entry(blob) if blob else None
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable inventory cache entry for {service}: {str(e)}")
+                entry = None
+
+            if entry and now - entry['collected_at'] < self.ttl(service):
+                fresh[service] = entry['data']
+            else:
+                stale.append(service)
+
+        return fresh, stale
+
+    def store(self, account_id, region, services, collected_at=None):
+        """Persist successfully collected services; errors are never cached"""
+        collected_at = collected_at or time.time()
+        for service, data in services.items():
+            if 'error' in data:
+                continue
+            try:
+                self.backend.put(account_id, region, service, encode_entry(data, collected_at))
+            except Exception as e:
+                logger.warning(f"Failed to store inventory cache entry for {service}: {str(e)}")
+
+    def collect(self, analyzer, force_refresh=False):
+        """Return analyzer output, only re-collecting services whose snapshot expired"""
+        services = analyzer.SERVICES
+        if force_refresh:
+            fresh, stale = {}, list(services)
+        else:
+            fresh, stale = self.lookup(analyzer.account_id, analyzer.region, services)
+
+        if stale:
+            results = analyzer.analyze_all_resources(services=stale)
+            self.store(analyzer.account_id, analyzer.region, results['services'])
+        else:
+            results = analyzer.analyze_all_resources(services=[])
+
+        results['services'] = {
+            service: fresh[service] if service in fresh else results['services'][service]
+            for service in services
+        }
+        results['cache'] = {'hits': sorted(fresh), 'misses': stale}
+
+        logger.info(f"Inventory cache hits: {len(fresh)}, misses: {len(stale)}")
+
+        return results
+
+def create_inventory_cache():
+    """Build the configured cache, or None when caching is disabled"""
+    if INVENTORY_CACHE_BUCKET:
+        return InventoryCache(S3InventoryCacheBackend(INVENTORY_CACHE_BUCKET))
+    if INVENTORY_CACHE_DIR:
+        return InventoryCache(LocalFileInventoryCacheBackend(INVENTORY_CACHE_DIR))
+    return None
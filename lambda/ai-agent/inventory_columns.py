@@ -0,0 +1,260 @@
+import os
+
+# Store per-resource records column by column instead of as one dict per resource
+INVENTORY_COLUMNAR = os.environ.get('INVENTORY_COLUMNAR', 'true').lower() == 'true'
+
+# Marks a serialized ResourceTable; see ResourceTable.to_columns and decode_columns
+COLUMNS_KEY = '__columns__'
+
+# A record without a value for a column another record of the table has
+_MISSING = object()
+
+# Types of the values a table interns, so that equal ones are the same object
+_SHARED_TYPES = (str, tuple, dict)
+
+def _pool_key(value):
+    """Hashable key equal only for equal values of equal types, so 0, False and 0.0 stay apart"""
+    if isinstance(value, tuple):
+        return ('tuple',) + tuple(_pool_key(item) for item in value)
+    if isinstance(value, dict):
+        return ('dict',) + tuple((key, _pool_key(item)) for key, item in sorted(value.items()))
+    return (type(value), value)
+
+class Row:
+    """
+    Read-only view of one record of a ResourceTable
+
+    Answers get, [] and in like the record dict it replaces, without building
+    one. Nested values are shared with other rows and must not be modified;
+    to_dict returns an independent copy.
+    """
+
+    __slots__ = ('_columns', '_index')
+
+    def __init__(self, table, index):
+        self._columns = table.columns
+        self._index = index
+
+    def get(self, key, default=None):
+        column = self._columns.get(key)
+        if column is None:
+            return default
+        value = column[self._index]
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self):
+        return [name for name, column in self._columns.items() if column[self._index] is not _MISSING]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(name, self[name]) for name in self.keys()]
+
+    def to_dict(self):
+        return {name: export(value) for name, value in self.items()}
+
+    def __repr__(self):
+        return f"Row({self.to_dict()!r})"
+
+class ResourceTable:
+    """
+    Resource records of one service stored as a struct of arrays
+
+    Each field is one list with a value per resource, so a record costs a
+    slot per field instead of a dict. Repeated values such as instance types,
+    states and VPC IDs are interned, and so are lists (stored as tuples) and
+    flat dicts, so equal values share one object. Iterating yields Row views;
+    to_records converts to the dict layout on demand. Tables are filled by
+    the analyzer and read-only afterwards.
+
+    apply runs a function once per distinct combination of a few fields,
+    which is how the evaluator runs rules that declare the fields they read;
+    with the few instance types, states and settings of a real account that
+    is faster than checking every dict. Building and decoding a table cost
+    more than with dicts, and code iterating Row views runs at about the
+    speed of dicts.
+    """
+
+    __slots__ = ('columns', '_length', '_pool', '_gaps')
+
+    def __init__(self, pool=None):
+        self.columns = {}
+        self._length = 0
+        self._pool = {} if pool is None else pool
+        # Columns with at least one missing value
+        self._gaps = set()
+
+    @classmethod
+    def from_records(cls, records):
+        table = cls()
+        for record in records:
+            table.append(record)
+        return table
+
+    @classmethod
+    def from_columns(cls, data):
+        """Inverse of to_columns"""
+        table = cls()
+        values = data[COLUMNS_KEY]
+        table._length = len(next(iter(values.values()), []))
+        setdefault = table._pool.setdefault
+        for name, column in values.items():
+            table.columns[name] = [
+                setdefault(value, value) if type(value) is str else table._intern(value)
+                for value in column
+            ]
+        for name, indexes in data.get('missing', {}).items():
+            table._gaps.add(name)
+            for index in indexes:
+                table.columns[name][index] = _MISSING
+        return table
+
+    def _intern(self, value):
+        if isinstance(value, str):
+            return self._pool.setdefault(value, value)
+        if isinstance(value, (list, tuple)):
+            value = tuple(self._intern(item) for item in value)
+        elif isinstance(value, dict):
+            value = {key: self._intern(item) for key, item in value.items()}
+        else:
+            # Numbers, booleans and None are already small or shared
+            return value
+        try:
+            return self._pool.setdefault(_pool_key(value), value)
+        except TypeError:
+            return value
+
+    def append(self, record):
+        columns = self.columns
+        if len(record) != len(columns) or any(name not in columns for name in record):
+            for name in record:
+                if name not in columns:
+                    columns[name] = [_MISSING] * self._length
+                    if self._length:
+                        self._gaps.add(name)
+            for name in columns:
+                if name not in record:
+                    self._gaps.add(name)
+        setdefault = self._pool.setdefault
+        for name, column in columns.items():
+            value = record.get(name, _MISSING)
+            if type(value) is str:
+                value = setdefault(value, value)
+            elif value is not _MISSING:
+                value = self._intern(value)
+            column.append(value)
+        self._length += 1
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return (Row(self, index) for index in range(self._length))
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return Row(self, index)
+
+    def values(self, name):
+        """One field of every row, None where a row has no value"""
+        column = self.columns.get(name)
+        if column is None:
+            return [None] * self._length
+        if name not in self._gaps:
+            return column
+        return [None if value is _MISSING else value for value in column]
+
+    def apply(self, fields, function):
+        """
+        function applied to every row, as one result per row
+
+        function gets a dict of the given fields and must only read those.
+        Rows with the same values for them share one call and its result:
+        interned values are grouped by identity, numbers, booleans and None
+        by type and value.
+        """
+        columns = [self.columns.get(name) or [_MISSING] * self._length for name in fields]
+        keys = [[id(value) if type(value) in _SHARED_TYPES else (type(value), value) for value in column]
+                for column in columns]
+        keys = keys[0] if len(keys) == 1 else list(zip(*keys))
+        results = {}
+        for key, values in zip(keys, zip(*columns)):
+            if key not in results:
+                results[key] = function({name: value for name, value in zip(fields, values) if value is not _MISSING})
+        return [results[key] for key in keys]
+
+    def take(self, indexes):
+        """A new table with the given rows, sharing this table's interned values"""
+        table = ResourceTable(self._pool)
+        table.columns = {name: [column[index] for index in indexes] for name, column in self.columns.items()}
+        table._length = len(indexes)
+        table._gaps = set(self._gaps)
+        return table
+
+    def to_records(self):
+        """The records in the analyzer's list-of-dicts layout"""
+        return [row.to_dict() for row in self]
+
+    def to_columns(self):
+        """JSON-ready form: field names once, then the values of each field"""
+        values = {}
+        missing = {}
+        for name, column in self.columns.items():
+            if name in self._gaps:
+                indexes = [index for index, value in enumerate(column) if value is _MISSING]
+                if indexes:
+                    missing[name] = indexes
+                    column = [None if value is _MISSING else value for value in column]
+            values[name] = column
+        data = {COLUMNS_KEY: values}
+        if missing:
+            data['missing'] = missing
+        return data
+
+    def __repr__(self):
+        return f"ResourceTable({self._length} rows, columns={list(self.columns)})"
+
+# Types analyzer output uses for the per-resource records of a service
+RECORD_COLLECTIONS = (list, ResourceTable)
+
+def resource_collection(records=()):
+    """An empty or filled collection for per-resource records in the configured layout"""
+    return ResourceTable.from_records(records) if INVENTORY_COLUMNAR else list(records)
+
+def export(value):
+    """Copy of an interned value with tuples back as lists and dicts unshared"""
+    if isinstance(value, tuple):
+        return [export(item) for item in value]
+    if isinstance(value, dict):
+        return {key: export(item) for key, item in value.items()}
+    return value
+
+def json_default(value):
+    """json.dumps default that writes tables in columnar form and rows as dicts"""
+    if isinstance(value, ResourceTable):
+        return value.to_columns()
+    if isinstance(value, Row):
+        return value.to_dict()
+    return str(value)
+
+def decode_columns(value):
+    """json.loads object_hook restoring tables written by json_default"""
+    if COLUMNS_KEY in value:
+        return ResourceTable.from_columns(value)
+    return value
@@ -1,21 +1,67 @@
 import json
 import os
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from datetime import datetime
 import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from aws_lambda_powertools import Logger, Tracer, Metrics
 from aws_lambda_powertools.metrics import MetricUnit
+from aws_lambda_powertools.utilities.idempotency.exceptions import IdempotencyAlreadyInProgressError
+from aws_clients import client_config, get_client
+from appsync_publisher import create_publisher
+from review_idempotency import IDEMPOTENCY_TABLE_NAME, idempotent, persistence_layer, register_lambda_context
+from review_repository import ReviewRepository
+from review_results import create_results_store
+from inventory_cache import create_inventory_cache
+from review_digest import build_review_digest
+from rules import WellArchitectedEvaluator
+from inventory_columns import resource_collection
+from review_progress import ReviewProgress
+from stream_parser import FindingStreamParser, item_key, message_text
+from pillar_fanout import REVIEW_FANOUT, expand_pillars, fan_out, weighted_score
+from review_sweep import ReviewSweep
+from review_checkpoint import (
+    CHECKPOINT_MARGIN_SECONDS, CHECKPOINT_MAX_CONTINUATIONS, create_checkpoint_store,
+    resumable_messages, run_with_deadline
+)
+from agent_runtime import ReviewScope, install_priming, review_scope, runtime, token_usage
+from review_prompts import CONTINUE_QUERY, review_query
+from tool_memo import ToolMemo
+from review_baseline import REVIEW_INCREMENTAL, create_baseline_store, changed_inventory, plan_increment, resource_fingerprints
 
 logger = Logger()
 tracer = Tracer()
 metrics = Metrics()
 
-dynamodb = boto3.resource('dynamodb')
 TABLE_NAME = os.environ['DYNAMODB_TABLE_NAME']
 KNOWLEDGE_BASE_ID = os.environ['KNOWLEDGE_BASE_ID']
 BEDROCK_MODEL_ID = os.environ['BEDROCK_MODEL_ID']
 REGION = os.environ['REGION']
+ANALYZER_MAX_WORKERS = int(os.environ.get('ANALYZER_MAX_WORKERS', '6'))
+ANALYZER_SERVICE_TIMEOUT = float(os.environ.get('ANALYZER_SERVICE_TIMEOUT', '120'))
+S3_PROBE_WORKERS = int(os.environ.get('S3_PROBE_WORKERS', '16'))
 
-table = dynamodb.Table(TABLE_NAME)
+THROTTLING_ERROR_CODES = {
+    'Throttling', 'ThrottlingException', 'RequestLimitExceeded',
+    'TooManyRequestsException', 'SlowDown', 'ServiceUnavailable', 'RequestThrottled'
+}
+ACCESS_DENIED_ERROR_CODES = {'AccessDenied', 'AccessDeniedException', 'AllAccessDisabled'}
+S3_NOT_CONFIGURED_ERROR_CODES = {
+    'ServerSideEncryptionConfigurationNotFoundError',
+    'NoSuchPublicAccessBlockConfiguration',
+    'NoSuchLifecycleConfiguration'
+}
+
+reviews = ReviewRepository(TABLE_NAME, create_results_store())
+publisher = create_publisher()
+inventory_cache = create_inventory_cache()
+checkpoints = create_checkpoint_store()
+baselines = create_baseline_store()
 
 @tracer.capture_lambda_handler
 @logger.inject_lambda_context
@@ -23,24 +69,31 @@ table = dynamodb.Table(TABLE_NAME)
 def handler(event, context):
     """
     Main handler for AI agent processing using Strands Agents SDK
+    
+    Deliveries repeated by SQS or async invoke retries return without running
+    the review again.
     """
     try:
         review_id = event['reviewId']
-        aws_account_id = event['awsAccountId']
-        region = event['region']
-        pillars = event.get('pillars', ['all'])
-        action = event.get('action', 'perform_well_architected_review')
+        register_lambda_context(context)
         
         logger.info(f"Starting AI agent processing for review {review_id}")
         
-        if action == 'perform_well_architected_review':
-            result = perform_well_architected_review(
-                review_id, aws_account_id, region, pillars
-            )
-        else:
-            raise ValueError(f"Unknown action: {action}")
+        try:
+            result = execute_review(request=event, context=context)
+        except IdempotencyAlreadyInProgressError:
+            logger.info(f"Review {review_id} is already running; ignoring duplicate delivery")
+            metrics.add_metric(name="DuplicateReviewDeliveries", unit=MetricUnit.Count, value=1)
+            return {'success': True, 'reviewId': review_id, 'duplicate': True}
+        
+        if result.get('duplicate'):
+            logger.info(f"Review {review_id} was already processed; returning the stored result")
+            metrics.add_metric(name="DuplicateReviewDeliveries", unit=MetricUnit.Count, value=1)
+            return result
         
-        if result['success']:
+        if result.get('continued'):
+            logger.info(f"Review {review_id} continues in invocation {result['continuation']}")
+        elif result['success']:
             metrics.add_metric(name="SuccessfulReviews", unit=MetricUnit.Count, value=1)
             logger.info(f"Successfully completed review {review_id}")
         else:
@@ -57,92 +110,240 @@ def handler(event, context):
             'error': str(e)
         }
 
+@idempotent('review-execution')
+def execute_review(request, context=None):
+    """
+    Run the requested action once per distinct payload
+    
+    The idempotency key hashes the whole payload, which includes reviewId.
+    """
+    review_id = request['reviewId']
+    review_timestamp = request.get('timestamp')
+    aws_account_id = request.get('awsAccountId')
+    region = request['region']
+    pillars = request.get('pillars', ['all'])
+    action = request.get('action', 'perform_well_architected_review')
+    force_refresh = request.get('forceRefresh', False)
+    fan_out_pillars = request.get('fanOut', REVIEW_FANOUT)
+    incremental = request.get('incremental', REVIEW_INCREMENTAL)
+    
+    if action == 'perform_well_architected_review':
+        return perform_well_architected_review(
+            review_id, aws_account_id, region, pillars, force_refresh, review_timestamp,
+            fan_out_pillars, context, request.get('continuation', 0), incremental
+        )
+    if action == 'perform_sweep_review':
+        sweep = request.get('sweep') or {}
+        return perform_sweep_review(
+            review_id, region, pillars, sweep.get('accountIds'), sweep.get('regions'), review_timestamp,
+            context, request.get('continuation', 0)
+        )
+    raise ValueError(f"Unknown action: {action}")
+
 @tracer.capture_method
-def perform_well_architected_review(review_id, aws_account_id, region, pillars):
+def perform_well_architected_review(review_id, aws_account_id, region, pillars, force_refresh=False, review_timestamp=None, fan_out_pillars=REVIEW_FANOUT, context=None, continuation=0, incremental=REVIEW_INCREMENTAL):
     """
     Perform Well-Architected review using Strands Agents
+    
+    With fan_out_pillars, one smaller agent per pillar runs concurrently over
+    the shared inventory and their results are merged. When the invocation is
+    about to time out, the inventory, finished pillars and unfinished
+    conversations are checkpointed and a continuation is invoked to resume.
+    
+    With incremental, resources are diffed against the last completed review
+    of the same account and region; only new or changed ones are evaluated
+    and sent to the model, and the baseline's findings for the rest are kept.
     """
     try:
-        from strands import Agent, tool
-        from strands_tools import use_aws
+        checkpoint = None
+        if continuation and checkpoints is not None:
+            checkpoint = checkpoints.load(review_id, review_timestamp)
+            if checkpoint is None:
+                logger.warning(f"No checkpoint for continuation {continuation} of review {review_id}; starting over")
+        
+        # Inventory collection and rule evaluation are deterministic, so run
+        # them up front and hand the model a compact digest instead of raw data
+        if checkpoint:
+            resources = checkpoint['resources']
+        else:
+            resources = collect_inventory(aws_account_id, region, force_refresh)
+        fingerprints = resource_fingerprints(resources)
+        if checkpoint:
+            increment = checkpoint.get('increment')
+        elif incremental and not force_refresh and fingerprints is not None:
+            increment = load_increment(aws_account_id, region, pillars, fingerprints)
+        else:
+            increment = None
+        review_resources = changed_inventory(resources, set(increment['changed'])) if increment else resources
+        reused_findings = increment['findings'] if increment else []
+        reused_recommendations = increment['recommendations'] if increment else []
         
-        @tool
-        def analyze_aws_resources(account_id: str, region: str) -> dict:
-            """
-            Analyze AWS resources in the specified account and region
+        evaluator = WellArchitectedEvaluator()
+        evaluation = evaluator.evaluate(review_resources, pillars)
+        
+        # Finished units hold parsed (findings, recommendations, score); unfinished
+        # ones the conversation and items streamed before the previous timeout
+        completed = checkpoint['completed'] if checkpoint else {}
+        conversations = checkpoint['conversations'] if checkpoint else {}
+        
+        # Rule findings are known before the model runs, so subscribers see them first
+        progress = ReviewProgress(reviews, reviews.key(review_id, review_timestamp), publisher)
+        if checkpoint:
+            progress.mark_seen(evaluation['findings'] + reused_findings, evaluation['recommendations'] + reused_recommendations)
+            for output in list(completed.values()) + list(conversations.values()):
+                progress.mark_seen(*(output[:2] if isinstance(output, list) else (output['findings'], output['recommendations'])))
+        else:
+            progress.add(evaluation['findings'] + reused_findings, evaluation['recommendations'] + reused_recommendations)
+            progress.flush()
+        
+        active = {}
+        agents = []
+        # Tool results are shared by the agents of this invocation
+        memo = ToolMemo()
+        
+        async def review_pillars(unit, focus):
+            """Run one agent over the given pillars; returns its parsed output"""
+            focus_evaluation = evaluation if focus == pillars else evaluator.evaluate(review_resources, focus)
+            digest = build_review_digest(review_resources, focus_evaluation)
+            metrics.add_metric(name="DigestTokens", unit=MetricUnit.Count, value=digest['estimated_tokens'])
             
-            Args:
-                account_id: AWS account ID to analyze
-                region: AWS region to analyze
-                
-            Returns:
-                dict: Analysis results with resource information
-            """
-            try:
-                aws_analyzer = AWSResourceAnalyzer(account_id, region)
-                return aws_analyzer.analyze_all_resources()
-            except Exception as e:
-                logger.error(f"Error analyzing AWS resources: {str(e)}")
-                return {"error": str(e)}
-        
-        @tool
-        def evaluate_well_architected_pillars(resources: dict, pillars: list) -> dict:
-            """
-            Evaluate resources against Well-Architected Framework pillars
+            conversation = conversations.get(unit)
+            agent = runtime().agent(messages=conversation['messages'] if conversation else None)
+            agents.append(agent)
+            memo.start_conversation()
             
-            Args:
-                resources: Resource analysis results
-                pillars: List of pillars to evaluate
-                
-            Returns:
-                dict: Evaluation results with findings and recommendations
-            """
-            try:
-                evaluator = WellArchitectedEvaluator()
-                return evaluator.evaluate(resources, pillars)
-            except Exception as e:
-                logger.error(f"Error evaluating Well-Architected pillars: {str(e)}")
-                return {"error": str(e)}
-        
-        agent = Agent(
-            model=BEDROCK_MODEL_ID,
-            tools=[analyze_aws_resources, evaluate_well_architected_pillars, use_aws],
-            system_prompt=f"""
-            You are an AWS Well-Architected Framework expert. Your task is to:
+            if conversation and conversation['messages']:
+                query = CONTINUE_QUERY
+            else:
+                query = review_query(aws_account_id, region, focus, digest, increment)
             
-            1. Analyze AWS resources in account {aws_account_id} in region {region}
-            2. Evaluate them against the Well-Architected Framework pillars: {', '.join(pillars)}
-            3. Provide specific findings and actionable recommendations
-            4. Assign severity levels and implementation priorities
+            parser = FindingStreamParser()
+            active[unit] = (agent, parser)
             
-            Focus on the following pillars: {', '.join(pillars)}
+            # Called on the event loop; progress writes happen on its writer thread
+            def on_text(text):
+                findings, recommendations = parser.feed(text)
+                progress.add(unit_ids(unit, findings), unit_ids(unit, recommendations))
             
-            For each finding, include:
-            - Specific AWS service and resource affected
-            - Risk level (LOW, MEDIUM, HIGH, CRITICAL)
-            - Detailed recommendation with implementation steps
-            - Links to relevant AWS documentation
+            await stream_agent(agent, query, on_text)
             
-            Return a structured JSON response with findings and recommendations.
-            """
-        )
+            if parser.rejected:
+                metrics.add_metric(name="RejectedAgentItems", unit=MetricUnit.Count, value=parser.rejected)
+            findings, recommendations, score = parser.finish()
+            findings = unit_ids(unit, findings)
+            recommendations = unit_ids(unit, recommendations)
+            if conversation:
+                findings = merge_by_id(conversation['findings'], findings)
+                recommendations = merge_by_id(conversation['recommendations'], recommendations)
+            
+            del active[unit]
+            completed[unit] = [findings, recommendations, score]
+            return completed[unit]
+        
+        expanded = expand_pillars(pillars)
+        fanned_out = fan_out_pillars and len(expanded) > 1
+        units = {pillar: [pillar] for pillar in expanded} if fanned_out else {'review': pillars}
+        
+        def unit_ids(unit, items):
+            """Items of a per-pillar agent with ids prefixed by its unit, so agents numbering from 1 do not collide"""
+            if not fanned_out:
+                return items
+            return [
+                item if str(item.get('id', '')).startswith(f"{unit}-") else {**item, 'id': f"{unit}-{item.get('id')}"}
+                for item in items
+            ]
         
-        query = f"""
-        Please perform a comprehensive Well-Architected review for AWS account {aws_account_id} 
-        in region {region}, focusing on pillars: {', '.join(pillars)}.
+        if increment and not increment['changed']:
+            # Nothing changed since the baseline; its results and score still hold
+            units = {}
+        pending = [unit for unit in units if unit not in completed]
         
-        1. First, analyze all AWS resources in the account
-        2. Then evaluate them against the specified Well-Architected pillars
-        3. Provide detailed findings and recommendations
+        time_left = None
+        if context is not None and checkpoints is not None:
+            time_left = context.get_remaining_time_in_millis() / 1000 - CHECKPOINT_MARGIN_SECONDS
+        
+        # The shared tools read this review's inventory from the context of the agent tasks
+        scope_token = review_scope.set(ReviewScope(aws_account_id, review_resources, evaluator, collect_inventory, memo))
+        try:
+            outputs, timed_out = run_with_deadline(
+                fan_out(pending, lambda unit: review_pillars(unit, units[unit])), time_left
+            )
+        finally:
+            review_scope.reset(scope_token)
+        progress.flush()
+        record_token_usage(review_id, token_usage(agents))
+        record_tool_memo(review_id, memo.stats())
+        
+        if timed_out:
+            # The review stays IN_PROGRESS; send progress held back by the publisher now
+            if publisher is not None:
+                publisher.flush()
+            for unit, (agent, parser) in active.items():
+                conversations[unit] = {
+                    'messages': resumable_messages(agent.messages),
+                    'findings': unit_ids(unit, parser.findings),
+                    'recommendations': unit_ids(unit, parser.recommendations)
+                }
+            logger.info(
+                f"Review {review_id} has {len(completed)} finished and {len(conversations)} unfinished units"
+            )
+            return continue_review(
+                review_id, review_timestamp, context, continuation,
+                {
+                    'reviewId': review_id,
+                    'timestamp': review_timestamp,
+                    'awsAccountId': aws_account_id,
+                    'region': region,
+                    'pillars': pillars,
+                    'fanOut': fan_out_pillars,
+                    'incremental': incremental,
+                    'action': 'perform_well_architected_review'
+                },
+                {'resources': resources, 'increment': increment, 'completed': completed, 'conversations': conversations}
+            )
         
-        Return the results in a structured format suitable for saving to the database.
-        """
+        failed = [unit for unit, output in outputs.items() if isinstance(output, Exception)]
+        for unit in failed:
+            logger.error(f"Review of {unit} failed: {str(outputs[unit])}")
+        if failed:
+            metrics.add_metric(name="FailedPillarReviews", unit=MetricUnit.Count, value=len(failed))
+        if failed and not completed:
+            raise outputs[failed[0]]
         
-        response = agent(query)
+        agent_findings = [output[0] for output in completed.values()]
+        agent_recommendations = [output[1] for output in completed.values()]
+        if not units:
+            score = increment['score']
+        elif fanned_out:
+            score = weighted_score({unit: output[2] for unit, output in completed.items()})
+        else:
+            score = completed['review'][2]
         
-        findings, recommendations, score = parse_agent_response(response.message)
+        if score is None:
+            logger.warning(f"Agent output for review {review_id} contained no score")
+            metrics.add_metric(name="MissingScore", unit=MetricUnit.Count, value=1)
+        findings = merge_by_id(evaluation['findings'], *agent_findings, reused_findings)
+        recommendations = merge_by_id(evaluation['recommendations'], *agent_recommendations, reused_recommendations)
         
-        save_review_results(review_id, findings, recommendations, score)
+        save_review_results(review_id, findings, recommendations, score, review_timestamp)
+        if failed:
+            # The failed units must see unchanged resources again next time
+            logger.info(f"Not saving review baseline: {len(failed)} review units failed")
+        elif fingerprints is not None:
+            baseline = {
+                'reviewId': review_id,
+                'timestamp': review_timestamp,
+                'fingerprints': fingerprints,
+                'findings': findings,
+                'recommendations': recommendations,
+                'score': score
+            }
+            if increment and increment.get('fullReviewAt') is not None:
+                # Reused findings are only as fresh as the full review they came from
+                baseline['fullReviewAt'] = increment['fullReviewAt']
+            save_baseline(aws_account_id, region, pillars, baseline)
+        if checkpoint:
+            checkpoints.delete(review_id, review_timestamp)
         
         logger.info(f"Completed Well-Architected review for {review_id}")
         
@@ -151,66 +352,380 @@ def perform_well_architected_review(review_id, aws_account_id, region, pillars):
             'reviewId': review_id,
             'findings': len(findings),
             'recommendations': len(recommendations),
-            'score': score
+            'score': score,
+            'incremental': increment is not None,
+            'toolCalls': memo.stats()
         }
         
     except Exception as e:
         logger.error(f"Error performing Well-Architected review: {str(e)}")
-        update_review_status(review_id, 'FAILED', str(e))
+        update_review_status(review_id, 'FAILED', str(e), review_timestamp)
         return {
             'success': False,
             'error': str(e)
         }
 
+def load_increment(account_id, region, pillars, fingerprints):
+    """
+    Diff the inventory against the stored baseline, or return None for a full review
+    
+    A baseline that cannot be read only costs the saving, never the review.
+    """
+    if baselines is None:
+        return None
+    try:
+        baseline = baselines.load(account_id, region, expand_pillars(pillars))
+    except Exception as e:
+        logger.warning(f"Could not load review baseline for {account_id}/{region}: {str(e)}")
+        return None
+    if baseline is None:
+        return None
+    
+    increment = plan_increment(baseline, fingerprints)
+    logger.info(
+        f"Incremental review against {increment['baselineReviewId']}: {len(increment['changed'])} changed, "
+        f"{increment['removed']} removed, {increment['unchanged']} unchanged resources"
+    )
+    metrics.add_metric(name="IncrementalChangedResources", unit=MetricUnit.Count, value=len(increment['changed']))
+    metrics.add_metric(name="IncrementalUnchangedResources", unit=MetricUnit.Count, value=increment['unchanged'])
+    metrics.add_metric(name="IncrementalReusedFindings", unit=MetricUnit.Count, value=len(increment['findings']))
+    return increment
+
+def save_baseline(account_id, region, pillars, baseline):
+    """Store the results of a completed review as the baseline of the next one"""
+    if baselines is None:
+        return
+    try:
+        baselines.save(account_id, region, {**baseline, 'pillars': sorted(expand_pillars(pillars))})
+    except Exception as e:
+        logger.warning(f"Could not save review baseline for {account_id}/{region}: {str(e)}")
+
+def continue_review(review_id, review_timestamp, context, continuation, payload, state):
+    """
+    Save a checkpoint and invoke this function again to resume the review
+    
+    The review stays IN_PROGRESS. Raises once CHECKPOINT_MAX_CONTINUATIONS
+    is reached so a review that can never finish is failed instead.
+    """
+    if continuation >= CHECKPOINT_MAX_CONTINUATIONS:
+        raise TimeoutError(f"Review did not finish within {continuation + 1} invocations")
+    
+    checkpoints.save(review_id, review_timestamp, state)
+    get_client('lambda').invoke(
+        # The qualified ARN keeps the continuation on the same version or alias
+        FunctionName=context.invoked_function_arn,
+        InvocationType='Event',
+        Payload=json.dumps({**payload, 'continuation': continuation + 1})
+    )
+    
+    logger.info(f"Checkpointed review {review_id}; continuation {continuation + 1} queued")
+    metrics.add_metric(name="ReviewContinuations", unit=MetricUnit.Count, value=1)
+    
+    return {
+        'success': True,
+        'reviewId': review_id,
+        'continued': True,
+        'continuation': continuation + 1
+    }
+
+@tracer.capture_method
+def perform_sweep_review(review_id, home_region, pillars, account_ids=None, regions=None, review_timestamp=None, context=None, continuation=0):
+    """
+    Roll up the rule-based review of many accounts and regions into one review
+    
+    Accounts default to the active accounts of the organization and regions to
+    those enabled in each account. Findings are evaluated per account and region,
+    global services once per account, and their ids prefixed with the account and
+    region (or "global") so resources with equal names stay distinct.
+    
+    Units not started before the Lambda nears its timeout are checkpointed
+    with the inventories collected so far, and a continuation collects them.
+    """
+    try:
+        checkpoint = None
+        if continuation and checkpoints is not None:
+            checkpoint = checkpoints.load(review_id, review_timestamp)
+            if checkpoint is None:
+                logger.warning(f"No checkpoint for continuation {continuation} of sweep {review_id}; starting over")
+        
+        sweep = ReviewSweep(
+            lambda account_id, region, credentials, rate_limiter: AWSResourceAnalyzer(
+                account_id, region, credentials=credentials, rate_limiter=rate_limiter
+            )
+        )
+        if checkpoint:
+            targets = checkpoint['targets']
+            failed_accounts = checkpoint['failedAccounts']
+            failed_units = checkpoint['failedUnits']
+            units = checkpoint['remaining']
+            inventories = checkpoint['inventories']
+        else:
+            targets, failed_accounts = sweep.resolve_targets(home_region, account_ids, regions)
+            if not targets:
+                raise ValueError("No accounts could be reached for the sweep")
+            failed_units = []
+            units = None
+            inventories = ()
+        
+        deadline = None
+        if context is not None and checkpoints is not None:
+            deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000 - CHECKPOINT_MARGIN_SECONDS
+        
+        result = sweep.run(
+            targets, AWSResourceAnalyzer.SERVICES, home_region, deadline=deadline, units=units, inventories=inventories
+        )
+        failed_units = failed_units + result['failed_units']
+        
+        metrics.add_metric(name="SweepWorkUnits", unit=MetricUnit.Count, value=result['units'])
+        metrics.add_metric(name="SweepFailedUnits", unit=MetricUnit.Count, value=len(result['failed_units']))
+        logger.info(
+            f"Sweep {review_id} collected {result['units']} units in {result['duration_ms']} ms; "
+            f"{len(result['failed_units'])} failed, {len(result['remaining'])} left, "
+            f"{result['throttle_wait_seconds']}s rate limited"
+        )
+        
+        if result['remaining']:
+            return continue_review(
+                review_id, review_timestamp, context, continuation,
+                {
+                    'reviewId': review_id,
+                    'timestamp': review_timestamp,
+                    'region': home_region,
+                    'pillars': pillars,
+                    'sweep': {'accountIds': account_ids, 'regions': regions},
+                    'action': 'perform_sweep_review'
+                },
+                {
+                    'targets': targets,
+                    'failedAccounts': failed_accounts,
+                    'failedUnits': failed_units,
+                    'remaining': result['remaining'],
+                    'inventories': result['inventories']
+                }
+            )
+        
+        evaluator = WellArchitectedEvaluator()
+        findings = []
+        recommendations = []
+        for inventory in result['inventories']:
+            scope = f"{inventory['account_id']}/{inventory['region']}"
+            evaluation = evaluator.evaluate(inventory, pillars)
+            findings.extend({**f, 'id': f"{scope}/{f['id']}"} for f in evaluation['findings'])
+            recommendations.extend({**r, 'id': f"{scope}/{r['id']}"} for r in evaluation['recommendations'])
+        
+        metrics.add_metric(name="SweepAccounts", unit=MetricUnit.Count, value=len(targets))
+        logger.info(
+            f"Sweep {review_id} covered {len(targets)} accounts and {len(result['inventories'])} inventories; "
+            f"{len(failed_units)} units failed, {len(failed_accounts)} accounts unreachable"
+        )
+        
+        save_review_results(review_id, findings, recommendations, None, review_timestamp)
+        if checkpoint:
+            checkpoints.delete(review_id, review_timestamp)
+        
+        return {
+            'success': True,
+            'reviewId': review_id,
+            'accounts': len(targets),
+            'failedAccounts': sorted(failed_accounts),
+            'failedUnits': len(failed_units),
+            'findings': len(findings),
+            'recommendations': len(recommendations)
+        }
+        
+    except Exception as e:
+        logger.error(f"Error performing sweep review: {str(e)}")
+        update_review_status(review_id, 'FAILED', str(e), review_timestamp)
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+def record_token_usage(review_id, usage):
+    """Emit Bedrock token usage of a review, separating prompt cache reads and writes"""
+    metrics.add_metric(name="AgentInputTokens", unit=MetricUnit.Count, value=usage['inputTokens'])
+    metrics.add_metric(name="AgentOutputTokens", unit=MetricUnit.Count, value=usage['outputTokens'])
+    metrics.add_metric(name="PromptCacheReadTokens", unit=MetricUnit.Count, value=usage['cacheReadInputTokens'])
+    metrics.add_metric(name="PromptCacheWriteTokens", unit=MetricUnit.Count, value=usage['cacheWriteInputTokens'])
+    
+    # inputTokens excludes tokens read from or written to the cache
+    prompt_tokens = usage['inputTokens'] + usage['cacheReadInputTokens'] + usage['cacheWriteInputTokens']
+    if prompt_tokens:
+        logger.info(
+            f"Review {review_id} used {prompt_tokens} prompt tokens, "
+            f"{usage['cacheReadInputTokens'] / prompt_tokens:.0%} served from the prompt cache"
+        )
+
+def record_tool_memo(review_id, stats):
+    """Emit how many agent tool calls were served from the run's ToolMemo"""
+    metrics.add_metric(name="ToolMemoHits", unit=MetricUnit.Count, value=stats['hits'])
+    metrics.add_metric(name="ToolMemoMisses", unit=MetricUnit.Count, value=stats['misses'])
+    metrics.add_metric(name="ToolMemoReferences", unit=MetricUnit.Count, value=stats['references'])
+    if stats['hits']:
+        logger.info(
+            f"Review {review_id} served {stats['hits']} of {stats['hits'] + stats['misses']} tool calls "
+            f"from memo, {stats['references']} as references to earlier results"
+        )
+
+async def stream_agent(agent, query, on_text):
+    """Drive the agent through its async event stream, handing text chunks to on_text"""
+    async for event in agent.stream_async(query):
+        if 'data' in event:
+            on_text(event['data'])
+
+def collect_inventory(account_id, region, force_refresh=False):
+    """Collect AWS resources, going through the inventory cache when configured"""
+    aws_analyzer = AWSResourceAnalyzer(account_id, region)
+    if inventory_cache is None:
+        return aws_analyzer.analyze_all_resources()
+    
+    results = inventory_cache.collect(aws_analyzer, force_refresh=force_refresh)
+    metrics.add_metric(name="InventoryCacheHits", unit=MetricUnit.Count, value=len(results['cache']['hits']))
+    metrics.add_metric(name="InventoryCacheMisses", unit=MetricUnit.Count, value=len(results['cache']['misses']))
+    return results
+
+def merge_by_id(*item_lists):
+    """
+    Concatenate lists of findings or recommendations, keeping the first of repeated items
+    
+    Items repeat each other when their item_key matches. Distinct items that
+    share an id are kept, the later ones with a numeric suffix on the id.
+    """
+    merged = {}
+    ids = set()
+    for items in item_lists:
+        for item in items:
+            key = item_key(item) if item.get('id') else id(item)
+            if key in merged:
+                continue
+            if item.get('id') in ids:
+                suffix = 2
+                while f"{item['id']}-{suffix}" in ids:
+                    suffix += 1
+                item = {**item, 'id': f"{item['id']}-{suffix}"}
+            ids.add(item.get('id'))
+            merged[key] = item
+    return list(merged.values())
+
 class AWSResourceAnalyzer:
     """Analyze AWS resources for Well-Architected review"""
     
-    def __init__(self, account_id, region):
+    SERVICES = ('ec2', 's3', 'rds', 'lambda', 'iam', 'cloudformation')
+    
+    def __init__(self, account_id, region, max_workers=None, service_timeouts=None,
+                 credentials=None, rate_limiter=None):
         self.account_id = account_id
         self.region = region
-        self.session = boto3.Session(region_name=region)
+        self.max_workers = max_workers or ANALYZER_MAX_WORKERS
+        self.service_timeouts = service_timeouts or {}
+        # credentials() returns boto3 Session kwargs, e.g. from an assumed role
+        self.credentials = credentials
+        self.rate_limiter = rate_limiter
+        self._local = threading.local()
+    
+    def client(self, service_name, config=None):
+        """Create a client from a session owned by the calling worker thread"""
+        credentials = self.credentials() if self.credentials else None
+        session = getattr(self._local, 'session', None)
+        if session is None or getattr(self._local, 'session_credentials', None) is not credentials:
+            session = boto3.Session(region_name=self.region, **(credentials or {}))
+            self._local.session = session
+            self._local.session_credentials = credentials
+        base_config = client_config(max_pool_connections=S3_PROBE_WORKERS)
+        client = session.client(service_name, config=base_config.merge(config) if config else base_config)
+        if self.rate_limiter:
+            # Every API call, including paginated pages, takes a token first
+            client.meta.events.register('before-call', lambda **kwargs: self.rate_limiter.acquire())
+        return client
     
-    def analyze_all_resources(self):
-        """Analyze all relevant AWS resources"""
+    def paginate(self, client, operation, result_key, stats, **kwargs):
+        """Yield items from every page of an operation, counting pages and items"""
+        paginator = client.get_paginator(operation)
+        for page in paginator.paginate(**kwargs):
+            stats['pages'] += 1
+            for item in page.get(result_key, []):
+                stats['items'] += 1
+                yield item
+    
+    def analyze_all_resources(self, services=None):
+        """Analyze all relevant AWS resources, one service per worker thread"""
+        services = self.SERVICES if services is None else services
         results = {
             'account_id': self.account_id,
             'region': self.region,
             'timestamp': datetime.utcnow().isoformat(),
             'services': {}
         }
+        failed_services = []
         
+        started = time.monotonic()
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(self.max_workers, len(services))),
+            thread_name_prefix='aws-analyzer'
+        )
         try:
-            results['services']['ec2'] = self.analyze_ec2()
-            results['services']['s3'] = self.analyze_s3()
-            results['services']['rds'] = self.analyze_rds()
-            results['services']['lambda'] = self.analyze_lambda()
-            results['services']['iam'] = self.analyze_iam()
-            results['services']['cloudformation'] = self.analyze_cloudformation()
-        except Exception as e:
-            logger.error(f"Error analyzing resources: {str(e)}")
-            results['error'] = str(e)
+            futures = {
+                service: executor.submit(getattr(self, f'analyze_{service}'))
+                for service in services
+            }
+            
+            for service, future in futures.items():
+                timeout = self.service_timeouts.get(service, ANALYZER_SERVICE_TIMEOUT)
+                remaining = max(0.0, started + timeout - time.monotonic())
+                try:
+                    service_result = future.result(timeout=remaining)
+                except FuturesTimeoutError:
+                    future.cancel()
+                    logger.warning(f"Analysis of {service} timed out after {timeout}s")
+                    service_result = {'error': f"Timed out after {timeout}s"}
+                except Exception as e:
+                    logger.error(f"Error analyzing {service}: {str(e)}")
+                    service_result = {'error': str(e)}
+                
+                if 'error' in service_result:
+                    failed_services.append(service)
+                results['services'][service] = service_result
+        finally:
+            # Do not block on stragglers; their partial work is discarded
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        results['collection'] = {
+            'duration_ms': int((time.monotonic() - started) * 1000),
+            'failed_services': failed_services,
+            'partial': bool(failed_services)
+        }
         
         return results
     
     def analyze_ec2(self):
         """Analyze EC2 instances"""
         try:
-            ec2 = self.session.client('ec2')
-            response = ec2.describe_instances()
+            ec2 = self.client('ec2')
+            stats = {'pages': 0, 'items': 0}
+            by_type = Counter()
+            by_state = Counter()
             
-            instances = []
-            for reservation in response['Reservations']:
+            instances = resource_collection()
+            for reservation in self.paginate(ec2, 'describe_instances', 'Reservations', stats):
                 for instance in reservation['Instances']:
+                    state = instance['State']['Name']
+                    by_type[instance['InstanceType']] += 1
+                    by_state[state] += 1
                     instances.append({
                         'instance_id': instance['InstanceId'],
                         'instance_type': instance['InstanceType'],
-                        'state': instance['State']['Name'],
-                        'security_groups': [sg['GroupId'] for sg in instance['SecurityGroups']],
+                        'state': state,
+                        'security_groups': [sg['GroupId'] for sg in instance.get('SecurityGroups', [])],
                         'subnet_id': instance.get('SubnetId'),
                         'vpc_id': instance.get('VpcId')
                     })
             
-            return {'instances': instances, 'count': len(instances)}
+            return {
+                'instances': instances,
+                'count': len(instances),
+                'summary': {'by_instance_type': dict(by_type), 'by_state': dict(by_state)},
+                'pagination': {'pages': stats['pages'], 'items': len(instances)}
+            }
         except Exception as e:
             logger.error(f"Error analyzing EC2: {str(e)}")
             return {'error': str(e)}
@@ -218,27 +733,24 @@ class AWSResourceAnalyzer:
     def analyze_s3(self):
         """Analyze S3 buckets"""
         try:
-            s3 = self.session.client('s3')
-            response = s3.list_buckets()
+            # AdaptiveBackoff owns retries of these calls; botocore retries would
+            # absorb the throttling it reacts to and multiply the attempts
+            s3 = self.client('s3', config=Config(retries={'mode': 'standard', 'max_attempts': 1}))
+            prober = S3BucketProber(s3, max_workers=S3_PROBE_WORKERS)
+            response = prober.backoff.call(s3.list_buckets)
             
-            buckets = []
-            for bucket in response['Buckets']:
-                bucket_name = bucket['Name']
-                bucket_info = {'name': bucket_name}
-                
-                try:
-                    bucket_info['encryption'] = s3.get_bucket_encryption(Bucket=bucket_name)
-                except:
-                    bucket_info['encryption'] = None
-                
-                try:
-                    bucket_info['versioning'] = s3.get_bucket_versioning(Bucket=bucket_name)
-                except:
-                    bucket_info['versioning'] = None
-                
-                buckets.append(bucket_info)
+            buckets = resource_collection(prober.probe_all(response['Buckets']))
             
-            return {'buckets': buckets, 'count': len(buckets)}
+            summary = {}
+            for attribute in S3BucketProber.ATTRIBUTES:
+                summary[attribute] = dict(Counter(bucket[attribute]['status'] for bucket in buckets))
+            
+            return {
+                'buckets': buckets,
+                'count': len(buckets),
+                'summary': summary,
+                'throttle_events': prober.backoff.throttle_events
+            }
         except Exception as e:
             logger.error(f"Error analyzing S3: {str(e)}")
             return {'error': str(e)}
@@ -246,11 +758,19 @@ class AWSResourceAnalyzer:
     def analyze_rds(self):
         """Analyze RDS instances"""
         try:
-            rds = self.session.client('rds')
-            response = rds.describe_db_instances()
+            rds = self.client('rds')
+            stats = {'pages': 0, 'items': 0}
+            by_engine = Counter()
+            by_class = Counter()
+            multi_az = 0
+            encrypted = 0
             
-            instances = []
-            for instance in response['DBInstances']:
+            instances = resource_collection()
+            for instance in self.paginate(rds, 'describe_db_instances', 'DBInstances', stats):
+                by_engine[instance['Engine']] += 1
+                by_class[instance['DBInstanceClass']] += 1
+                multi_az += instance.get('MultiAZ', False)
+                encrypted += instance.get('StorageEncrypted', False)
                 instances.append({
                     'db_instance_identifier': instance['DBInstanceIdentifier'],
                     'db_instance_class': instance['DBInstanceClass'],
@@ -260,7 +780,17 @@ class AWSResourceAnalyzer:
                     'backup_retention_period': instance.get('BackupRetentionPeriod', 0)
                 })
             
-            return {'instances': instances, 'count': len(instances)}
+            return {
+                'instances': instances,
+                'count': len(instances),
+                'summary': {
+                    'by_engine': dict(by_engine),
+                    'by_instance_class': dict(by_class),
+                    'multi_az': multi_az,
+                    'encrypted': encrypted
+                },
+                'pagination': dict(stats)
+            }
         except Exception as e:
             logger.error(f"Error analyzing RDS: {str(e)}")
             return {'error': str(e)}
@@ -268,20 +798,32 @@ class AWSResourceAnalyzer:
     def analyze_lambda(self):
         """Analyze Lambda functions"""
         try:
-            lambda_client = self.session.client('lambda')
-            response = lambda_client.list_functions()
+            lambda_client = self.client('lambda')
+            stats = {'pages': 0, 'items': 0}
+            by_runtime = Counter()
+            total_memory = 0
             
-            functions = []
-            for function in response['Functions']:
+            functions = resource_collection()
+            for function in self.paginate(lambda_client, 'list_functions', 'Functions', stats):
+                # Container image functions have no Runtime
+                runtime = function.get('Runtime', 'container-image')
+                by_runtime[runtime] += 1
+                total_memory += function['MemorySize']
                 functions.append({
                     'function_name': function['FunctionName'],
-                    'runtime': function['Runtime'],
+                    'runtime': runtime,
                     'memory_size': function['MemorySize'],
                     'timeout': function['Timeout'],
-                    'last_modified': function['LastModified']
+                    'last_modified': function['LastModified'],
+                    'architectures': function.get('Architectures', ['x86_64'])
                 })
             
-            return {'functions': functions, 'count': len(functions)}
+            return {
+                'functions': functions,
+                'count': len(functions),
+                'summary': {'by_runtime': dict(by_runtime), 'total_memory_mb': total_memory},
+                'pagination': dict(stats)
+            }
         except Exception as e:
             logger.error(f"Error analyzing Lambda: {str(e)}")
             return {'error': str(e)}
@@ -289,14 +831,25 @@ class AWSResourceAnalyzer:
     def analyze_iam(self):
         """Analyze IAM resources"""
         try:
-            iam = self.session.client('iam')
+            iam = self.client('iam')
+            
+            role_stats = {'pages': 0, 'items': 0}
+            for _ in self.paginate(iam, 'list_roles', 'Roles', role_stats):
+                pass
             
-            roles_response = iam.list_roles()
-            policies_response = iam.list_policies(Scope='Local')
+            policy_stats = {'pages': 0, 'items': 0}
+            unattached_policies = 0
+            for policy in self.paginate(iam, 'list_policies', 'Policies', policy_stats, Scope='Local'):
+                if not policy.get('AttachmentCount'):
+                    unattached_policies += 1
             
             return {
-                'roles': {'count': len(roles_response['Roles'])},
-                'policies': {'count': len(policies_response['Policies'])}
+                'roles': {'count': role_stats['items'], 'pagination': role_stats},
+                'policies': {
+                    'count': policy_stats['items'],
+                    'unattached': unattached_policies,
+                    'pagination': policy_stats
+                }
             }
         except Exception as e:
             logger.error(f"Error analyzing IAM: {str(e)}")
@@ -305,11 +858,13 @@ class AWSResourceAnalyzer:
     def analyze_cloudformation(self):
         """Analyze CloudFormation stacks"""
         try:
-            cf = self.session.client('cloudformation')
-            response = cf.describe_stacks()
+            cf = self.client('cloudformation')
+            stats = {'pages': 0, 'items': 0}
+            by_status = Counter()
             
-            stacks = []
-            for stack in response['Stacks']:
+            stacks = resource_collection()
+            for stack in self.paginate(cf, 'describe_stacks', 'Stacks', stats):
+                by_status[stack['StackStatus']] += 1
                 stacks.append({
                     'stack_name': stack['StackName'],
                     'stack_status': stack['StackStatus'],
@@ -317,214 +872,219 @@ class AWSResourceAnalyzer:
                     'drift_information': stack.get('DriftInformation', {})
                 })
             
-            return {'stacks': stacks, 'count': len(stacks)}
+            return {
+                'stacks': stacks,
+                'count': len(stacks),
+                'summary': {'by_status': dict(by_status)},
+                'pagination': dict(stats)
+            }
         except Exception as e:
             logger.error(f"Error analyzing CloudFormation: {str(e)}")
             return {'error': str(e)}
 
-class WellArchitectedEvaluator:
-    """Evaluate resources against Well-Architected Framework"""
+class AdaptiveBackoff:
+    """Shared delay that grows when AWS throttles and decays on success"""
     
-    def evaluate(self, resources, pillars):
-        """Evaluate resources against specified pillars"""
-        findings = []
-        recommendations = []
-        
-        if 'all' in pillars or 'security' in pillars:
-            sec_findings, sec_recs = self.evaluate_security(resources)
-            findings.extend(sec_findings)
-            recommendations.extend(sec_recs)
-        
-        if 'all' in pillars or 'reliability' in pillars:
-            rel_findings, rel_recs = self.evaluate_reliability(resources)
-            findings.extend(rel_findings)
-            recommendations.extend(rel_recs)
-        
-        if 'all' in pillars or 'performance' in pillars:
-            perf_findings, perf_recs = self.evaluate_performance(resources)
-            findings.extend(perf_findings)
-            recommendations.extend(perf_recs)
+    def __init__(self, base_delay=0.1, max_delay=10.0, max_attempts=6):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.delay = 0.0
+        self.throttle_events = 0
+        self._lock = threading.Lock()
+    
+    def call(self, operation, **kwargs):
+        """Call operation, retrying with a jittered shared delay while throttled"""
+        for attempt in range(self.max_attempts):
+            delay = self.delay
+            if delay:
+                time.sleep(random.uniform(delay / 2, delay))
+            
+            try:
+                response = operation(**kwargs)
+            except ClientError as e:
+                code = e.response.get('Error', {}).get('Code', '')
+                if code in THROTTLING_ERROR_CODES and attempt < self.max_attempts - 1:
+                    self._throttled()
+                    continue
+                raise
+            
+            self._succeeded()
+            return response
+    
+    def _throttled(self):
+        with self._lock:
+            self.throttle_events += 1
+            self.delay = min(self.max_delay, max(self.base_delay, self.delay * 2))
+    
+    def _succeeded(self):
+        if not self.delay:
+            return
+        with self._lock:
+            self.delay = self.delay / 2 if self.delay > self.base_delay else 0.0
+
+class S3BucketProber:
+    """Probe S3 bucket configuration concurrently with a bounded worker pool"""
+    
+    ATTRIBUTES = ('encryption', 'versioning', 'public_access_block', 'lifecycle', 'logging')
+    
+    def __init__(self, s3_client, max_workers=None, backoff=None):
+        self.s3 = s3_client
+        self.max_workers = max_workers or S3_PROBE_WORKERS
+        self.backoff = backoff or AdaptiveBackoff()
+    
+    def probe_all(self, buckets):
+        """Probe every bucket, preserving the input order"""
+        if not buckets:
+            return []
         
-        if 'all' in pillars or 'cost' in pillars:
-            cost_findings, cost_recs = self.evaluate_cost_optimization(resources)
-            findings.extend(cost_findings)
-            recommendations.extend(cost_recs)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='s3-prober') as executor:
+            return list(executor.map(self.probe_bucket, buckets))
+    
+    def probe_bucket(self, bucket):
+        """Collect all configuration attributes of a single bucket"""
+        name = bucket['Name']
+        creation_date = bucket.get('CreationDate')
         
         return {
-            'findings': findings,
-            'recommendations': recommendations,
-            'total_findings': len(findings),
-            'total_recommendations': len(recommendations)
+            'name': name,
+            'creation_date': creation_date.isoformat() if creation_date else None,
+            'encryption': self._probe(name, 'get_bucket_encryption', self._encryption),
+            'versioning': self._probe(name, 'get_bucket_versioning', self._versioning),
+            'public_access_block': self._probe(name, 'get_public_access_block', self._public_access_block),
+            'lifecycle': self._probe(name, 'get_bucket_lifecycle_configuration', self._lifecycle),
+            'logging': self._probe(name, 'get_bucket_logging', self._logging)
         }
     
-    def evaluate_security(self, resources):
-        """Evaluate security pillar"""
-        findings = []
-        recommendations = []
-        
-        s3_data = resources.get('services', {}).get('s3', {})
-        if 'buckets' in s3_data:
-            for bucket in s3_data['buckets']:
-                if not bucket.get('encryption'):
-                    findings.append({
-                        'id': f"s3-encryption-{bucket['name']}",
-                        'pillar': 'Security',
-                        'title': 'S3 Bucket Not Encrypted',
-                        'description': f"S3 bucket {bucket['name']} does not have encryption enabled",
-                        'severity': 'HIGH',
-                        'resourceArn': f"arn:aws:s3:::{bucket['name']}",
-                        'service': 'S3'
-                    })
-                    
-                    recommendations.append({
-                        'id': f"s3-encryption-rec-{bucket['name']}",
-                        'title': 'Enable S3 Bucket Encryption',
-                        'description': f"Enable server-side encryption for S3 bucket {bucket['name']}",
-                        'priority': 'HIGH',
-                        'effort': 'Low',
-                        'implementationGuide': 'Use AWS KMS or AES-256 encryption for S3 bucket'
-                    })
+    def _probe(self, bucket_name, operation, extract):
+        """Call one bucket API and classify the outcome"""
+        try:
+            response = self.backoff.call(getattr(self.s3, operation), Bucket=bucket_name)
+        except ClientError as e:
+            code = e.response.get('Error', {}).get('Code', '')
+            if code in S3_NOT_CONFIGURED_ERROR_CODES:
+                return {'status': 'NOT_CONFIGURED'}
+            if code in ACCESS_DENIED_ERROR_CODES:
+                return {'status': 'ACCESS_DENIED'}
+            logger.warning(f"Error calling {operation} for bucket {bucket_name}: {code}")
+            return {'status': 'ERROR', 'error': code or str(e)}
+        except Exception as e:
+            logger.warning(f"Error calling {operation} for bucket {bucket_name}: {str(e)}")
+            return {'status': 'ERROR', 'error': str(e)}
         
-        return findings, recommendations
+        return extract(response)
     
-    def evaluate_reliability(self, resources):
-        """Evaluate reliability pillar"""
-        findings = []
-        recommendations = []
-        
-        rds_data = resources.get('services', {}).get('rds', {})
-        if 'instances' in rds_data:
-            for instance in rds_data['instances']:
-                if not instance.get('multi_az'):
-                    findings.append({
-                        'id': f"rds-multiaz-{instance['db_instance_identifier']}",
-                        'pillar': 'Reliability',
-                        'title': 'RDS Instance Not Multi-AZ',
-                        'description': f"RDS instance {instance['db_instance_identifier']} is not configured for Multi-AZ deployment",
-                        'severity': 'MEDIUM',
-                        'resourceArn': f"arn:aws:rds:{resources['region']}:{resources['account_id']}:db:{instance['db_instance_identifier']}",
-                        'service': 'RDS'
-                    })
-        
-        return findings, recommendations
+    @staticmethod
+    def _encryption(response):
+        rules = response.get('ServerSideEncryptionConfiguration', {}).get('Rules', [])
+        algorithms = [
+            rule.get('ApplyServerSideEncryptionByDefault', {}).get('SSEAlgorithm')
+            for rule in rules
+        ]
+        return {'status': 'CONFIGURED', 'algorithms': [a for a in algorithms if a]}
     
-    def evaluate_performance(self, resources):
-        """Evaluate performance efficiency pillar"""
-        findings = []
-        recommendations = []
-        
-        return findings, recommendations
+    @staticmethod
+    def _versioning(response):
+        # A bucket that never had versioning enabled returns no Status
+        status = response.get('Status')
+        if not status:
+            return {'status': 'NOT_CONFIGURED'}
+        return {
+            'status': 'CONFIGURED',
+            'value': status,
+            'mfa_delete': response.get('MFADelete') == 'Enabled'
+        }
     
-    def evaluate_cost_optimization(self, resources):
-        """Evaluate cost optimization pillar"""
-        findings = []
-        recommendations = []
-        
-        return findings, recommendations
+    @staticmethod
+    def _public_access_block(response):
+        config = response.get('PublicAccessBlockConfiguration', {})
+        return {
+            'status': 'CONFIGURED',
+            'all_blocked': all(config.get(key, False) for key in (
+                'BlockPublicAcls', 'IgnorePublicAcls', 'BlockPublicPolicy', 'RestrictPublicBuckets'
+            )),
+            'settings': config
+        }
+    
+    @staticmethod
+    def _lifecycle(response):
+        rules = response.get('Rules', [])
+        return {
+            'status': 'CONFIGURED',
+            'rules': len(rules),
+            'enabled_rules': sum(1 for rule in rules if rule.get('Status') == 'Enabled')
+        }
+    
+    @staticmethod
+    def _logging(response):
+        # Logging is "configured" only when a target bucket is set
+        logging_enabled = response.get('LoggingEnabled')
+        if not logging_enabled:
+            return {'status': 'NOT_CONFIGURED'}
+        return {'status': 'CONFIGURED', 'target_bucket': logging_enabled.get('TargetBucket')}
 
-def parse_agent_response(response_text):
-    """Parse agent response to extract findings, recommendations, and score"""
+def parse_agent_response(response):
+    """
+    Parse agent output (text or a structured message) into findings, recommendations and score
+    
+    Invalid items are dropped rather than failing the whole response, and the
+    score is None when the model did not provide one.
+    """
     try:
-        if isinstance(response_text, str) and response_text.strip().startswith('{'):
-            response_data = json.loads(response_text)
-        else:
-            response_data = {
-                'findings': [],
-                'recommendations': [],
-                'score': 75.0,
-                'raw_response': str(response_text)
-            }
+        parser = FindingStreamParser()
+        parser.feed(message_text(response))
+        findings, recommendations, score = parser.finish()
         
-        findings = response_data.get('findings', [])
-        recommendations = response_data.get('recommendations', [])
-        score = response_data.get('score', 75.0)
+        if parser.rejected:
+            logger.warning(f"Dropped {parser.rejected} items that do not match the Finding/Recommendation shape")
         
         return findings, recommendations, score
         
     except Exception as e:
         logger.error(f"Error parsing agent response: {str(e)}")
-        return [], [], 0.0
+        return [], [], None
 
 @tracer.capture_method
-def save_review_results(review_id, findings, recommendations, score):
+def save_review_results(review_id, findings, recommendations, score, timestamp=None):
     """Save review results to DynamoDB"""
     try:
-        response = table.query(
-            KeyConditionExpression='reviewId = :reviewId',
-            ExpressionAttributeValues={':reviewId': review_id},
-            ScanIndexForward=False,
-            Limit=1
-        )
-        
-        if response['Items']:
-            item = response['Items'][0]
-            table.update_item(
-                Key={
-                    'reviewId': review_id,
-                    'timestamp': item['timestamp']
-                },
-                UpdateExpression="SET #status = :status, #findings = :findings, #recommendations = :recommendations, #score = :score, #updatedAt = :updatedAt",
-                ExpressionAttributeNames={
-                    '#status': 'status',
-                    '#findings': 'findings',
-                    '#recommendations': 'recommendations',
-                    '#score': 'score',
-                    '#updatedAt': 'updatedAt'
-                },
-                ExpressionAttributeValues={
-                    ':status': 'COMPLETED',
-                    ':findings': findings,
-                    ':recommendations': recommendations,
-                    ':score': score,
-                    ':updatedAt': datetime.utcnow().isoformat()
-                }
-            )
-            
+        if reviews.complete(review_id, findings, recommendations, score, timestamp):
             logger.info(f"Saved review results for {review_id}")
+            publish_status(review_id, 'COMPLETED', timestamp)
         
     except Exception as e:
         logger.error(f"Error saving review results: {str(e)}")
         raise
 
 @tracer.capture_method
-def update_review_status(review_id, status, error_message=None):
-    """Update review status"""
+def update_review_status(review_id, status, error_message=None, timestamp=None):
+    """Update review status and notify subscribers"""
     try:
-        response = table.query(
-            KeyConditionExpression='reviewId = :reviewId',
-            ExpressionAttributeValues={':reviewId': review_id},
-            ScanIndexForward=False,
-            Limit=1
-        )
+        updated = reviews.update_status(review_id, status, error_message, timestamp)
+        if updated:
+            publish_status(review_id, status, timestamp)
+        return updated
         
-        if response['Items']:
-            item = response['Items'][0]
-            
-            update_expression = "SET #status = :status, #updatedAt = :updatedAt"
-            expression_attribute_names = {
-                '#status': 'status',
-                '#updatedAt': 'updatedAt'
-            }
-            expression_attribute_values = {
-                ':status': status,
-                ':updatedAt': datetime.utcnow().isoformat()
-            }
-            
-            if error_message:
-                update_expression += ", #errorMessage = :errorMessage"
-                expression_attribute_names['#errorMessage'] = 'errorMessage'
-                expression_attribute_values[':errorMessage'] = error_message
-            
-            table.update_item(
-                Key={
-                    'reviewId': review_id,
-                    'timestamp': item['timestamp']
-                },
-                UpdateExpression=update_expression,
-                ExpressionAttributeNames=expression_attribute_names,
-                ExpressionAttributeValues=expression_attribute_values
-            )
-            
     except Exception as e:
         logger.error(f"Error updating review status: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+def publish_status(review_id, status, timestamp=None):
+    """Push a status change to onReviewUpdated subscribers"""
+    # Payloads without the sort key cannot address the item in the mutation
+    if publisher is not None and timestamp:
+        publisher.publish_review_update(review_id, timestamp, status)
+
+def prime():
+    """Load strands, the Bedrock model and the AWS clients a review needs, without calling AWS"""
+    runtime()
+    reviews.table
+    get_client('s3')
+    get_client('lambda')
+    if IDEMPOTENCY_TABLE_NAME:
+        persistence_layer()
+    if publisher is not None:
+        publisher.session
+    logger.info("Primed the agent runtime")
+
+install_priming(prime)
@@ -0,0 +1,60 @@
+import asyncio
+import json
+import os
+from aws_lambda_powertools import Logger
+from rules import PILLARS
+
+logger = Logger(child=True)
+
+REVIEW_FANOUT = os.environ.get('REVIEW_FANOUT', 'true').lower() == 'true'
+FANOUT_MAX_CONCURRENCY = int(os.environ.get('FANOUT_MAX_CONCURRENCY', '4'))
+
+# Relative weight of each pillar in the overall score; unknown pillars weigh 1
+PILLAR_WEIGHTS = {
+    'security': 1.0,
+    'reliability': 1.0,
+    'performance': 1.0,
+    'cost': 1.0,
+    **json.loads(os.environ.get('PILLAR_WEIGHTS', '{}'))
+}
+
+def expand_pillars(pillars):
+    """Resolve 'all' to the known pillars and drop duplicates, keeping order"""
+    expanded = []
+    for pillar in pillars:
+        for name in (PILLARS if pillar == 'all' else [pillar]):
+            if name not in expanded:
+                expanded.append(name)
+    return expanded
+
+def weighted_score(pillar_scores, weights=None):
+    """Weighted mean of the pillar scores that are present, or None if there are none"""
+    weights = PILLAR_WEIGHTS if weights is None else weights
+    total = 0.0
+    weight_sum = 0.0
+    for pillar, score in pillar_scores.items():
+        if score is None:
+            continue
+        weight = weights.get(pillar, 1.0)
+        total += score * weight
+        weight_sum += weight
+    if not weight_sum:
+        return None
+    return round(total / weight_sum, 1)
+
+async def fan_out(pillars, review_pillar, max_concurrency=FANOUT_MAX_CONCURRENCY):
+    """
+    Run review_pillar(pillar) for every pillar with at most max_concurrency in flight
+
+    Returns {pillar: result}; a pillar whose coroutine raised maps to the exception
+    so one failing pillar does not discard the others.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(pillar):
+        async with semaphore:
+            logger.info(f"Starting review of pillar {pillar}")
+            return await review_pillar(pillar)
+
+    results = await asyncio.gather(*(run(pillar) for pillar in pillars), return_exceptions=True)
+    return dict(zip(pillars, results))
@@ -0,0 +1,194 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from botocore.exceptions import ClientError
+from aws_lambda_powertools import Logger
+from aws_clients import get_client
+from rules import SERVICE_SPECS
+from inventory_columns import RECORD_COLLECTIONS, ResourceTable, json_default
+from review_prompts import SYSTEM_PROMPT
+
+logger = Logger(child=True)
+
+REVIEW_INCREMENTAL = os.environ.get('REVIEW_INCREMENTAL', 'true').lower() == 'true'
+BASELINE_BUCKET = os.environ.get('BASELINE_BUCKET', os.environ.get('REVIEW_RESULTS_BUCKET'))
+BASELINE_PREFIX = os.environ.get('BASELINE_PREFIX', 'baselines/')
+# This long after the last full review the next one is full again, re-checking findings carried along since
+BASELINE_MAX_AGE_SECONDS = int(os.environ.get('BASELINE_MAX_AGE_SECONDS', str(7 * 24 * 3600)))
+
+# Changes to the rules or instructions invalidate findings made under the old ones
+PROMPT_VERSION = hashlib.sha256(SYSTEM_PROMPT.encode('utf-8')).hexdigest()[:16]
+
+def fingerprint(value):
+    """Short, order-independent hash of a JSON-serializable value"""
+    canonical = json.dumps(value, sort_keys=True, default=json_default, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+def resource_fingerprints(resources):
+    """
+    Map every resource in analyzer output to a fingerprint of its record
+
+    Resources are keyed by the ARN their findings carry. Services without
+    per-resource records, such as IAM, are fingerprinted as a whole under
+    'service:<name>'. Returns None if any service failed to collect, since
+    a missing service cannot be told apart from deleted resources.
+    """
+    account_id = resources.get('account_id')
+    region = resources.get('region')
+    fingerprints = {}
+    for service, data in resources.get('services', {}).items():
+        if 'error' in data:
+            return None
+        spec = SERVICE_SPECS.get(service)
+        if spec and isinstance(data.get(spec[0]), RECORD_COLLECTIONS):
+            collection, id_field, _, arn_template = spec
+            for record in data[collection]:
+                arn = arn_template.format(region=region, account_id=account_id, id=record.get(id_field))
+                fingerprints[arn] = fingerprint(record)
+        else:
+            fingerprints[f"service:{service}"] = fingerprint(data)
+    return fingerprints
+
+def diff_fingerprints(previous, current):
+    """Split resource keys into (changed, removed, unchanged); changed includes new ones"""
+    changed = {key for key, value in current.items() if previous.get(key) != value}
+    removed = set(previous) - set(current)
+    unchanged = set(current) - changed
+    return changed, removed, unchanged
+
+def changed_inventory(resources, changed):
+    """
+    Copy of analyzer output keeping only changed resources in the per-resource lists
+
+    Service aggregates (counts, summaries) are kept whole so the model still
+    sees the size and shape of the account.
+    """
+    account_id = resources.get('account_id')
+    region = resources.get('region')
+    services = {}
+    for service, data in resources.get('services', {}).items():
+        spec = SERVICE_SPECS.get(service)
+        if spec and isinstance(data.get(spec[0]), RECORD_COLLECTIONS):
+            collection, id_field, _, arn_template = spec
+            records = data[collection]
+            keep = [
+                index for index, record in enumerate(records)
+                if arn_template.format(region=region, account_id=account_id, id=record.get(id_field)) in changed
+            ]
+            if isinstance(records, ResourceTable):
+                data = {**data, collection: records.take(keep)}
+            else:
+                data = {**data, collection: [records[index] for index in keep]}
+        services[service] = data
+    return {**resources, 'services': services}
+
+def reusable_results(baseline, changed, removed):
+    """
+    Findings and recommendations of the baseline that still hold
+
+    Items about a changed or removed resource are dropped; the evaluator and
+    agent look at those resources again. Items about unchanged resources are
+    kept, as are items not tied to a known resource, like account-wide ones.
+    Rule recommendations follow the finding they were made for.
+    """
+    stale = changed | removed
+    stale_ids = set()
+    findings = []
+    for finding in baseline['findings']:
+        if finding.get('resourceArn') in stale:
+            stale_ids.add(finding.get('id'))
+        else:
+            findings.append(finding)
+
+    recommendations = []
+    for recommendation in baseline['recommendations']:
+        # Rule recommendations are '<rule>-rec-<resource>' for finding '<rule>-<resource>'
+        rule_id, separator, resource_id = str(recommendation.get('id', '')).partition('-rec-')
+        if separator and f"{rule_id}-{resource_id}" in stale_ids:
+            continue
+        recommendations.append(recommendation)
+    return findings, recommendations
+
+def plan_increment(baseline, fingerprints):
+    """What an incremental review against baseline needs: changed resources and reusable results"""
+    changed, removed, unchanged = diff_fingerprints(baseline['fingerprints'], fingerprints)
+    findings, recommendations = reusable_results(baseline, changed, removed)
+    return {
+        'baselineReviewId': baseline.get('reviewId'),
+        'fullReviewAt': full_review_at(baseline),
+        'score': baseline.get('score'),
+        'changed': sorted(changed),
+        'removed': len(removed),
+        'unchanged': len(unchanged),
+        'findings': findings,
+        'recommendations': recommendations
+    }
+
+def full_review_at(baseline):
+    """When the last full review behind baseline ran; baselines saved before this was tracked count from savedAt"""
+    return baseline.get('fullReviewAt', baseline.get('savedAt', 0))
+
+class ReviewBaselineStore:
+    """Fingerprints and results of the last completed review per account and region, gzip JSON in S3"""
+
+    def __init__(self, bucket_name=BASELINE_BUCKET, prefix=BASELINE_PREFIX, s3_client=None):
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self._s3 = s3_client
+
+    @property
+    def s3(self):
+        if self._s3 is None:
+            self._s3 = get_client('s3')
+        return self._s3
+
+    def object_key(self, account_id, region):
+        return f"{self.prefix}{account_id}/{region}.json.gz"
+
+    def save(self, account_id, region, baseline):
+        """Store baseline; without fullReviewAt it is taken to come from a full review run now"""
+        saved_at = time.time()
+        body = json.dumps(
+            {'fullReviewAt': saved_at, **baseline, 'promptVersion': PROMPT_VERSION, 'savedAt': saved_at},
+            default=str, separators=(',', ':')
+        )
+        self.s3.put_object(
+            Bucket=self.bucket_name,
+            Key=self.object_key(account_id, region),
+            Body=gzip.compress(body.encode('utf-8')),
+            ContentType='application/json',
+            ContentEncoding='gzip'
+        )
+
+    def load(self, account_id, region, pillars, max_age=BASELINE_MAX_AGE_SECONDS):
+        """
+        The baseline to diff a review against, or None when a full review is needed
+
+        A baseline is only usable for the same pillars, under the same rules and
+        instructions, and until max_age after the last full review, however
+        many incremental reviews have been saved since.
+        """
+        try:
+            response = self.s3.get_object(Bucket=self.bucket_name, Key=self.object_key(account_id, region))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise
+        baseline = json.loads(gzip.decompress(response['Body'].read()).decode('utf-8'))
+
+        if baseline.get('promptVersion') != PROMPT_VERSION:
+            logger.info(f"Baseline of {account_id}/{region} predates the current rules; running a full review")
+            return None
+        if sorted(baseline.get('pillars', [])) != sorted(pillars):
+            logger.info(f"Baseline of {account_id}/{region} covers other pillars; running a full review")
+            return None
+        if time.time() - full_review_at(baseline) > max_age:
+            logger.info(f"Last full review of {account_id}/{region} is older than {max_age}s; running a full review")
+            return None
+        return baseline
+
+def create_baseline_store():
+    """The configured baseline store, or None when incremental reviews are unavailable"""
+    return ReviewBaselineStore() if BASELINE_BUCKET else None
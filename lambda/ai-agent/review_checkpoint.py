@@ -0,0 +1,102 @@
+import asyncio
+import gzip
+import json
+import os
+from botocore.exceptions import ClientError
+from aws_lambda_powertools import Logger
+from aws_clients import get_client
+from inventory_columns import decode_columns, json_default
+
+logger = Logger(child=True)
+
+CHECKPOINT_BUCKET = os.environ.get('CHECKPOINT_BUCKET', os.environ.get('REVIEW_RESULTS_BUCKET'))
+CHECKPOINT_PREFIX = os.environ.get('CHECKPOINT_PREFIX', 'checkpoints/')
+# Time kept back before the Lambda timeout to save the checkpoint and requeue
+CHECKPOINT_MARGIN_SECONDS = int(os.environ.get('CHECKPOINT_MARGIN_SECONDS', '90'))
+CHECKPOINT_MAX_CONTINUATIONS = int(os.environ.get('CHECKPOINT_MAX_CONTINUATIONS', '4'))
+
+def resumable_messages(messages):
+    """
+    Trim a conversation cut off mid-turn so it can be continued
+
+    The model expects the history to end with a complete assistant turn, so
+    trailing user turns and tool calls whose results never arrived are dropped.
+    """
+    messages = list(messages or [])
+    while messages:
+        last = messages[-1]
+        has_tool_use = any('toolUse' in block for block in last.get('content', []) if isinstance(block, dict))
+        if last.get('role') == 'assistant' and not has_tool_use:
+            break
+        messages.pop()
+    return messages
+
+def run_with_deadline(coroutine, timeout):
+    """
+    Run a coroutine to completion or until timeout seconds pass
+
+    Returns (result, timed_out). Unlike asyncio.run this does not wait for
+    worker threads of cancelled calls, which could outlive the deadline.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        if timeout is None:
+            return loop.run_until_complete(coroutine), False
+        try:
+            return loop.run_until_complete(asyncio.wait_for(coroutine, max(0.0, timeout))), False
+        except asyncio.TimeoutError:
+            return None, True
+    finally:
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        loop.close()
+
+class ReviewCheckpointStore:
+    """Gzip-compressed review state in S3, one object per review run"""
+
+    def __init__(self, bucket_name=CHECKPOINT_BUCKET, prefix=CHECKPOINT_PREFIX, s3_client=None):
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self._s3 = s3_client
+
+    @property
+    def s3(self):
+        if self._s3 is None:
+            self._s3 = get_client('s3')
+        return self._s3
+
+    def object_key(self, review_id, timestamp):
+        return f"{self.prefix}{review_id}/{timestamp}.json.gz"
+
+    def save(self, review_id, timestamp, state):
+        body = json.dumps(state, default=json_default, separators=(',', ':'))
+        self.s3.put_object(
+            Bucket=self.bucket_name,
+            Key=self.object_key(review_id, timestamp),
+            Body=gzip.compress(body.encode('utf-8')),
+            ContentType='application/json',
+            ContentEncoding='gzip'
+        )
+
+    def load(self, review_id, timestamp):
+        """Return the saved state, or None if there is no checkpoint"""
+        try:
+            response = self.s3.get_object(Bucket=self.bucket_name, Key=self.object_key(review_id, timestamp))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise
+        return json.loads(gzip.decompress(response['Body'].read()).decode('utf-8'), object_hook=decode_columns)
+
+    def delete(self, review_id, timestamp):
+        try:
+            self.s3.delete_object(Bucket=self.bucket_name, Key=self.object_key(review_id, timestamp))
+        except Exception as e:
+            logger.warning(f"Failed to delete checkpoint of review {review_id}: {str(e)}")
+
+def create_checkpoint_store():
+    """The configured checkpoint store, or None when checkpointing is disabled"""
+    return ReviewCheckpointStore() if CHECKPOINT_BUCKET else None
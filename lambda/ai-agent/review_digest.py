@@ -0,0 +1,93 @@
+import json
+import os
+from collections import Counter
+from inventory_columns import RECORD_COLLECTIONS
+
+DIGEST_TOKEN_BUDGET = int(os.environ.get('DIGEST_TOKEN_BUDGET', '4000'))
+DIGEST_MAX_EXAMPLES = int(os.environ.get('DIGEST_MAX_EXAMPLES', '5'))
+
+SEVERITY_RANK = {'CRITICAL': 0, 'HIGH': 1, 'MEDIUM': 2, 'LOW': 3}
+
+def estimate_tokens(value):
+    """Rough token count of a JSON-serializable value (about 4 characters per token)"""
+    return len(json.dumps(value, default=str, separators=(',', ':'))) // 4
+
+def summarize_inventory(resources):
+    """Drop per-resource lists from analyzer output, keeping counts and aggregates"""
+    services = {}
+    for service, data in resources.get('services', {}).items():
+        if 'error' in data:
+            services[service] = {'error': data['error']}
+            continue
+        services[service] = {
+            key: value for key, value in data.items()
+            if not isinstance(value, RECORD_COLLECTIONS)
+        }
+
+    return {
+        'account_id': resources.get('account_id'),
+        'region': resources.get('region'),
+        'services': services,
+        'collection': resources.get('collection', {})
+    }
+
+def group_findings(findings, max_examples=DIGEST_MAX_EXAMPLES):
+    """Group findings by rule, keeping a count and the first few affected resources"""
+    groups = {}
+    for finding in findings:
+        rule = finding.get('rule', finding['title'])
+        group = groups.get(rule)
+        if group is None:
+            group = groups[rule] = {
+                'rule': rule,
+                'pillar': finding['pillar'],
+                'service': finding.get('service'),
+                'severity': finding['severity'],
+                'title': finding['title'],
+                'count': 0,
+                'examples': []
+            }
+        group['count'] += 1
+        if len(group['examples']) < max_examples:
+            group['examples'].append(finding.get('resourceArn') or finding['id'])
+
+    return sorted(
+        groups.values(),
+        key=lambda g: (SEVERITY_RANK.get(g['severity'], len(SEVERITY_RANK)), -g['count'], g['rule'])
+    )
+
+def build_review_digest(resources, evaluation, token_budget=DIGEST_TOKEN_BUDGET, max_examples=DIGEST_MAX_EXAMPLES):
+    """
+    Build a compact, deterministic digest of inventory and evaluator output for the LLM
+
+    Examples per rule are trimmed first, then the lowest-severity groups are
+    dropped, until the digest fits within token_budget.
+    """
+    findings = evaluation.get('findings', [])
+    groups = group_findings(findings, max_examples)
+
+    digest = {
+        'inventory': summarize_inventory(resources),
+        'totals': {
+            'findings': len(findings),
+            'recommendations': len(evaluation.get('recommendations', [])),
+            'by_severity': dict(Counter(f['severity'] for f in findings)),
+            'by_pillar': dict(Counter(f['pillar'] for f in findings))
+        },
+        'finding_groups': groups,
+        'omitted_groups': 0
+    }
+
+    examples = max_examples
+    while estimate_tokens(digest) > token_budget and examples > 0:
+        examples -= 1
+        for group in groups:
+            del group['examples'][examples:]
+
+    while estimate_tokens(digest) > token_budget and groups:
+        groups.pop()
+        digest['omitted_groups'] += 1
+
+    digest['estimated_tokens'] = estimate_tokens(digest)
+
+    return digest
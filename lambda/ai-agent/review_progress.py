@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from aws_lambda_powertools import Logger
+from stream_parser import item_key
+
+logger = Logger(child=True)
+
+PROGRESS_BATCH_SIZE = int(os.environ.get('PROGRESS_BATCH_SIZE', '10'))
+PROGRESS_FLUSH_SECONDS = float(os.environ.get('PROGRESS_FLUSH_SECONDS', '5'))
+# Past this many inline findings and recommendations only counts are updated until the final save
+PROGRESS_MAX_INLINE_ITEMS = int(os.environ.get('PROGRESS_MAX_INLINE_ITEMS', '500'))
+
+class ReviewProgress:
+    """
+    Persist partial review results in batches while the agent is still running
+    
+    add is called from the event loop the agents stream on, so batches are
+    written and published by a single writer thread instead: the loop never
+    waits on DynamoDB or AppSync, and batches still land in order. Items
+    queued while a write is in flight go out together in the next one.
+    flush(wait=True) returns once every queued item has been written.
+    """
+    
+    def __init__(self, reviews, key, publisher=None, batch_size=PROGRESS_BATCH_SIZE,
+                 flush_seconds=PROGRESS_FLUSH_SECONDS):
+        self.reviews = reviews
+        self.key = key
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.pending_findings = []
+        self.pending_recommendations = []
+        # item_key of the items queued so far; findings and recommendations are numbered independently
+        self.finding_keys = set()
+        self.recommendation_keys = set()
+        # Items persisted so far, counted on the writer thread
+        self.persisted_items = 0
+        self.last_flush = time.monotonic()
+        self.active = key is not None
+        self._lock = threading.Lock()
+        self._writer = None
+        self._last_write = None
+        # A write is scheduled that has not taken the pending items yet
+        self._scheduled = False
+    
+    def mark_seen(self, findings=(), recommendations=()):
+        """Record items persisted by an earlier invocation, so add skips them"""
+        findings = list(findings)
+        recommendations = list(recommendations)
+        self.finding_keys.update(item_key(finding) for finding in findings)
+        self.recommendation_keys.update(item_key(recommendation) for recommendation in recommendations)
+        self.persisted_items += len(findings) + len(recommendations)
+    
+    @property
+    def item_count(self):
+        return len(self.finding_keys) + len(self.recommendation_keys)
+    
+    def add(self, findings=(), recommendations=()):
+        """Queue new items, skipping repeats of items already queued, and flush when a batch is due"""
+        with self._lock:
+            for finding in findings:
+                if item_key(finding) not in self.finding_keys:
+                    self.finding_keys.add(item_key(finding))
+                    self.pending_findings.append(finding)
+            for recommendation in recommendations:
+                if item_key(recommendation) not in self.recommendation_keys:
+                    self.recommendation_keys.add(item_key(recommendation))
+                    self.pending_recommendations.append(recommendation)
+            pending = len(self.pending_findings) + len(self.pending_recommendations)
+        
+        if pending >= self.batch_size or (pending and time.monotonic() - self.last_flush >= self.flush_seconds):
+            self.flush(wait=False)
+    
+    def flush(self, wait=True):
+        """Have the writer thread write the pending items; with wait, also wait until it has"""
+        with self._lock:
+            if self.active and (self.pending_findings or self.pending_recommendations) and not self._scheduled:
+                self._scheduled = True
+                self.last_flush = time.monotonic()
+                if self._writer is None:
+                    self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='progress')
+                self._last_write = self._writer.submit(self._write)
+        
+        if wait and self._writer is not None:
+            # One worker runs writes in order, so the last one finishing means all have
+            self._last_write.result()
+            self._writer.shutdown()
+            self._writer = None
+    
+    def _write(self):
+        """Write everything pending as one batch and notify subscribers; runs on the writer thread"""
+        with self._lock:
+            self._scheduled = False
+            findings, self.pending_findings = self.pending_findings, []
+            recommendations, self.pending_recommendations = self.pending_recommendations, []
+            progress = self.item_count
+        if not self.active or not (findings or recommendations):
+            return
+        try:
+            count = len(findings) + len(recommendations)
+            inline = self.persisted_items + count <= PROGRESS_MAX_INLINE_ITEMS
+            self.active = self.reviews.append_results(self.key, findings, recommendations, inline=inline)
+            self.persisted_items += count
+        except Exception as e:
+            # Progress is best effort; the final save still writes everything
+            logger.warning(f"Failed to persist partial results: {str(e)}")
+            return
+        
+        if self.active and self.publisher:
+            # Throttled by the publisher; the item count lets it skip repeats
+            self.publisher.publish_review_update(self.key['reviewId'], self.key['timestamp'], progress=progress)
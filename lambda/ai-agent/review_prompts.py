@@ -0,0 +1,81 @@
+import json
+from rules import PILLARS, RULES
+
+# Everything before the first per-review value is identical across reviews, so
+# Bedrock can serve it from the prompt cache. Keep account IDs, regions, pillars
+# and timestamps out of it; they belong in review_query.
+FRAMEWORK_INSTRUCTIONS = """
+You are an AWS Well-Architected Framework expert. Your task is to:
+
+1. Analyze the AWS resources of the account and region named in the request
+2. Evaluate them against the Well-Architected Framework pillars named in the request
+3. Provide specific findings and actionable recommendations
+4. Assign severity levels and implementation priorities
+
+The resources have already been collected and checked against the automated
+rules listed below. Each request carries a digest with resource counts per
+service and the rule findings grouped by rule, with a few example resources
+per group. Do not repeat those findings; instead:
+
+1. Review the digest and investigate further with use_aws only where needed
+2. Add findings the automated rules could not detect
+3. Provide recommendations and an overall score from 0 to 100
+
+For each finding, include:
+- Specific AWS service and resource affected
+- Risk level (LOW, MEDIUM, HIGH, CRITICAL)
+- Detailed recommendation with implementation steps
+- Links to relevant AWS documentation
+
+Return a single JSON object suitable for saving to the database:
+{"findings": [{"id", "pillar", "title", "description", "severity", "resourceArn", "service"}],
+ "recommendations": [{"id", "title", "description", "priority", "effort", "implementationGuide", "links"}],
+ "score": <number>}
+"""
+
+def rule_catalogue(rules=RULES):
+    """One line per automated rule, in registration order"""
+    return '\n'.join(
+        f"- {r.rule_id} [{PILLARS[r.pillar]}] {r.service} {r.severity}: {r.title}"
+        for r in rules
+    )
+
+# Stable prefix sent as the system prompt of every review agent
+SYSTEM_PROMPT = f"{FRAMEWORK_INSTRUCTIONS}\nAutomated rules already applied:\n{rule_catalogue()}\n"
+
+CONTINUE_QUERY = """
+Continue the Well-Architected review where you left off and return the
+complete structured result with all findings, recommendations and the score.
+"""
+
+def review_query(account_id, region, pillars, digest, increment=None):
+    """
+    The per-review suffix: target, pillars and the digest of rule findings
+
+    For an incremental review the digest lists only new or changed resources;
+    the model is told what the previous review found so its score covers the
+    whole account.
+    """
+    query = (
+        f"Review AWS account {account_id} in region {region}, "
+        f"focusing on pillars: {', '.join(pillars)}.\n\n"
+    )
+    if increment:
+        query += (
+            f"This is an incremental review. Since the previous review, which scored "
+            f"{increment['score']}, {len(increment['changed'])} resources are new or changed, "
+            f"{increment['removed']} were removed and {increment['unchanged']} are unchanged. "
+            f"Findings for unchanged resources are kept: "
+            f"{json.dumps(finding_counts(increment['findings']), separators=(',', ':'))}. "
+            f"The digest covers only the new or changed resources; report findings for "
+            f"those, and a score for the whole account.\n\n"
+        )
+    return query + f"Digest:\n{json.dumps(digest, default=str, separators=(',', ':'))}"
+
+def finding_counts(findings):
+    """Findings per pillar and severity, e.g. {'Security': {'HIGH': 2}}"""
+    counts = {}
+    for finding in findings:
+        by_severity = counts.setdefault(finding.get('pillar'), {})
+        by_severity[finding.get('severity')] = by_severity.get(finding.get('severity'), 0) + 1
+    return counts
@@ -0,0 +1,272 @@
+import os
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from itertools import chain, zip_longest
+import boto3
+from aws_lambda_powertools import Logger
+from aws_clients import client_config, get_client
+
+logger = Logger(child=True)
+
+SWEEP_ROLE_NAME = os.environ.get('SWEEP_ROLE_NAME', 'WellArchitectedReviewRole')
+SWEEP_MAX_WORKERS = int(os.environ.get('SWEEP_MAX_WORKERS', '16'))
+# API calls per second (and burst) allowed against any single account
+SWEEP_ACCOUNT_RATE = float(os.environ.get('SWEEP_ACCOUNT_RATE', '10'))
+SWEEP_ACCOUNT_BURST = int(os.environ.get('SWEEP_ACCOUNT_BURST', '20'))
+# Units of one account collected at once; more would only queue on its rate limit
+SWEEP_ACCOUNT_CONCURRENCY = int(os.environ.get('SWEEP_ACCOUNT_CONCURRENCY', '3'))
+SWEEP_SESSION_SECONDS = int(os.environ.get('SWEEP_SESSION_SECONDS', '3600'))
+# Account-wide services: every region lists the same resources, so they are swept once per account
+SWEEP_GLOBAL_SERVICES = tuple(s for s in os.environ.get('SWEEP_GLOBAL_SERVICES', 's3,iam').split(',') if s)
+# Region of the inventory holding an account's global services
+GLOBAL_REGION = 'global'
+CREDENTIAL_REFRESH_MARGIN_SECONDS = 300
+
+class CredentialCache:
+    """Assume the review role in member accounts, reusing credentials until they near expiry"""
+
+    def __init__(self, role_name=SWEEP_ROLE_NAME, sts_client=None,
+                 refresh_margin=CREDENTIAL_REFRESH_MARGIN_SECONDS):
+        self.role_name = role_name
+        self.sts = sts_client or get_client('sts')
+        self.refresh_margin = refresh_margin
+        self._entries = {}
+        self._locks = defaultdict(threading.Lock)
+        self._lock = threading.Lock()
+        self.assumed = 0
+
+    def role_arn(self, account_id):
+        return f"arn:aws:iam::{account_id}:role/{self.role_name}"
+
+    def get(self, account_id):
+        """
+        Return boto3 Session keyword arguments for the account
+
+        The same dict is returned until it is refreshed, so callers can
+        compare by identity to notice rotated credentials.
+        """
+        with self._lock:
+            account_lock = self._locks[account_id]
+
+        # Concurrent callers for one account wait for a single AssumeRole
+        with account_lock:
+            entry = self._entries.get(account_id)
+            if entry and entry[1] - time.time() > self.refresh_margin:
+                return entry[0]
+
+            response = self.sts.assume_role(
+                RoleArn=self.role_arn(account_id),
+                RoleSessionName='well-architected-sweep',
+                DurationSeconds=SWEEP_SESSION_SECONDS
+            )
+            credentials = response['Credentials']
+            session_kwargs = {
+                'aws_access_key_id': credentials['AccessKeyId'],
+                'aws_secret_access_key': credentials['SecretAccessKey'],
+                'aws_session_token': credentials['SessionToken']
+            }
+            self._entries[account_id] = (session_kwargs, credentials['Expiration'].timestamp())
+            self.assumed += 1
+            return session_kwargs
+
+class RateLimiter:
+    """Token bucket shared by all worker threads calling one account"""
+
+    def __init__(self, rate=SWEEP_ACCOUNT_RATE, burst=SWEEP_ACCOUNT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.waited_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, sleeping until one is available"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Reserve the token now, so waiters are served in arrival order
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited_seconds += wait
+        if wait:
+            time.sleep(wait)
+
+    def delay(self):
+        """Seconds until a token is available, without taking one"""
+        with self._lock:
+            tokens = min(self.burst, self.tokens + (time.monotonic() - self.updated) * self.rate)
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+class ReviewSweep:
+    """
+    Collect inventories for many accounts and regions as (account, region, service) work units
+
+    Units are started in round-robin order across accounts, and only for
+    accounts with fewer than account_concurrency units running and a rate
+    limit token to spare, so workers are not parked on one account's limit
+    while other accounts wait. Global services are collected once per
+    account from the home region into an inventory of their own, with
+    region GLOBAL_REGION.
+    """
+
+    def __init__(self, analyzer_factory, credentials=None, max_workers=SWEEP_MAX_WORKERS,
+                 rate=SWEEP_ACCOUNT_RATE, burst=SWEEP_ACCOUNT_BURST, global_services=SWEEP_GLOBAL_SERVICES,
+                 account_concurrency=SWEEP_ACCOUNT_CONCURRENCY):
+        self.analyzer_factory = analyzer_factory
+        self.credentials = credentials or CredentialCache()
+        self.max_workers = max(1, max_workers)
+        self.global_services = global_services
+        self.account_concurrency = max(1, account_concurrency)
+        self.rate_limiters = defaultdict(lambda: RateLimiter(rate, burst))
+    def organization_accounts(self):
+        """Active accounts of the organization this Lambda's account manages"""
+        paginator = get_client('organizations').get_paginator('list_accounts')
+        return [
+            account['Id']
+            for page in paginator.paginate()
+            for account in page['Accounts']
+            if account['Status'] == 'ACTIVE'
+        ]
+
+    def enabled_regions(self, account_id, home_region):
+        """Regions enabled in the account"""
+        session = boto3.Session(**self.credentials.get(account_id))
+        ec2 = session.client('ec2', region_name=home_region, config=client_config())
+        return sorted(r['RegionName'] for r in ec2.describe_regions()['Regions'])
+
+    def resolve_targets(self, home_region, account_ids=None, regions=None):
+        """
+        Map each reachable account to the regions to sweep
+
+        Returns (targets, failed_accounts); an account whose role cannot be
+        assumed is reported once instead of failing every one of its units.
+        """
+        account_ids = account_ids or self.organization_accounts()
+        targets = {}
+        failed_accounts = {}
+        for account_id in account_ids:
+            try:
+                targets[account_id] = regions or self.enabled_regions(account_id, home_region)
+            except Exception as e:
+                logger.warning(f"Skipping account {account_id}: {str(e)}")
+                failed_accounts[account_id] = str(e)
+        return targets, failed_accounts
+
+    def work_units(self, targets, services, home_region):
+        """
+        Round-robin (account, region, service) units across accounts
+
+        Global services get one unit per account, called in home_region.
+        """
+        global_services = [service for service in services if service in self.global_services]
+        regional_services = [service for service in services if service not in self.global_services]
+        per_account = [
+            [(account_id, home_region, service) for service in global_services]
+            + [(account_id, region, service) for region in regions for service in regional_services]
+            for account_id, regions in targets.items()
+        ]
+        return [unit for unit in chain.from_iterable(zip_longest(*per_account)) if unit]
+
+    def run(self, targets, services, home_region, deadline=None, units=None, inventories=()):
+        """
+        Collect units and return one inventory per (account, region) plus one per account for global services
+
+        units defaults to every unit of targets. No unit is started after
+        deadline (a time.monotonic() value); the units not collected by then
+        are returned as remaining, to be passed back in together with the
+        returned inventories by a later run.
+        """
+        started = time.monotonic()
+        collected = {(inventory['account_id'], inventory['region']): inventory for inventory in inventories}
+        analyzers = {}
+        queues = {}
+        for unit in self.work_units(targets, services, home_region) if units is None else units:
+            queues.setdefault(unit[0], deque()).append(tuple(unit))
+        running = {}
+        busy = Counter()
+        failed_units = []
+        count = 0
+
+        def start(executor, account_id, service_region, service):
+            region = GLOBAL_REGION if service in self.global_services else service_region
+            if (account_id, region) not in collected:
+                collected[(account_id, region)] = {
+                    'account_id': account_id,
+                    'region': region,
+                    'timestamp': datetime.now(timezone.utc).isoformat(),
+                    'services': {}
+                }
+            if (account_id, service_region) not in analyzers:
+                credentials = lambda account_id=account_id: self.credentials.get(account_id)
+                analyzers[(account_id, service_region)] = self.analyzer_factory(
+                    account_id, service_region, credentials, self.rate_limiters[account_id]
+                )
+            future = executor.submit(analyzers[(account_id, service_region)].analyze_all_resources, services=[service])
+            running[future] = (account_id, region, service)
+            busy[account_id] += 1
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='sweep') as executor:
+            while running or (queues and (deadline is None or time.monotonic() < deadline)):
+                # Start units round-robin while workers are free, noting the soonest token of a skipped account
+                token_wait = None
+                started_any = True
+                while started_any and len(running) < self.max_workers:
+                    started_any = False
+                    if deadline is not None and time.monotonic() >= deadline:
+                        break
+                    for account_id in list(queues):
+                        if len(running) >= self.max_workers:
+                            break
+                        if busy[account_id] >= self.account_concurrency:
+                            continue
+                        delay = self.rate_limiters[account_id].delay()
+                        if delay:
+                            token_wait = delay if token_wait is None else min(token_wait, delay)
+                            continue
+                        start(executor, *queues[account_id].popleft())
+                        if not queues[account_id]:
+                            del queues[account_id]
+                        started_any = True
+
+                # Wake up for a token or the deadline; past the deadline only the running units are waited for
+                timeout = None
+                if deadline is None or time.monotonic() < deadline:
+                    timeout = token_wait
+                    if deadline is not None:
+                        left = max(0.0, deadline - time.monotonic())
+                        timeout = left if timeout is None else min(timeout, left)
+                if not running:
+                    # Every account with units left is out of tokens; wait here rather than in a worker
+                    time.sleep(timeout or 0.0)
+                    continue
+
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    account_id, region, service = running.pop(future)
+                    busy[account_id] -= 1
+                    count += 1
+                    try:
+                        service_result = future.result()['services'][service]
+                    except Exception as e:
+                        service_result = {'error': str(e)}
+
+                    if 'error' in service_result:
+                        failed_units.append({'account_id': account_id, 'region': region, 'service': service})
+                    collected[(account_id, region)]['services'][service] = service_result
+
+        # Units left past the deadline, in the same round-robin order
+        remaining = [unit for unit in chain.from_iterable(zip_longest(*queues.values())) if unit]
+        return {
+            'inventories': list(collected.values()),
+            'units': count,
+            'remaining': remaining,
+            'failed_units': failed_units,
+            'duration_ms': int((time.monotonic() - started) * 1000),
+            'assumed_roles': self.credentials.assumed,
+            'throttle_wait_seconds': round(sum(l.waited_seconds for l in self.rate_limiters.values()), 3)
+        }
@@ -0,0 +1,308 @@
+import os
+import re
+from inventory_columns import RECORD_COLLECTIONS, ResourceTable
+
+LAMBDA_MEMORY_THRESHOLD_MB = int(os.environ.get('LAMBDA_MEMORY_THRESHOLD_MB', '3008'))
+
+PILLARS = {
+    'security': 'Security',
+    'reliability': 'Reliability',
+    'performance': 'Performance Efficiency',
+    'cost': 'Cost Optimization'
+}
+
+# service -> (collection key, id field, display name, ARN template)
+SERVICE_SPECS = {
+    'ec2': ('instances', 'instance_id', 'EC2', 'arn:aws:ec2:{region}:{account_id}:instance/{id}'),
+    's3': ('buckets', 'name', 'S3', 'arn:aws:s3:::{id}'),
+    'rds': ('instances', 'db_instance_identifier', 'RDS', 'arn:aws:rds:{region}:{account_id}:db:{id}'),
+    'lambda': ('functions', 'function_name', 'Lambda', 'arn:aws:lambda:{region}:{account_id}:function:{id}'),
+    'cloudformation': ('stacks', 'stack_name', 'CloudFormation', 'arn:aws:cloudformation:{region}:{account_id}:stack/{id}')
+}
+
+PREVIOUS_GENERATION_FAMILIES = {
+    't1', 't2', 'm1', 'm2', 'm3', 'm4', 'c1', 'c3', 'c4', 'r3', 'r4', 'i2', 'd2', 'g2', 'p2', 'x1'
+}
+
+_FAMILY_PATTERN = re.compile(r'^(?:db\.)?([a-z]+\d+[a-z-]*)\.')
+_GRAVITON_PATTERN = re.compile(r'^[a-z]+\d+g')
+
+def instance_family(instance_type):
+    """'m5.large' -> 'm5', 'db.r6g.xlarge' -> 'r6g'"""
+    match = _FAMILY_PATTERN.match(instance_type or '')
+    return match.group(1) if match else ''
+
+def is_graviton(instance_type):
+    return bool(_GRAVITON_PATTERN.match(instance_family(instance_type)))
+
+def is_previous_generation(instance_type):
+    return instance_family(instance_type) in PREVIOUS_GENERATION_FAMILIES
+
+class Rule:
+    """
+    A declarative check applied to every resource of one service
+
+    fields names the record fields the predicate reads. When set, the
+    predicate may be handed a dict holding only those fields, which lets a
+    ResourceTable run it once per distinct combination of their values.
+    """
+
+    __slots__ = ('rule_id', 'pillar', 'service', 'severity', 'title', 'description', 'predicate', 'recommendation',
+                 'fields')
+
+    def __init__(self, rule_id, pillar, service, severity, title, description, predicate, recommendation=None,
+                 fields=()):
+        self.rule_id = rule_id
+        self.pillar = pillar
+        self.service = service
+        self.severity = severity
+        self.title = title
+        self.description = description
+        self.predicate = predicate
+        self.recommendation = recommendation
+        self.fields = tuple(fields)
+
+RULES = []
+
+def rule(rule_id, pillar, service, severity, title, description, recommendation=None, fields=()):
+    """Register the decorated predicate as a rule in RULES"""
+    def decorator(predicate):
+        RULES.append(Rule(rule_id, pillar, service, severity, title, description, predicate, recommendation, fields))
+        return predicate
+    return decorator
+
+# Security
+
+@rule('s3-encryption', 'security', 's3', 'HIGH',
+      'S3 Bucket Not Encrypted',
+      'S3 bucket {id} does not have encryption enabled',
+      {
+          'title': 'Enable S3 Bucket Encryption',
+          'description': 'Enable server-side encryption for S3 bucket {id}',
+          'priority': 'HIGH',
+          'effort': 'Low',
+          'implementationGuide': 'Use AWS KMS or AES-256 encryption for S3 bucket'
+      },
+      fields=('encryption',))
+def s3_not_encrypted(bucket):
+    return bucket.get('encryption', {}).get('status') == 'NOT_CONFIGURED'
+
+@rule('s3-public-access-block', 'security', 's3', 'HIGH',
+      'S3 Bucket Public Access Not Fully Blocked',
+      'S3 bucket {id} does not block all public access at the bucket level',
+      {
+          'title': 'Enable S3 Block Public Access',
+          'description': 'Turn on all four Block Public Access settings for S3 bucket {id}',
+          'priority': 'HIGH',
+          'effort': 'Low',
+          'implementationGuide': 'Use put-public-access-block, or enable Block Public Access for the whole account'
+      },
+      fields=('public_access_block',))
+def s3_public_access_not_blocked(bucket):
+    block = bucket.get('public_access_block', {})
+    status = block.get('status')
+    return status == 'NOT_CONFIGURED' or (status == 'CONFIGURED' and not block.get('all_blocked'))
+
+@rule('rds-encryption', 'security', 'rds', 'HIGH',
+      'RDS Storage Not Encrypted',
+      'RDS instance {id} does not have storage encryption enabled',
+      {
+          'title': 'Encrypt RDS Storage',
+          'description': 'Restore RDS instance {id} from an encrypted snapshot copy',
+          'priority': 'HIGH',
+          'effort': 'Medium',
+          'implementationGuide': 'Copy a snapshot with encryption enabled and restore a new instance from it'
+      },
+      fields=('encrypted',))
+def rds_not_encrypted(instance):
+    return not instance.get('encrypted')
+
+# Reliability
+
+@rule('rds-multiaz', 'reliability', 'rds', 'MEDIUM',
+      'RDS Instance Not Multi-AZ',
+      'RDS instance {id} is not configured for Multi-AZ deployment',
+      fields=('multi_az',))
+def rds_not_multi_az(instance):
+    return not instance.get('multi_az')
+
+@rule('rds-backup-retention', 'reliability', 'rds', 'HIGH',
+      'RDS Automated Backups Disabled',
+      'RDS instance {id} has a backup retention period of 0 days',
+      {
+          'title': 'Enable RDS Automated Backups',
+          'description': 'Set a backup retention period of at least 7 days for RDS instance {id}',
+          'priority': 'HIGH',
+          'effort': 'Low',
+          'implementationGuide': 'Modify the DB instance and set BackupRetentionPeriod'
+      },
+      fields=('backup_retention_period',))
+def rds_backups_disabled(instance):
+    return instance.get('backup_retention_period', 0) == 0
+
+@rule('s3-versioning', 'reliability', 's3', 'LOW',
+      'S3 Bucket Versioning Not Enabled',
+      'S3 bucket {id} does not have versioning enabled',
+      fields=('versioning',))
+def s3_versioning_disabled(bucket):
+    versioning = bucket.get('versioning', {})
+    return versioning.get('status') == 'NOT_CONFIGURED' or versioning.get('value') == 'Suspended'
+
+# Performance Efficiency
+
+@rule('ec2-previous-generation', 'performance', 'ec2', 'MEDIUM',
+      'EC2 Instance Uses Previous Generation Type',
+      'EC2 instance {id} uses a previous generation instance type',
+      {
+          'title': 'Move to a Current Generation Instance Type',
+          'description': 'Resize EC2 instance {id} to a current generation instance family',
+          'priority': 'MEDIUM',
+          'effort': 'Medium',
+          'implementationGuide': 'Stop the instance, change the instance type and start it again'
+      },
+      fields=('instance_type',))
+def ec2_previous_generation(instance):
+    return is_previous_generation(instance.get('instance_type'))
+
+@rule('rds-previous-generation', 'performance', 'rds', 'MEDIUM',
+      'RDS Instance Uses Previous Generation Class',
+      'RDS instance {id} uses a previous generation instance class',
+      fields=('db_instance_class',))
+def rds_previous_generation(instance):
+    return is_previous_generation(instance.get('db_instance_class'))
+
+@rule('lambda-x86-architecture', 'performance', 'lambda', 'LOW',
+      'Lambda Function Not Running on Arm64',
+      'Lambda function {id} runs on x86_64 instead of arm64 (Graviton)',
+      fields=('architectures',))
+def lambda_not_arm64(function):
+    return 'arm64' not in function.get('architectures', ['x86_64'])
+
+# Cost Optimization
+
+@rule('lambda-oversized-memory', 'cost', 'lambda', 'LOW',
+      'Lambda Function Memory May Be Oversized',
+      'Lambda function {id} is configured with more memory than typical workloads need',
+      {
+          'title': 'Right-size Lambda Memory',
+          'description': 'Tune the memory size of Lambda function {id} against measured usage',
+          'priority': 'LOW',
+          'effort': 'Low',
+          'implementationGuide': 'Use AWS Lambda Power Tuning or Compute Optimizer to pick a memory size'
+      },
+      fields=('memory_size',))
+def lambda_oversized_memory(function):
+    return function.get('memory_size', 0) > LAMBDA_MEMORY_THRESHOLD_MB
+
+@rule('ec2-non-graviton', 'cost', 'ec2', 'LOW',
+      'EC2 Instance Not Using Graviton',
+      'Running EC2 instance {id} uses a non-Graviton instance type',
+      fields=('state', 'instance_type'))
+def ec2_non_graviton(instance):
+    return instance.get('state') == 'running' and not is_graviton(instance.get('instance_type'))
+
+@rule('ec2-stopped-instance', 'cost', 'ec2', 'LOW',
+      'Stopped EC2 Instance',
+      'EC2 instance {id} is stopped but its EBS volumes are still billed',
+      fields=('state',))
+def ec2_stopped(instance):
+    return instance.get('state') == 'stopped'
+
+@rule('rds-non-graviton', 'cost', 'rds', 'LOW',
+      'RDS Instance Not Using Graviton',
+      'RDS instance {id} uses a non-Graviton instance class',
+      fields=('db_instance_class',))
+def rds_non_graviton(instance):
+    return not is_graviton(instance.get('db_instance_class'))
+
+@rule('s3-no-lifecycle', 'cost', 's3', 'LOW',
+      'S3 Bucket Has No Lifecycle Policy',
+      'S3 bucket {id} has no lifecycle configuration to expire or tier objects',
+      fields=('lifecycle',))
+def s3_no_lifecycle(bucket):
+    return bucket.get('lifecycle', {}).get('status') == 'NOT_CONFIGURED'
+
+def index_inventory(resources):
+    """Map each service to its resource records in a single walk of the inventory"""
+    index = {}
+    for service, data in resources.get('services', {}).items():
+        spec = SERVICE_SPECS.get(service)
+        if spec and isinstance(data.get(spec[0]), RECORD_COLLECTIONS):
+            index[service] = data[spec[0]]
+    return index
+
+def matching_rules(records, rules, id_field):
+    """
+    Yield (resource id, rules the resource fails) for the resources failing any rule
+
+    When every rule declares its fields, a ResourceTable runs the rules once
+    per distinct combination of those fields instead of once per row.
+    """
+    if isinstance(records, ResourceTable) and all(r.fields for r in rules):
+        fields = tuple(dict.fromkeys(name for r in rules for name in r.fields))
+        failed = records.apply(fields, lambda record: [r for r in rules if r.predicate(record)])
+        for resource_id, matched in zip(records.values(id_field), failed):
+            if matched:
+                yield resource_id, matched
+        return
+
+    for resource in records:
+        matched = [r for r in rules if r.predicate(resource)]
+        if matched:
+            yield resource.get(id_field), matched
+
+class WellArchitectedEvaluator:
+    """Evaluate resources against Well-Architected Framework rules"""
+
+    def __init__(self, rules=None):
+        self.rules_by_service = {}
+        for r in RULES if rules is None else rules:
+            self.rules_by_service.setdefault(r.service, []).append(r)
+
+    def select(self, pillars):
+        """Rules applicable to the requested pillars, grouped by service"""
+        wanted = set(PILLARS) if 'all' in pillars else set(pillars)
+        selected = {}
+        for service, rules in self.rules_by_service.items():
+            matching = [r for r in rules if r.pillar in wanted]
+            if matching:
+                selected[service] = matching
+        return selected
+
+    def evaluate(self, resources, pillars):
+        """Evaluate resources against specified pillars"""
+        findings = []
+        recommendations = []
+
+        account_id = resources.get('account_id')
+        region = resources.get('region')
+        index = index_inventory(resources)
+
+        for service, rules in self.select(pillars).items():
+            _, id_field, display_name, arn_template = SERVICE_SPECS[service]
+            for resource_id, matched in matching_rules(index.get(service, ()), rules, id_field):
+                resource_arn = arn_template.format(region=region, account_id=account_id, id=resource_id)
+                for r in matched:
+                    findings.append({
+                        'id': f"{r.rule_id}-{resource_id}",
+                        'rule': r.rule_id,
+                        'pillar': PILLARS[r.pillar],
+                        'title': r.title,
+                        'description': r.description.format(id=resource_id),
+                        'severity': r.severity,
+                        'resourceArn': resource_arn,
+                        'service': display_name
+                    })
+
+                    if r.recommendation:
+                        recommendation = dict(r.recommendation)
+                        recommendation['id'] = f"{r.rule_id}-rec-{resource_id}"
+                        recommendation['description'] = recommendation['description'].format(id=resource_id)
+                        recommendations.append(recommendation)
+
+        return {
+            'findings': findings,
+            'recommendations': recommendations,
+            'total_findings': len(findings),
+            'total_recommendations': len(recommendations)
+        }
@@ -0,0 +1,206 @@
+import json
+import re
+
+# Field shapes of Finding / Recommendation in schema.graphql
+SEVERITIES = ('LOW', 'MEDIUM', 'HIGH', 'CRITICAL')
+PRIORITIES = ('LOW', 'MEDIUM', 'HIGH', 'CRITICAL')
+FINDING_REQUIRED = ('id', 'pillar', 'title', 'description', 'severity')
+FINDING_OPTIONAL = ('resourceArn', 'service')
+RECOMMENDATION_REQUIRED = ('id', 'title', 'description', 'priority', 'effort')
+RECOMMENDATION_OPTIONAL = ('implementationGuide',)
+
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_SCORE = re.compile(r'"score"\s*:\s*"?(-?\d+(?:\.\d+)?)')
+
+def _strings(item, required, optional):
+    """Copy required and optional scalar fields, or None if a required one is missing"""
+    result = {}
+    for field in required:
+        value = item.get(field)
+        if value is None or isinstance(value, (dict, list)) or str(value).strip() == '':
+            return None
+        result[field] = str(value)
+    for field in optional:
+        value = item.get(field)
+        if value is not None and not isinstance(value, (dict, list)):
+            result[field] = str(value)
+    return result
+
+def item_key(item):
+    """
+    What makes a finding or recommendation a repeat of another: its id and
+    resource, or title when it names no resource. Agents reuse ids such as
+    "1" for unrelated items, so the id alone is not enough.
+    """
+    return (item.get('id'), item.get('resourceArn') or item.get('title'))
+
+def validate_finding(item):
+    """Normalize a dict to the Finding shape, or return None if it does not fit"""
+    if not isinstance(item, dict) or 'severity' not in item:
+        return None
+    finding = _strings(item, FINDING_REQUIRED, FINDING_OPTIONAL)
+    if finding is None:
+        return None
+    finding['severity'] = finding['severity'].upper()
+    if finding['severity'] not in SEVERITIES:
+        return None
+    return finding
+
+def validate_recommendation(item):
+    """Normalize a dict to the Recommendation shape, or return None if it does not fit"""
+    if not isinstance(item, dict) or 'priority' not in item:
+        return None
+    recommendation = _strings(item, RECOMMENDATION_REQUIRED, RECOMMENDATION_OPTIONAL)
+    if recommendation is None:
+        return None
+    recommendation['priority'] = recommendation['priority'].upper()
+    if recommendation['priority'] not in PRIORITIES:
+        return None
+    links = item.get('links')
+    if isinstance(links, list):
+        recommendation['links'] = [str(link) for link in links if isinstance(link, (str, int, float))]
+    return recommendation
+
+def normalize_score(value):
+    """Clamp a score to 0-100; 0-1 fractions are scaled up. None if not numeric."""
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return None
+    if score != score:
+        return None
+    if 0 < score <= 1:
+        score *= 100
+    return max(0.0, min(100.0, score))
+
+def loads_lenient(text):
+    """json.loads, retrying once with trailing commas removed"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        repaired = _TRAILING_COMMA.sub(r'\1', text)
+        if repaired == text:
+            raise
+        return json.loads(repaired)
+
+class FindingStreamParser:
+    """
+    Incrementally extract structured review output from streamed agent text
+
+    Text is fed chunk by chunk and may mix prose, markdown fences and JSON.
+    Every JSON object that closes is parsed; objects that validate as a
+    Finding or Recommendation are returned as soon as their closing brace
+    arrives. Objects carrying a score or findings list are kept as candidate
+    result documents for finish().
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self.position = 0
+        self.object_starts = []
+        self.in_string = False
+        self.escaped = False
+        # item_key of the items returned so far, per type
+        self.finding_keys = set()
+        self.recommendation_keys = set()
+        self.findings = []
+        self.recommendations = []
+        self.documents = []
+        self.rejected = 0
+
+    def feed(self, chunk):
+        """Consume a text chunk; returns (new_findings, new_recommendations)"""
+        findings = []
+        recommendations = []
+
+        for char in chunk:
+            self.buffer.append(char)
+            index = self.position
+            self.position += 1
+
+            # Quotes only matter inside JSON; prose around it may contain stray ones
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+
+            if char == '"' and self.object_starts:
+                self.in_string = True
+            elif char == '{':
+                self.object_starts.append(index)
+            elif char == '}' and self.object_starts:
+                start = self.object_starts.pop()
+                self._close(start, index, findings, recommendations)
+
+        return findings, recommendations
+
+    def _close(self, start, end, findings, recommendations):
+        try:
+            item = loads_lenient(''.join(self.buffer[start:end + 1]))
+        except ValueError:
+            return
+        if not isinstance(item, dict):
+            return
+
+        if 'score' in item or isinstance(item.get('findings'), list):
+            self.documents.append(item)
+            return
+
+        finding = validate_finding(item)
+        if finding is not None:
+            if item_key(finding) not in self.finding_keys:
+                self.finding_keys.add(item_key(finding))
+                self.findings.append(finding)
+                findings.append(finding)
+            return
+
+        recommendation = validate_recommendation(item)
+        if recommendation is not None:
+            if item_key(recommendation) not in self.recommendation_keys:
+                self.recommendation_keys.add(item_key(recommendation))
+                self.recommendations.append(recommendation)
+                recommendations.append(recommendation)
+            return
+
+        if 'severity' in item or 'priority' in item:
+            self.rejected += 1
+
+    def finish(self):
+        """
+        Return (findings, recommendations, score) from everything fed so far
+
+        Works on truncated streams: completed objects are kept even if the
+        enclosing document never closed. The score is None when the output
+        does not contain one, rather than a made-up default.
+        """
+        score = None
+        for document in reversed(self.documents):
+            score = normalize_score(document.get('score'))
+            if score is not None:
+                break
+
+        if score is None:
+            match = _SCORE.search(self.text)
+            if match:
+                score = normalize_score(match.group(1))
+
+        return list(self.findings), list(self.recommendations), score
+
+    @property
+    def text(self):
+        return ''.join(self.buffer)
+
+def message_text(message):
+    """Flatten a Strands/Bedrock message ({'role', 'content': [{'text': ...}]}) into text"""
+    if isinstance(message, str):
+        return message
+    if isinstance(message, dict):
+        return ''.join(
+            block.get('text', '') for block in message.get('content', [])
+            if isinstance(block, dict)
+        )
+    return str(message)
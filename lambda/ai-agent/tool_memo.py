@@ -0,0 +1,104 @@
+import contextvars
+import json
+import os
+import re
+import threading
+
+AGENT_TOOL_MEMO = os.environ.get('AGENT_TOOL_MEMO', 'true').lower() == 'true'
+
+# use_aws operations that only read; every other operation always reaches AWS
+READ_ONLY_OPERATION_PREFIXES = ('describe_', 'get_', 'list_', 'lookup_', 'search_', 'batch_get_', 'head_')
+
+# Arguments of the results the current conversation has already received
+_received = contextvars.ContextVar('tool_memo_received', default=None)
+
+def normalize(arguments):
+    """Canonical JSON of tool arguments, so equal calls share a key whatever their key order"""
+    return json.dumps(arguments, sort_keys=True, default=str, separators=(',', ':'))
+
+def operation_name(name):
+    """boto3 operation name in snake case, as use_aws calls it: DescribeInstances -> describe_instances"""
+    return re.sub(r'(?<=[a-z0-9])(?=[A-Z])', '_', str(name).strip()).lower()
+
+def read_only(operation):
+    return operation_name(operation).startswith(READ_ONLY_OPERATION_PREFIXES)
+
+def use_aws_arguments(tool_input):
+    """The use_aws inputs that decide its result; the label is only for display"""
+    return {
+        'service_name': str(tool_input.get('service_name', '')).strip().lower(),
+        'operation_name': operation_name(tool_input.get('operation_name', '')),
+        'parameters': tool_input.get('parameters') or {},
+        'region': str(tool_input.get('region', '')).strip().lower(),
+        'profile_name': tool_input.get('profile_name')
+    }
+
+def reference(tool_name, arguments):
+    """What a repeated call returns instead of the payload the conversation already holds"""
+    return {
+        'unchanged': True,
+        'note': (
+            f"Same result as the earlier {tool_name} call with arguments {normalize(arguments)} "
+            f"in this conversation; use that output"
+        )
+    }
+
+class ToolMemo:
+    """
+    Results of tool calls made during one review run, keyed by tool and normalized arguments
+
+    The first call with given arguments runs the tool; later calls from any
+    agent of the run get the stored result. An agent repeating a call whose
+    result is already in its own conversation gets a short reference instead,
+    keeping the context free of duplicate payloads. Failed results are not
+    stored, so a retry reaches the tool again.
+    """
+
+    def __init__(self, enabled=AGENT_TOOL_MEMO):
+        self.enabled = enabled
+        self._results = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.references = 0
+
+    def start_conversation(self):
+        """Track results per conversation; call from the task that runs the agent"""
+        _received.set(set())
+
+    def call(self, tool_name, arguments, compute, succeeded=lambda result: True):
+        """
+        Return (result, repeated) for a call of tool_name with arguments
+
+        repeated is True when this conversation already received the result;
+        callers then return a reference instead of the result.
+        """
+        if not self.enabled:
+            return compute(), False
+
+        key = (tool_name, normalize(arguments))
+        received = _received.get()
+        with self._lock:
+            stored = key in self._results
+            if stored:
+                self.hits += 1
+                result = self._results[key]
+                if received is not None and key in received:
+                    self.references += 1
+                    return result, True
+            else:
+                self.misses += 1
+
+        if not stored:
+            result = compute()
+            if not succeeded(result):
+                return result, False
+            with self._lock:
+                self._results.setdefault(key, result)
+        if received is not None:
+            received.add(key)
+        return result, False
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'references': self.references}
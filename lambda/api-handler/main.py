@@ -1,30 +1,40 @@
+import hashlib
 import json
 import os
 import uuid
 from datetime import datetime
-import boto3
 from aws_lambda_powertools import Logger, Tracer, Metrics
 from aws_lambda_powertools.metrics import MetricUnit
 from aws_lambda_powertools.logging import correlation_paths
+from aws_lambda_powertools.utilities.idempotency.exceptions import IdempotencyAlreadyInProgressError
+from aws_clients import get_client
+from review_idempotency import REVIEW_DEDUPE_WINDOW_SECONDS, idempotent, register_lambda_context
+from review_cache import ReviewCache, is_final
+from review_repository import REVIEW_RECORD_TYPE, ReviewRepository, list_source
+from review_results import ReviewResultsStore
+from pagination import InvalidCursorError, decode_cursor, encode_cursor
 
 logger = Logger()
 tracer = Tracer()
 metrics = Metrics()
 
-dynamodb = boto3.resource('dynamodb')
-sqs = boto3.client('sqs')
-
 TABLE_NAME = os.environ['DYNAMODB_TABLE_NAME']
 QUEUE_URL = os.environ['SQS_QUEUE_URL']
 REGION = os.environ['REGION']
+MAX_LIST_LIMIT = 100
+
+REVIEW_STATUSES = ('PENDING', 'IN_PROGRESS', 'COMPLETED', 'FAILED')
+REVIEW_PRIORITIES = ('high', 'normal', 'low')
 
-table = dynamodb.Table(TABLE_NAME)
+reviews = ReviewRepository(TABLE_NAME, cache=ReviewCache())
+results_store = ReviewResultsStore()
 
 @tracer.capture_lambda_handler
 @logger.inject_lambda_context(correlation_id_path=correlation_paths.API_GATEWAY_REST)
 @metrics.log_metrics
 def handler(event, context):
     try:
+        register_lambda_context(context)
         http_method = event['httpMethod']
         resource = event['resource']
         path_parameters = event.get('pathParameters', {})
@@ -36,7 +46,12 @@ def handler(event, context):
         elif resource == '/reviews' and http_method == 'GET':
             return handle_list_reviews(event)
         elif resource == '/reviews/{reviewId}' and http_method == 'GET':
-            return handle_get_review(path_parameters.get('reviewId'))
+            query_params = event.get('queryStringParameters') or {}
+            return handle_get_review(
+                path_parameters.get('reviewId'),
+                query_params.get('include') == 'results',
+                request_header(event, 'If-None-Match')
+            )
         else:
             return {
                 'statusCode': 404,
@@ -57,10 +72,23 @@ def get_cors_headers():
     return {
         'Content-Type': 'application/json',
         'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token',
+        'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-Amz-Date,X-Api-Key,X-Amz-Security-Token,If-None-Match',
+        'Access-Control-Expose-Headers': 'ETag',
         'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
     }
 
+def request_header(event, name):
+    """Case-insensitive lookup of a request header"""
+    name = name.lower()
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+def review_etag(body):
+    """Strong ETag of a response body, so every container serving the same body agrees on it"""
+    return '"' + hashlib.sha256(body.encode('utf-8')).hexdigest()[:32] + '"'
+
 def handle_health_check():
     return {
         'statusCode': 200,
@@ -72,6 +100,16 @@ def handle_health_check():
         })
     }
 
+def valid_sweep(sweep):
+    """A sweep is {} or has accountIds / regions as lists of strings"""
+    if not isinstance(sweep, dict):
+        return False
+    for field in ('accountIds', 'regions'):
+        values = sweep.get(field)
+        if values is not None and not (isinstance(values, list) and all(isinstance(v, str) for v in values)):
+            return False
+    return True
+
 @tracer.capture_method
 def handle_create_review(event):
     try:
@@ -83,54 +121,75 @@ def handle_create_review(event):
         aws_account_id = body.get('awsAccountId')
         region = body.get('region', REGION)
         pillars = body.get('pillars', ['all'])
+        sweep = body.get('sweep')
+        incremental = body.get('incremental')
+        priority = body.get('priority', 'normal')
         
-        if not aws_account_id:
+        # A sweep names its accounts in sweep.accountIds, or covers the whole organization
+        if not aws_account_id and sweep is None:
             return {
                 'statusCode': 400,
                 'headers': get_cors_headers(),
                 'body': json.dumps({'error': 'awsAccountId is required'})
             }
         
-        review_item = {
-            'reviewId': review_id,
-            'timestamp': timestamp,
-            'status': 'PENDING',
-            'awsAccountId': aws_account_id,
-            'region': region,
-            'pillars': pillars,
-            'createdAt': timestamp,
-            'updatedAt': timestamp
-        }
+        if sweep is not None and not valid_sweep(sweep):
+            return {
+                'statusCode': 400,
+                'headers': get_cors_headers(),
+                'body': json.dumps({'error': 'sweep must be an object with optional accountIds and regions lists'})
+            }
         
-        table.put_item(Item=review_item)
+        if incremental is not None and not isinstance(incremental, bool):
+            return {
+                'statusCode': 400,
+                'headers': get_cors_headers(),
+                'body': json.dumps({'error': 'incremental must be a boolean'})
+            }
         
-        queue_message = {
-            'reviewId': review_id,
+        if priority not in REVIEW_PRIORITIES:
+            return {
+                'statusCode': 400,
+                'headers': get_cors_headers(),
+                'body': json.dumps({'error': f"priority must be one of {', '.join(REVIEW_PRIORITIES)}"})
+            }
+        
+        request = {
             'awsAccountId': aws_account_id,
             'region': region,
-            'pillars': pillars,
-            'timestamp': timestamp
+            'pillars': sorted(set(pillars)),
+            'sweep': sweep,
+            'incremental': incremental,
+            'priority': priority
         }
         
-        sqs.send_message(
-            QueueUrl=QUEUE_URL,
-            MessageBody=json.dumps(queue_message),
-            MessageAttributes={
-                'reviewId': {
-                    'StringValue': review_id,
-                    'DataType': 'String'
-                }
+        try:
+            review = create_review(request=request, review_id=review_id, timestamp=timestamp)
+        except IdempotencyAlreadyInProgressError:
+            return {
+                'statusCode': 409,
+                'headers': get_cors_headers(),
+                'body': json.dumps({'error': 'An identical review is being created'})
             }
-        )
         
-        logger.info(f"Created review {review_id} for account {aws_account_id}")
-        metrics.add_metric(name="ReviewsCreated", unit=MetricUnit.Count, value=1)
+        if review.get('duplicate'):
+            logger.info(f"Returning review {review['reviewId']} for duplicate request for account {aws_account_id}")
+            metrics.add_metric(name="DuplicateReviewRequests", unit=MetricUnit.Count, value=1)
+            return {
+                'statusCode': 200,
+                'headers': get_cors_headers(),
+                'body': json.dumps({
+                    'reviewId': review['reviewId'],
+                    'duplicate': True,
+                    'message': 'An identical review was requested recently'
+                })
+            }
         
         return {
             'statusCode': 201,
             'headers': get_cors_headers(),
             'body': json.dumps({
-                'reviewId': review_id,
+                'reviewId': review['reviewId'],
                 'status': 'PENDING',
                 'message': 'Review initiated successfully'
             })
@@ -150,8 +209,72 @@ def handle_create_review(event):
             'body': json.dumps({'error': 'Failed to create review'})
         }
 
+@idempotent('review-create', '[awsAccountId, region, pillars, sweep, incremental]', REVIEW_DEDUPE_WINDOW_SECONDS)
+def create_review(request, review_id, timestamp):
+    """
+    Store a PENDING review and queue it for processing
+    
+    Identical requests (account, region, pillars, sweep, incremental) within
+    the dedupe window return the review created first instead of starting another one.
+    """
+    review_item = {
+        'reviewId': review_id,
+        'timestamp': timestamp,
+        'status': 'PENDING',
+        'region': request['region'],
+        'pillars': request['pillars'],
+        'createdAt': timestamp,
+        'updatedAt': timestamp
+    }
+    if request['awsAccountId']:
+        # Sweeps may have no account; the attribute keys the account index, so it is left out
+        review_item['awsAccountId'] = request['awsAccountId']
+    if request['sweep'] is not None:
+        review_item['sweep'] = request['sweep']
+    
+    reviews.create(review_item)
+    
+    queue_message = {
+        'reviewId': review_id,
+        'awsAccountId': request['awsAccountId'],
+        'region': request['region'],
+        'pillars': request['pillars'],
+        'priority': request['priority'],
+        'timestamp': timestamp
+    }
+    if request['sweep'] is not None:
+        queue_message['sweep'] = request['sweep']
+    if request['incremental'] is not None:
+        queue_message['incremental'] = request['incremental']
+    
+    get_client('sqs').send_message(
+        QueueUrl=QUEUE_URL,
+        MessageBody=json.dumps(queue_message),
+        MessageAttributes={
+            'reviewId': {
+                'StringValue': review_id,
+                'DataType': 'String'
+            }
+        }
+    )
+    
+    target = f"account {request['awsAccountId']}" if request['awsAccountId'] else 'an organization sweep'
+    logger.info(f"Created review {review_id} for {target}")
+    metrics.add_metric(name="ReviewsCreated", unit=MetricUnit.Count, value=1)
+    
+    return {'reviewId': review_id, 'timestamp': timestamp}
+
 @tracer.capture_method
-def handle_get_review(review_id):
+def handle_get_review(review_id, include_results=False, if_none_match=None):
+    """
+    Return the latest item of a review, served from the review cache when fresh
+    
+    Completed and failed reviews carry an ETag derived from the body; a
+    matching If-None-Match gets 304 without a body. Clients revalidate every
+    time, as the updateReview mutation can still change a completed review.
+    Responses with a presigned resultsUrl get no ETag, since a client reusing
+    its copy would be left with an expired URL.
+    """
     if not review_id:
         return {
             'statusCode': 400,
@@ -160,26 +283,46 @@ def handle_get_review(review_id):
         }
     
     try:
-        response = table.query(
-            KeyConditionExpression='reviewId = :reviewId',
-            ExpressionAttributeValues={':reviewId': review_id},
-            ScanIndexForward=False,
-            Limit=1
-        )
+        cached, hit = reviews.get_cached(review_id)
+        metrics.add_metric(name="ReviewCacheHits" if hit else "ReviewCacheMisses", unit=MetricUnit.Count, value=1)
         
-        if not response['Items']:
+        if cached is None:
             return {
                 'statusCode': 404,
                 'headers': get_cors_headers(),
                 'body': json.dumps({'error': 'Review not found'})
             }
         
-        review = response['Items'][0]
+        # The cached item is shared between requests; work on a copy
+        review = dict(cached)
+        results_key = review.pop('resultsKey', None)
+        headers = get_cors_headers()
+        
+        if not include_results:
+            review.pop('findings', None)
+            review.pop('recommendations', None)
+        elif results_key:
+            # Large result sets are not inlined; the client streams them from S3
+            review['resultsUrl'] = results_store.presigned_url(results_key)
+        
+        # Sorted keys: DynamoDB does not return attributes in a fixed order
+        body = json.dumps(review, default=str, sort_keys=True)
+        if is_final(review) and 'resultsUrl' not in review:
+            etag = review_etag(body)
+            headers['ETag'] = etag
+            headers['Cache-Control'] = 'private, no-cache'
+            if if_none_match and etag in (tag.strip() for tag in if_none_match.split(',')):
+                metrics.add_metric(name="ReviewNotModified", unit=MetricUnit.Count, value=1)
+                return {
+                    'statusCode': 304,
+                    'headers': headers,
+                    'body': ''
+                }
         
         return {
             'statusCode': 200,
-            'headers': get_cors_headers(),
-            'body': json.dumps(review, default=str)
+            'headers': headers,
+            'body': body
         }
         
     except Exception as e:
@@ -194,36 +337,67 @@ def handle_get_review(review_id):
 def handle_list_reviews(event):
     try:
         query_params = event.get('queryStringParameters', {}) or {}
-        limit = int(query_params.get('limit', 20))
         next_token = query_params.get('nextToken')
+        status = query_params.get('status')
+        aws_account_id = query_params.get('awsAccountId')
+        include_results = query_params.get('view') == 'full'
         
-        scan_kwargs = {
-            'Limit': limit
-        }
+        try:
+            limit = min(int(query_params.get('limit', 20)), MAX_LIST_LIMIT)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return {
+                'statusCode': 400,
+                'headers': get_cors_headers(),
+                'body': json.dumps({'error': f"limit must be between 1 and {MAX_LIST_LIMIT}"})
+            }
         
-        if next_token:
-            scan_kwargs['ExclusiveStartKey'] = json.loads(next_token)
+        if status:
+            if status not in REVIEW_STATUSES:
+                return {
+                    'statusCode': 400,
+                    'headers': get_cors_headers(),
+                    'body': json.dumps({'error': f"status must be one of {', '.join(REVIEW_STATUSES)}"})
+                }
+            access_pattern, value = 'status', status
+        elif aws_account_id:
+            access_pattern, value = 'account', aws_account_id
+        else:
+            access_pattern, value = 'recent', REVIEW_RECORD_TYPE
         
-        response = table.scan(**scan_kwargs)
+        # Index and scan start keys differ, so a cursor only resumes the kind of read that issued it
+        scope = f"{access_pattern}:{list_source(access_pattern)}:{value}"
+        start_key = decode_cursor(next_token, scope) if next_token else None
+        
+        items, last_evaluated_key = reviews.list(
+            access_pattern, value, limit, start_key, include_results=include_results
+        )
         
         result = {
-            'items': response['Items'],
-            'count': len(response['Items'])
+            'items': items,
+            'count': len(items)
         }
         
-        if 'LastEvaluatedKey' in response:
-            result['nextToken'] = json.dumps(response['LastEvaluatedKey'], default=str)
+        if last_evaluated_key:
+            result['nextToken'] = encode_cursor(last_evaluated_key, scope)
         
         return {
             'statusCode': 200,
             'headers': get_cors_headers(),
             'body': json.dumps(result, default=str)
         }
-        
+    
+    except InvalidCursorError as e:
+        return {
+            'statusCode': 400,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'error': str(e)})
+        }
     except Exception as e:
         logger.error(f"Error listing reviews: {str(e)}")
         return {
             'statusCode': 500,
             'headers': get_cors_headers(),
             'body': json.dumps({'error': 'Failed to list reviews'})
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,57 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+from aws_lambda_powertools import Logger
+from aws_clients import get_client
+
+logger = Logger(child=True)
+
+CURSOR_SECRET_ARN = os.environ.get('CURSOR_SECRET_ARN')
+SIGNATURE_BYTES = 16
+
+_signing_key = None
+
+class InvalidCursorError(ValueError):
+    """Raised for nextToken values that were not issued for this query"""
+
+def signing_key():
+    """HMAC key for cursors, loaded once per container from Secrets Manager"""
+    global _signing_key
+    if _signing_key is None:
+        if CURSOR_SECRET_ARN:
+            secret = get_client('secretsmanager').get_secret_value(SecretId=CURSOR_SECRET_ARN)
+            _signing_key = secret['SecretString'].encode('utf-8')
+        else:
+            # Local runs: cursors stay valid for the lifetime of the process only
+            logger.warning("CURSOR_SECRET_ARN not set, using an ephemeral cursor signing key")
+            _signing_key = secrets.token_bytes(32)
+    return _signing_key
+
+def encode_cursor(last_evaluated_key, scope):
+    """Turn a LastEvaluatedKey into an opaque token bound to the query scope"""
+    payload = json.dumps(
+        {'k': last_evaluated_key, 's': scope}, default=str, separators=(',', ':'), sort_keys=True
+    ).encode('utf-8')
+    signature = hmac.new(signing_key(), payload, hashlib.sha256).digest()[:SIGNATURE_BYTES]
+    return base64.urlsafe_b64encode(signature + payload).decode('ascii').rstrip('=')
+
+def decode_cursor(token, scope):
+    """Verify a token from encode_cursor and return the ExclusiveStartKey it carries"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+    except (ValueError, TypeError):
+        raise InvalidCursorError('Malformed nextToken')
+    
+    signature, payload = raw[:SIGNATURE_BYTES], raw[SIGNATURE_BYTES:]
+    expected = hmac.new(signing_key(), payload, hashlib.sha256).digest()[:SIGNATURE_BYTES]
+    if not hmac.compare_digest(signature, expected):
+        raise InvalidCursorError('Invalid nextToken')
+    
+    data = json.loads(payload)
+    if data.get('s') != scope:
+        raise InvalidCursorError('nextToken was issued for a different query')
+    
+    return data['k']
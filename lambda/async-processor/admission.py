@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+from decimal import Decimal
+from botocore.exceptions import ClientError
+from aws_lambda_powertools import Logger
+from aws_clients import get_table
+
+logger = Logger(child=True)
+
+ADMISSION_TABLE_NAME = os.environ.get('ADMISSION_TABLE_NAME')
+# Bedrock token budget per model; the bucket holds one minute of it
+ADMISSION_TOKENS_PER_MINUTE = int(os.environ.get('ADMISSION_TOKENS_PER_MINUTE', '200000'))
+ADMISSION_TOKENS_PER_PILLAR = int(os.environ.get('ADMISSION_TOKENS_PER_PILLAR', '25000'))
+ADMISSION_MAX_DELAY_SECONDS = 900  # SQS DelaySeconds limit
+
+# Share of the bucket that must remain after admitting a review of each priority,
+# so lower priorities back off first and high priority work still gets through
+PRIORITY_RESERVE = {
+    'high': 0.0,
+    'normal': 0.2,
+    'low': 0.5
+}
+
+# Mirrors rules.PILLARS in the agent; 'all' expands to these
+KNOWN_PILLARS = ('security', 'reliability', 'performance', 'cost')
+
+def expected_tokens(pillars, tokens_per_pillar=ADMISSION_TOKENS_PER_PILLAR):
+    """Rough Bedrock token cost of a review, used as the admission cost"""
+    pillar_count = len(KNOWN_PILLARS) if 'all' in pillars else len(set(pillars))
+    return max(1, pillar_count) * tokens_per_pillar
+
+class AdmissionBackend:
+    """Storage interface for token bucket state"""
+
+    def load(self, key):
+        """Return (tokens, updated_at), or None for a bucket never used"""
+        raise NotImplementedError
+
+    def save(self, key, tokens, updated_at, previous_updated_at):
+        """Store new state if it was not changed since previous_updated_at; returns success"""
+        raise NotImplementedError
+
+class InMemoryAdmissionBackend(AdmissionBackend):
+    """Process-local bucket state, for tests and local runs"""
+
+    def __init__(self):
+        self.buckets = {}
+        self._lock = threading.Lock()
+
+    def load(self, key):
+        with self._lock:
+            return self.buckets.get(key)
+
+    def save(self, key, tokens, updated_at, previous_updated_at):
+        with self._lock:
+            current = self.buckets.get(key)
+            if (current[1] if current else None) != previous_updated_at:
+                return False
+            self.buckets[key] = (tokens, updated_at)
+            return True
+
+class DynamoDBAdmissionBackend(AdmissionBackend):
+    """Bucket state shared by all processor instances, updated with optimistic locking"""
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+        self._table = None
+
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = get_table(self.table_name)
+        return self._table
+
+    def load(self, key):
+        item = self.table.get_item(Key={'bucket': key}, ConsistentRead=True).get('Item')
+        if item is None:
+            return None
+        return float(item['tokens']), float(item['updatedAt'])
+
+    def save(self, key, tokens, updated_at, previous_updated_at):
+        if previous_updated_at is None:
+            condition = {'ConditionExpression': 'attribute_not_exists(#bucket)',
+                         'ExpressionAttributeNames': {'#bucket': 'bucket'}}
+        else:
+            condition = {'ConditionExpression': 'updatedAt = :previous',
+                         'ExpressionAttributeValues': {':previous': Decimal(str(previous_updated_at))}}
+        try:
+            self.table.put_item(
+                Item={
+                    'bucket': key,
+                    'tokens': Decimal(str(round(tokens, 3))),
+                    'updatedAt': Decimal(str(updated_at))
+                },
+                **condition
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                return False
+            raise
+        return True
+
+class Admission:
+    """Outcome of an admission attempt"""
+
+    __slots__ = ('admitted', 'retry_after', 'available')
+
+    def __init__(self, admitted, retry_after, available):
+        self.admitted = admitted
+        self.retry_after = retry_after
+        self.available = available
+
+class AdmissionController:
+    """
+    Token bucket per model ID gating how much agent work starts per minute
+
+    The bucket holds tokens_per_minute and refills continuously. A review is
+    admitted when its expected token cost fits while leaving the reserve of
+    its priority; otherwise it is told how long to wait.
+    """
+
+    def __init__(self, backend, tokens_per_minute=ADMISSION_TOKENS_PER_MINUTE, max_attempts=5):
+        self.backend = backend
+        self.capacity = float(tokens_per_minute)
+        self.refill_per_second = tokens_per_minute / 60.0
+        self.max_attempts = max_attempts
+
+    def try_acquire(self, key, cost, priority='normal', now=None):
+        reserve = self.capacity * PRIORITY_RESERVE.get(priority, PRIORITY_RESERVE['normal'])
+        # A review larger than the bucket would never fit; let it through when the bucket is full
+        cost = min(float(cost), self.capacity - reserve)
+
+        for _ in range(self.max_attempts):
+            current_time = now or time.time()
+            state = self.backend.load(key)
+            if state is None:
+                available, previous = self.capacity, None
+            else:
+                elapsed = max(0.0, current_time - state[1])
+                available, previous = min(self.capacity, state[0] + elapsed * self.refill_per_second), state[1]
+
+            if available - cost < reserve:
+                retry_after = (cost + reserve - available) / self.refill_per_second
+                return Admission(False, retry_after, available)
+
+            if self.backend.save(key, available - cost, current_time, previous):
+                return Admission(True, 0.0, available - cost)
+
+        # Lost every race for the bucket; back off briefly rather than over-admit
+        return Admission(False, 1.0, 0.0)
+
+    def refund(self, key, cost):
+        """Return tokens taken for a review that did not start after all"""
+        for _ in range(self.max_attempts):
+            current_time = time.time()
+            state = self.backend.load(key)
+            if state is None:
+                return
+            elapsed = max(0.0, current_time - state[1])
+            tokens = min(self.capacity, state[0] + elapsed * self.refill_per_second + cost)
+            if self.backend.save(key, tokens, current_time, state[1]):
+                return
+
+def create_admission_controller():
+    """Build the configured controller, or None when admission control is disabled"""
+    if ADMISSION_TABLE_NAME:
+        return AdmissionController(DynamoDBAdmissionBackend(ADMISSION_TABLE_NAME))
+    return None
@@ -1,22 +1,29 @@
 import json
 import os
-from datetime import datetime
-import boto3
+import time
+from concurrent.futures import ThreadPoolExecutor
 from aws_lambda_powertools import Logger, Tracer, Metrics
 from aws_lambda_powertools.metrics import MetricUnit
+from aws_clients import get_client
+from appsync_publisher import create_publisher
+from review_repository import ReviewRepository
+from admission import ADMISSION_MAX_DELAY_SECONDS, create_admission_controller, expected_tokens
 
 logger = Logger()
 tracer = Tracer()
 metrics = Metrics()
 
-dynamodb = boto3.resource('dynamodb')
-lambda_client = boto3.client('lambda')
-
 TABLE_NAME = os.environ['DYNAMODB_TABLE_NAME']
 AI_AGENT_FUNCTION_NAME = os.environ['AI_AGENT_FUNCTION_NAME']
 REGION = os.environ['REGION']
+DISPATCH_MAX_WORKERS = int(os.environ.get('DISPATCH_MAX_WORKERS', '10'))
+BEDROCK_MODEL_ID = os.environ.get('BEDROCK_MODEL_ID', 'default')
+
+PRIORITY_ORDER = {'high': 0, 'normal': 1, 'low': 2}
 
-table = dynamodb.Table(TABLE_NAME)
+reviews = ReviewRepository(TABLE_NAME)
+publisher = create_publisher()
+admission = create_admission_controller()
 
 @tracer.capture_lambda_handler
 @logger.inject_lambda_context
@@ -24,29 +31,24 @@ table = dynamodb.Table(TABLE_NAME)
 def handler(event, context):
     """
     Process SQS messages to trigger AI agent reviews
+    
+    The whole batch is moved to IN_PROGRESS with batched transactional writes,
+    then the agent invocations are dispatched concurrently. Reviews that do not
+    pass admission control are re-queued with a delay.
     """
     successful_records = []
     failed_records = []
+    messages = {}
+    queue_url = None
     
     for record in event['Records']:
         try:
             message_body = json.loads(record['body'])
-            review_id = message_body['reviewId']
-            
-            logger.info(f"Processing review {review_id}")
-            
-            result = process_review_request(message_body)
-            
-            if result['success']:
-                successful_records.append(record['messageId'])
-                metrics.add_metric(name="ProcessedReviews", unit=MetricUnit.Count, value=1)
-            else:
-                failed_records.append({
-                    'itemIdentifier': record['messageId']
-                })
-                logger.error(f"Failed to process review {review_id}: {result['error']}")
-                metrics.add_metric(name="FailedReviews", unit=MetricUnit.Count, value=1)
-                
+            logger.info(f"Processing review {message_body['reviewId']}")
+            # Kept across re-queues so admission wait time covers every deferral
+            message_body.setdefault('queuedAt', int(record['attributes']['SentTimestamp']) / 1000)
+            messages[record['messageId']] = message_body
+            queue_url = queue_url or queue_url_from_arn(record['eventSourceARN'])
         except Exception as e:
             logger.error(f"Error processing record {record['messageId']}: {str(e)}")
             failed_records.append({
@@ -54,6 +56,20 @@ def handler(event, context):
             })
             metrics.add_metric(name="ProcessingErrors", unit=MetricUnit.Count, value=1)
     
+    for message_id, result in process_review_requests(messages, queue_url).items():
+        review_id = messages[message_id]['reviewId']
+        if result.get('deferred'):
+            successful_records.append(message_id)
+        elif result['success']:
+            successful_records.append(message_id)
+            metrics.add_metric(name="ProcessedReviews", unit=MetricUnit.Count, value=1)
+        else:
+            failed_records.append({
+                'itemIdentifier': message_id
+            })
+            logger.error(f"Failed to process review {review_id}: {result['error']}")
+            metrics.add_metric(name="FailedReviews", unit=MetricUnit.Count, value=1)
+    
     response = {}
     if failed_records:
         response['batchItemFailures'] = failed_records
@@ -62,28 +78,156 @@ def handler(event, context):
     
     return response
 
+def queue_url_from_arn(queue_arn):
+    _, _, _, region, account_id, queue_name = queue_arn.split(':')
+    return f"https://sqs.{region}.amazonaws.com/{account_id}/{queue_name}"
+
 @tracer.capture_method
-def process_review_request(message):
+def process_review_requests(messages, queue_url=None):
     """
-    Process a single review request
+    Start a batch of review requests, keyed by SQS message id
+    
+    Returns {message_id: {'success': bool, 'error'?: str, 'deferred'?: bool}}.
+    Reviews that are already running or finished are skipped successfully, so
+    redeliveries do not start another run; transient write errors fail only
+    their own message.
     """
-    try:
-        review_id = message['reviewId']
-        aws_account_id = message['awsAccountId']
-        region = message['region']
-        pillars = message.get('pillars', ['all'])
+    results, admitted_costs = admit_reviews(messages, queue_url) if admission is not None else ({}, {})
+    message_ids = [m for m in messages if m not in results]
+    
+    keys = []
+    for message_id in message_ids:
+        message = messages[message_id]
+        try:
+            # Payloads queued before the sort key was carried along need a lookup
+            keys.append(reviews.key(message['reviewId'], message.get('timestamp')))
+        except Exception as e:
+            results[message_id] = {'success': False, 'error': f"Error processing review: {str(e)}"}
+            keys.append(None)
+    
+    outcomes = reviews.transition_many(keys, 'IN_PROGRESS')
+    if publisher is not None:
+        # One batched request tells subscribers which reviews started
+        publisher.publish_many([key for key, outcome in zip(keys, outcomes) if outcome is True], 'IN_PROGRESS')
+    
+    dispatch = []
+    for message_id, key, outcome in zip(message_ids, keys, outcomes):
+        if outcome is not True and message_id in admitted_costs:
+            refund_admission(admitted_costs[message_id])
+        if message_id in results:
+            continue
+        if isinstance(outcome, Exception):
+            results[message_id] = {'success': False, 'error': f"Error processing review: {str(outcome)}"}
+        elif not outcome:
+            logger.info(f"Skipping review {messages[message_id]['reviewId']}: not in a startable status")
+            results[message_id] = {'success': True}
+        else:
+            messages[message_id]['timestamp'] = key['timestamp']
+            dispatch.append(message_id)
+    
+    if dispatch:
+        with ThreadPoolExecutor(max_workers=min(DISPATCH_MAX_WORKERS, len(dispatch))) as executor:
+            for message_id, result in zip(dispatch, executor.map(lambda m: dispatch_review(messages[m]), dispatch)):
+                results[message_id] = result
+    
+    return results
+
+def admit_reviews(messages, queue_url):
+    """
+    Take Bedrock token budget for each review, highest priority first
+    
+    Returns (results of deferred messages, {message_id: cost} of admitted ones).
+    Sweeps do not call Bedrock and pass without cost. If the admission store is
+    unavailable, reviews are admitted rather than held back.
+    """
+    results = {}
+    admitted_costs = {}
+    order = sorted(messages, key=lambda m: PRIORITY_ORDER.get(messages[m].get('priority'), 1))
+    
+    for message_id in order:
+        message = messages[message_id]
+        if message.get('sweep') is not None:
+            continue
         
-        update_review_status(review_id, 'IN_PROGRESS')
+        cost = expected_tokens(message.get('pillars', ['all']))
+        try:
+            decision = admission.try_acquire(BEDROCK_MODEL_ID, cost, message.get('priority', 'normal'))
+        except Exception as e:
+            logger.warning(f"Admission check failed for review {message['reviewId']}, admitting: {str(e)}")
+            metrics.add_metric(name="AdmissionErrors", unit=MetricUnit.Count, value=1)
+            continue
         
+        metrics.add_metric(name="AdmissionAvailableTokens", unit=MetricUnit.Count, value=int(decision.available))
+        if decision.admitted:
+            metrics.add_metric(name="AdmissionWaitSeconds", unit=MetricUnit.Seconds,
+                               value=max(0.0, time.time() - message['queuedAt']))
+            admitted_costs[message_id] = cost
+        else:
+            results[message_id] = defer_review(message, decision.retry_after, queue_url)
+    
+    if any(result.get('deferred') for result in results.values()):
+        try:
+            attributes = get_client('sqs').get_queue_attributes(
+                QueueUrl=queue_url, AttributeNames=['ApproximateNumberOfMessagesDelayed']
+            )['Attributes']
+            metrics.add_metric(name="AdmissionQueueDepth", unit=MetricUnit.Count,
+                               value=int(attributes['ApproximateNumberOfMessagesDelayed']))
+        except Exception as e:
+            logger.warning(f"Could not read admission queue depth: {str(e)}")
+    
+    return results, admitted_costs
+
+def refund_admission(cost):
+    """Give back budget taken for a review that is not starting after all"""
+    try:
+        admission.refund(BEDROCK_MODEL_ID, cost)
+    except Exception as e:
+        logger.warning(f"Could not refund admission tokens: {str(e)}")
+
+def defer_review(message, retry_after, queue_url):
+    """Re-queue a review that was not admitted, delayed until budget should be available"""
+    delay = int(min(ADMISSION_MAX_DELAY_SECONDS, max(1, retry_after)))
+    try:
+        get_client('sqs').send_message(
+            QueueUrl=queue_url,
+            MessageBody=json.dumps(message),
+            DelaySeconds=delay,
+            MessageAttributes={
+                'reviewId': {
+                    'StringValue': message['reviewId'],
+                    'DataType': 'String'
+                }
+            }
+        )
+    except Exception as e:
+        return {'success': False, 'error': f"Error deferring review: {str(e)}"}
+    
+    logger.info(f"Deferred review {message['reviewId']} for {delay}s by admission control")
+    metrics.add_metric(name="AdmissionDeferred", unit=MetricUnit.Count, value=1)
+    return {'success': True, 'deferred': True}
+
+def dispatch_review(message):
+    """
+    Invoke the AI agent for a review already moved to IN_PROGRESS
+    """
+    review_id = message['reviewId']
+    review_timestamp = message.get('timestamp')
+    try:
         agent_payload = {
             'reviewId': review_id,
-            'awsAccountId': aws_account_id,
-            'region': region,
-            'pillars': pillars,
+            'timestamp': review_timestamp,
+            'awsAccountId': message.get('awsAccountId'),
+            'region': message['region'],
+            'pillars': message.get('pillars', ['all']),
             'action': 'perform_well_architected_review'
         }
+        if message.get('sweep') is not None:
+            agent_payload['action'] = 'perform_sweep_review'
+            agent_payload['sweep'] = message['sweep']
+        if message.get('incremental') is not None:
+            agent_payload['incremental'] = message['incremental']
         
-        response = lambda_client.invoke(
+        response = get_client('lambda').invoke(
             FunctionName=AI_AGENT_FUNCTION_NAME,
             InvocationType='Event', 
             Payload=json.dumps(agent_payload)
@@ -94,60 +238,31 @@ def process_review_request(message):
             return {'success': True}
         else:
             error_msg = f"AI agent invocation failed with status {response['StatusCode']}"
-            update_review_status(review_id, 'FAILED', error_msg)
+            update_review_status(review_id, 'FAILED', error_msg, review_timestamp)
             return {'success': False, 'error': error_msg}
             
     except Exception as e:
         error_msg = f"Error processing review: {str(e)}"
         try:
-            update_review_status(review_id, 'FAILED', error_msg)
+            update_review_status(review_id, 'FAILED', error_msg, review_timestamp)
         except:
             pass
         return {'success': False, 'error': error_msg}
 
 @tracer.capture_method
-def update_review_status(review_id, status, error_message=None):
+def update_review_status(review_id, status, error_message=None, timestamp=None):
     """
-    Update review status in DynamoDB
+    Update review status in DynamoDB with a forward-only conditional write
+    
+    Returns False when the review is missing or already in a later status.
+    Subscribers are notified of changes made.
     """
     try:
-        update_expression = "SET #status = :status, #updatedAt = :updatedAt"
-        expression_attribute_names = {
-            '#status': 'status',
-            '#updatedAt': 'updatedAt'
-        }
-        expression_attribute_values = {
-            ':status': status,
-            ':updatedAt': datetime.utcnow().isoformat()
-        }
-        
-        if error_message:
-            update_expression += ", #errorMessage = :errorMessage"
-            expression_attribute_names['#errorMessage'] = 'errorMessage'
-            expression_attribute_values[':errorMessage'] = error_message
-        
-        response = table.query(
-            KeyConditionExpression='reviewId = :reviewId',
-            ExpressionAttributeValues={':reviewId': review_id},
-            ScanIndexForward=False,
-            Limit=1
-        )
-        
-        if response['Items']:
-            item = response['Items'][0]
-            table.update_item(
-                Key={
-                    'reviewId': review_id,
-                    'timestamp': item['timestamp']
-                },
-                UpdateExpression=update_expression,
-                ExpressionAttributeNames=expression_attribute_names,
-                ExpressionAttributeValues=expression_attribute_values
-            )
-            logger.info(f"Updated review {review_id} status to {status}")
-        else:
-            logger.error(f"Review {review_id} not found for status update")
+        updated = reviews.update_status(review_id, status, error_message, timestamp)
+        if updated and publisher is not None and timestamp:
+            publisher.publish_review_update(review_id, timestamp, status)
+        return updated
             
     except Exception as e:
         logger.error(f"Error updating review status: {str(e)}")
-        raise
\ No newline at end of file
+        raise
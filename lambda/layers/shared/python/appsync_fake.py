@@ -0,0 +1,93 @@
+"""
+Local stand-in for the AppSync GraphQL endpoint, for tests and local runs
+
+Records every request an AppSyncPublisher sends and answers updateReview
+fields with the review input echoed back, the way the real resolver returns
+the stored item. Signatures are not checked, but the publisher still signs,
+so some (dummy) AWS credentials must be configured.
+
+Run `python appsync_fake.py [port]` and point APPSYNC_API_URL at the printed URL.
+"""
+import json
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_FIELD = re.compile(r'(?:(\w+)\s*:\s*)?updateReview\s*\(\s*input\s*:\s*\$(\w+)\s*\)')
+
+class FakeAppSyncEndpoint:
+    """Threaded HTTP server recording GraphQL requests; use as a context manager"""
+
+    def __init__(self, port=0, fail=False):
+        self.requests = []
+        self.fail = fail
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/graphql"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def updates(self):
+        """Every review input received, in arrival order"""
+        with self._lock:
+            return [
+                review_input
+                for request in self.requests
+                for name, review_input in request['variables'].items()
+            ]
+
+    def respond(self, request):
+        if self.fail:
+            return {'data': None, 'errors': [{'message': 'Fake failure'}]}
+        data = {}
+        for alias, variable in _FIELD.findall(request['query']):
+            review_input = request['variables'].get(variable, {})
+            data[alias or 'updateReview'] = dict(review_input)
+        return {'data': data}
+
+    def _handler(self):
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                request = json.loads(body)
+                request['headers'] = dict(self.headers.items())
+                with endpoint._lock:
+                    endpoint.requests.append(request)
+
+                payload = json.dumps(endpoint.respond(request)).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+if __name__ == '__main__':
+    with FakeAppSyncEndpoint(int(sys.argv[1]) if len(sys.argv) > 1 else 0) as endpoint:
+        print(f"APPSYNC_API_URL={endpoint.url}")
+        try:
+            seen = 0
+            while True:
+                threading.Event().wait(1)
+                for request in endpoint.requests[seen:]:
+                    print(json.dumps(request['variables']))
+                seen = len(endpoint.requests)
+        except KeyboardInterrupt:
+            pass
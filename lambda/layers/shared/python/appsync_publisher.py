@@ -0,0 +1,184 @@
+import json
+import os
+import threading
+import time
+import urllib.request
+import boto3
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
+from aws_lambda_powertools import Logger
+from review_cache import FINAL_STATUSES
+
+logger = Logger(child=True)
+
+APPSYNC_API_URL = os.environ.get('APPSYNC_API_URL')
+APPSYNC_TIMEOUT_SECONDS = float(os.environ.get('APPSYNC_TIMEOUT_SECONDS', '5'))
+# Reviews notified per request; each becomes an aliased updateReview field
+APPSYNC_BATCH_SIZE = int(os.environ.get('APPSYNC_BATCH_SIZE', '10'))
+# Progress updates of one review are sent at most this often; status changes go out at once
+APPSYNC_MIN_INTERVAL_SECONDS = float(os.environ.get('APPSYNC_MIN_INTERVAL_SECONDS', '2'))
+
+REVIEW_FIELDS = """
+    reviewId
+    timestamp
+    status
+    awsAccountId
+    region
+    score
+    findings { id pillar title description severity resourceArn service }
+    recommendations { id title description priority effort implementationGuide links }
+    createdAt
+    updatedAt
+"""
+
+# onReviewUpdated subscribers receive exactly the fields selected here
+UPDATE_REVIEW_MUTATION = f"""
+mutation UpdateReview($input: UpdateReviewInput!) {{
+  updateReview(input: $input) {{ {REVIEW_FIELDS} }}
+}}
+"""
+
+def batch_mutation(count):
+    """updateReview aliased count times, so one request notifies several reviews"""
+    variables = ', '.join(f"$input{i}: UpdateReviewInput!" for i in range(count))
+    fields = '\n'.join(f"  review{i}: updateReview(input: $input{i}) {{ {REVIEW_FIELDS} }}" for i in range(count))
+    return f"mutation UpdateReviews({variables}) {{\n{fields}\n}}"
+
+class AppSyncPublisher:
+    """
+    Send IAM (SigV4) signed GraphQL mutations to AppSync
+    
+    updateReview only touches updatedAt and returns the stored item, so it is
+    sent after a write has landed to push the current review to onReviewUpdated
+    subscribers. A review whose (status, progress) matches what was last sent
+    is skipped, progress-only updates of one review are held back to one per
+    min_interval until the next send or flush(), and updates of several
+    reviews share a request.
+    """
+    
+    def __init__(self, api_url, region=None, session=None, batch_size=APPSYNC_BATCH_SIZE,
+                 min_interval=APPSYNC_MIN_INTERVAL_SECONDS):
+        self.api_url = api_url
+        self.region = region or os.environ.get('AWS_REGION')
+        self._session = session
+        self.batch_size = max(1, batch_size)
+        self.min_interval = min_interval
+        self._published = {}
+        self._last_sent = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.skipped = 0
+        self.throttled = 0
+    
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = boto3.Session()
+        return self._session
+    
+    def execute(self, query, variables):
+        """Run a GraphQL operation and return its data; raises on transport or GraphQL errors"""
+        body = json.dumps({'query': query, 'variables': variables}, default=str)
+        request = AWSRequest(
+            method='POST',
+            url=self.api_url,
+            data=body,
+            headers={'Content-Type': 'application/json'}
+        )
+        SigV4Auth(self.session.get_credentials(), 'appsync', self.region).add_auth(request)
+        
+        http_request = urllib.request.Request(
+            self.api_url,
+            data=body.encode('utf-8'),
+            headers=dict(request.headers.items()),
+            method='POST'
+        )
+        with urllib.request.urlopen(http_request, timeout=APPSYNC_TIMEOUT_SECONDS) as response:
+            result = json.loads(response.read())
+        
+        if result.get('errors'):
+            raise RuntimeError(f"AppSync errors: {result['errors']}")
+        return result.get('data')
+    
+    def publish_review_update(self, review_id, timestamp, status=None, progress=None):
+        """
+        Fire updateReview so onReviewUpdated subscribers get the current item
+        
+        status marks a status change and is sent at once; without it this is a
+        progress update, e.g. with the number of results stored as progress.
+        Best effort: failures are logged and never interrupt the caller.
+        Returns True only when a mutation was sent.
+        """
+        key = (review_id, timestamp)
+        state = (status, progress)
+        with self._lock:
+            if state != (None, None) and self._published.get(key) == state:
+                self.skipped += 1
+                return False
+            if status is None and time.monotonic() - self._last_sent.get(key, float('-inf')) < self.min_interval:
+                self._pending[key] = state
+                self.throttled += 1
+                return False
+            self._pending.pop(key, None)
+        
+        return self.send({key: state}) > 0
+    
+    def publish_many(self, keys, status):
+        """Notify a status change of many reviews, given as primary keys, in batched requests"""
+        updates = {}
+        with self._lock:
+            for key in keys:
+                key = (key['reviewId'], key['timestamp'])
+                if self._published.get(key) == (status, None):
+                    self.skipped += 1
+                    continue
+                self._pending.pop(key, None)
+                updates[key] = (status, None)
+        return self.send(updates)
+    
+    def flush(self):
+        """Send the progress updates held back by the interval"""
+        with self._lock:
+            updates, self._pending = self._pending, {}
+        return self.send(updates)
+    
+    def send(self, updates):
+        """Send {(review_id, timestamp): state} in batches; returns how many reviews were notified"""
+        items = list(updates.items())
+        notified = 0
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            variables = {}
+            for i, ((review_id, timestamp), (status, _)) in enumerate(batch):
+                review_input = {'reviewId': review_id, 'timestamp': timestamp}
+                if status:
+                    review_input['status'] = status
+                variables[f'input{i}'] = review_input
+            
+            try:
+                if len(batch) == 1:
+                    self.execute(UPDATE_REVIEW_MUTATION, {'input': variables['input0']})
+                else:
+                    self.execute(batch_mutation(len(batch)), variables)
+            except Exception as e:
+                logger.warning(f"Failed to publish updates for {len(batch)} reviews: {str(e)}")
+                continue
+            
+            now = time.monotonic()
+            with self._lock:
+                for key, state in batch:
+                    if state[0] in FINAL_STATUSES:
+                        # Nothing follows a final status; forget the review
+                        self._published.pop(key, None)
+                        self._last_sent.pop(key, None)
+                        continue
+                    self._published[key] = state
+                    self._last_sent[key] = now
+            notified += len(batch)
+            self.sent += 1
+        return notified
+
+def create_publisher():
+    """The configured publisher, or None when no AppSync endpoint is set"""
+    return AppSyncPublisher(APPSYNC_API_URL) if APPSYNC_API_URL else None
@@ -0,0 +1,55 @@
+import os
+import threading
+import boto3
+from botocore.config import Config
+
+AWS_MAX_POOL_CONNECTIONS = int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '32'))
+AWS_RETRY_MAX_ATTEMPTS = int(os.environ.get('AWS_RETRY_MAX_ATTEMPTS', '8'))
+AWS_CONNECT_TIMEOUT = int(os.environ.get('AWS_CONNECT_TIMEOUT', '5'))
+
+_clients = {}
+_resources = {}
+_lock = threading.Lock()
+
+def client_config(max_pool_connections=None, **overrides):
+    """
+    botocore Config shared by every client in the Lambdas
+    
+    Adaptive retries rate-limit the client itself after throttling, the pool is
+    sized for the thread pools in use, and TCP keepalive keeps warm invocations
+    on already-open connections.
+    """
+    config = Config(
+        retries={'mode': 'adaptive', 'max_attempts': AWS_RETRY_MAX_ATTEMPTS},
+        max_pool_connections=max_pool_connections or AWS_MAX_POOL_CONNECTIONS,
+        connect_timeout=AWS_CONNECT_TIMEOUT,
+        tcp_keepalive=True
+    )
+    return config.merge(Config(**overrides)) if overrides else config
+
+def get_client(service_name, region_name=None):
+    """Lazily create one tuned client per (service, region) and reuse it across invocations"""
+    key = (service_name, region_name)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = boto3.client(service_name, region_name=region_name, config=client_config())
+                _clients[key] = client
+    return client
+
+def get_resource(service_name, region_name=None):
+    """Lazily create one tuned resource per (service, region) and reuse it across invocations"""
+    key = (service_name, region_name)
+    resource = _resources.get(key)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(key)
+            if resource is None:
+                resource = boto3.resource(service_name, region_name=region_name, config=client_config())
+                _resources[key] = resource
+    return resource
+
+def get_table(table_name):
+    return get_resource('dynamodb').Table(table_name)
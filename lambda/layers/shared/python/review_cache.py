@@ -0,0 +1,70 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Cached reviews are re-read after this long, bounding how stale a poll can be. Writes
+# by other functions are not seen before then, and even completed reviews can still
+# be touched by the updateReview mutation, so every entry gets the same short TTL.
+REVIEW_CACHE_TTL_SECONDS = float(os.environ.get('REVIEW_CACHE_TTL_SECONDS', '5'))
+REVIEW_CACHE_MAX_ENTRIES = int(os.environ.get('REVIEW_CACHE_MAX_ENTRIES', '256'))
+
+# Statuses that are never left; see REVIEW_STATUS_TRANSITIONS in review_repository
+FINAL_STATUSES = ('COMPLETED', 'FAILED')
+
+def is_final(review):
+    return review.get('status') in FINAL_STATUSES
+
+class ReviewCache:
+    """
+    Process-local read-through cache of the latest item of each review
+
+    Entries live for ttl. Writes through the ReviewRepository holding the
+    cache drop the entry at once, but those are only the writes of this
+    process; status and result writes happen in other functions and are
+    seen once the entry expires. The least recently used entry is evicted
+    beyond max_entries.
+    """
+
+    def __init__(self, ttl=REVIEW_CACHE_TTL_SECONDS, max_entries=REVIEW_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, review_id, loader):
+        """
+        Return (review, hit), calling loader(review_id) on a miss
+
+        Missing reviews are not cached, so a review is visible as soon as it
+        exists. Callers must not modify the returned item.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(review_id)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(review_id)
+                self.hits += 1
+                return entry[0], True
+            self.misses += 1
+
+        review = loader(review_id)
+        if review is not None:
+            self.put(review_id, review, now)
+        return review, False
+
+    def put(self, review_id, review, now=None):
+        if self.ttl <= 0:
+            return
+        expires_at = (now or time.monotonic()) + self.ttl
+        with self._lock:
+            self._entries[review_id] = (review, expires_at)
+            self._entries.move_to_end(review_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, review_id):
+        with self._lock:
+            self._entries.pop(review_id, None)
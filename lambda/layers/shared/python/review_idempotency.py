@@ -0,0 +1,74 @@
+import functools
+import os
+from aws_lambda_powertools.utilities.idempotency import (
+    DynamoDBPersistenceLayer, IdempotencyConfig, idempotent_function
+)
+from aws_clients import get_client
+
+IDEMPOTENCY_TABLE_NAME = os.environ.get('IDEMPOTENCY_TABLE_NAME')
+# How long a finished review execution suppresses redeliveries of the same payload
+REVIEW_IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('REVIEW_IDEMPOTENCY_TTL_SECONDS', '86400'))
+# How long an identical create request returns the review created first; 0 disables
+REVIEW_DEDUPE_WINDOW_SECONDS = int(os.environ.get('REVIEW_DEDUPE_WINDOW_SECONDS', '300'))
+
+_configs = []
+_persistence_layer = None
+
+def mark_duplicate(response, data_record):
+    """Flag responses replayed from the idempotency store"""
+    if isinstance(response, dict):
+        return {**response, 'duplicate': True}
+    return response
+
+def persistence_layer():
+    global _persistence_layer
+    if _persistence_layer is None:
+        _persistence_layer = DynamoDBPersistenceLayer(
+            table_name=IDEMPOTENCY_TABLE_NAME,
+            boto3_client=get_client('dynamodb')
+        )
+    return _persistence_layer
+
+def idempotent(key_prefix, event_key_jmespath='', expires_after_seconds=REVIEW_IDEMPOTENCY_TTL_SECONDS):
+    """
+    Make a function idempotent on its `request` keyword argument
+
+    The key is a hash of the selected part of request (all of it by default).
+    A repeat within expires_after_seconds returns the stored result with
+    'duplicate': True; a repeat while the first call is still running raises
+    IdempotencyAlreadyInProgressError. Without IDEMPOTENCY_TABLE_NAME, or with
+    no expiry, functions are returned unchanged. The DynamoDB client is only
+    created on the first call, keeping it out of the import.
+    """
+    if not IDEMPOTENCY_TABLE_NAME or not expires_after_seconds:
+        return lambda function: function
+
+    config = IdempotencyConfig(
+        event_key_jmespath=event_key_jmespath,
+        expires_after_seconds=expires_after_seconds,
+        raise_on_no_idempotency_key=True,
+        response_hook=mark_duplicate
+    )
+    _configs.append(config)
+
+    def decorator(function):
+        wrapped = None
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            nonlocal wrapped
+            if wrapped is None:
+                wrapped = idempotent_function(
+                    data_keyword_argument='request',
+                    persistence_store=persistence_layer(),
+                    config=config,
+                    key_prefix=key_prefix
+                )(function)
+            return wrapped(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def register_lambda_context(context):
+    """Let in-progress records expire with the invocation instead of the full TTL"""
+    for config in _configs:
+        config.register_lambda_context(context)
@@ -0,0 +1,410 @@
+import json
+import os
+import time
+from datetime import datetime
+from decimal import Decimal
+from botocore.exceptions import ClientError
+from aws_lambda_powertools import Logger
+from aws_clients import get_resource, get_table
+from review_results import RESULTS_INLINE_MAX_BYTES, results_size, summarize_results
+
+logger = Logger(child=True)
+
+# Statuses a review may move from; terminal statuses are never left. Only a
+# PENDING review can start, so a redelivered message cannot start a second run.
+REVIEW_STATUS_TRANSITIONS = {
+    'IN_PROGRESS': ('PENDING',),
+    'COMPLETED': ('PENDING', 'IN_PROGRESS'),
+    'FAILED': ('PENDING', 'IN_PROGRESS')
+}
+
+# TransactWriteItems limit per request
+TRANSACT_MAX_ITEMS = 100
+
+# Constant partition value of the creation-time index, so all reviews can be listed newest first
+REVIEW_RECORD_TYPE = 'REVIEW'
+
+# access pattern -> (index name, partition key attribute); every index sorts by createdAt
+LIST_INDEXES = {
+    'status': ('status-createdAt-index', 'status'),
+    'account': ('account-createdAt-index', 'awsAccountId'),
+    'recent': ('recordType-createdAt-index', 'recordType')
+}
+
+# Access patterns whose index is deployed; the stack adds them one per deploy, the others scan
+REVIEW_LIST_INDEXES = os.environ.get('REVIEW_LIST_INDEXES', ','.join(LIST_INDEXES)).split(',')
+
+# Attributes the list indexes project (see the stack); scanned pages are trimmed to match
+LIST_SUMMARY_ATTRIBUTES = (
+    'reviewId', 'timestamp', 'createdAt', 'recordType',
+    'status', 'awsAccountId', 'region', 'pillars', 'score', 'updatedAt', 'errorMessage'
+)
+
+def list_source(access_pattern):
+    """'index' or 'scan': how pages of access_pattern are read, which decides what their start keys look like"""
+    return 'index' if access_pattern in REVIEW_LIST_INDEXES else 'scan'
+
+def to_dynamodb(value):
+    """Convert JSON-like data for the DynamoDB resource layer, which rejects floats"""
+    return json.loads(json.dumps(value, default=str), parse_float=Decimal)
+
+class ReviewRepository:
+    """
+    Data access for review items keyed by (reviewId, timestamp)
+    
+    With a ReviewCache, writes made through this repository drop its cached
+    copy of the review; writes from other functions are not seen by it.
+    """
+    
+    def __init__(self, table_name, results_store=None, cache=None):
+        self.table_name = table_name
+        self.results_store = results_store
+        self.cache = cache
+        self._table = None
+    
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = get_table(self.table_name)
+        return self._table
+    
+    def invalidate(self, review_id):
+        if self.cache is not None:
+            self.cache.invalidate(review_id)
+    
+    def create(self, item):
+        self.table.put_item(Item={**item, 'recordType': REVIEW_RECORD_TYPE})
+        self.invalidate(item['reviewId'])
+    
+    def list(self, access_pattern, value, limit, start_key=None, include_results=False):
+        """
+        Page through reviews newest first via one of the LIST_INDEXES
+        
+        The indexes only project summary attributes; with include_results the
+        full items (findings, recommendations) are fetched from the table.
+        While the index of access_pattern is not deployed, the table is scanned
+        instead and pages are not ordered.
+        Returns (items, last_evaluated_key).
+        """
+        if list_source(access_pattern) == 'scan':
+            return self.scan_page(access_pattern, value, limit, start_key, include_results)
+        
+        index_name, partition_attribute = LIST_INDEXES[access_pattern]
+        query_kwargs = {
+            'IndexName': index_name,
+            'KeyConditionExpression': '#pk = :pk',
+            'ExpressionAttributeNames': {'#pk': partition_attribute},
+            'ExpressionAttributeValues': {':pk': value},
+            'ScanIndexForward': False,
+            'Limit': limit
+        }
+        if start_key:
+            query_kwargs['ExclusiveStartKey'] = start_key
+        
+        response = self.table.query(**query_kwargs)
+        items = response['Items']
+        
+        if include_results and items:
+            items = self.batch_get([{'reviewId': i['reviewId'], 'timestamp': i['timestamp']} for i in items])
+        
+        return items, response.get('LastEvaluatedKey')
+    
+    def scan_page(self, access_pattern, value, limit, start_key=None, include_results=False):
+        """
+        One page of list results from a table scan, for access patterns without their index
+        
+        Scanned items are full items; without include_results they are trimmed
+        to LIST_SUMMARY_ATTRIBUTES, like the index pages.
+        """
+        scan_kwargs = {'Limit': limit}
+        if access_pattern != 'recent':
+            # Every review is listed under 'recent', whether or not it has recordType yet
+            scan_kwargs['FilterExpression'] = '#pk = :pk'
+            scan_kwargs['ExpressionAttributeNames'] = {'#pk': LIST_INDEXES[access_pattern][1]}
+            scan_kwargs['ExpressionAttributeValues'] = {':pk': value}
+        if start_key:
+            scan_kwargs['ExclusiveStartKey'] = start_key
+        
+        response = self.table.scan(**scan_kwargs)
+        items = response['Items']
+        if not include_results:
+            items = [
+                {name: item[name] for name in LIST_SUMMARY_ATTRIBUTES if name in item}
+                for item in items
+            ]
+        return items, response.get('LastEvaluatedKey')
+    
+    def backfill_record_type(self, deadline=None):
+        """
+        Set recordType on reviews written before it existed, so the creation-time index lists them
+        
+        Stops once time.monotonic() passes deadline. Returns (reviews updated,
+        whether no review without recordType is left).
+        """
+        updated = 0
+        scan_kwargs = {
+            'FilterExpression': 'attribute_not_exists(recordType)',
+            'ProjectionExpression': 'reviewId, #timestamp',
+            'ExpressionAttributeNames': {'#timestamp': 'timestamp'}
+        }
+        while True:
+            response = self.table.scan(**scan_kwargs)
+            for item in response['Items']:
+                if deadline is not None and time.monotonic() > deadline:
+                    return updated, False
+                try:
+                    self.table.update_item(
+                        Key={'reviewId': item['reviewId'], 'timestamp': item['timestamp']},
+                        UpdateExpression='SET recordType = :recordType',
+                        ConditionExpression='attribute_exists(reviewId) AND attribute_not_exists(recordType)',
+                        ExpressionAttributeValues={':recordType': REVIEW_RECORD_TYPE}
+                    )
+                    updated += 1
+                except ClientError as e:
+                    # Deleted or already set since the scan read it
+                    if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                        raise
+            
+            if 'LastEvaluatedKey' not in response:
+                return updated, True
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    def batch_get(self, keys):
+        """Fetch full items for up to 100 keys, preserving the order of keys"""
+        found = {}
+        request = {self.table_name: {'Keys': keys}}
+        while request:
+            response = get_resource('dynamodb').batch_get_item(RequestItems=request)
+            for item in response['Responses'].get(self.table_name, []):
+                found[(item['reviewId'], item['timestamp'])] = item
+            request = response.get('UnprocessedKeys')
+        
+        return [found[(k['reviewId'], k['timestamp'])] for k in keys if (k['reviewId'], k['timestamp']) in found]
+    
+    def get_cached(self, review_id):
+        """Latest item of a review through the cache; returns (item or None, cache hit)"""
+        if self.cache is None:
+            return self.get_latest(review_id), False
+        return self.cache.get(review_id, self.get_latest)
+    
+    def get_latest(self, review_id):
+        """Latest item of a review, or None"""
+        response = self.table.query(
+            KeyConditionExpression='reviewId = :reviewId',
+            ExpressionAttributeValues={':reviewId': review_id},
+            ScanIndexForward=False,
+            Limit=1
+        )
+        return response['Items'][0] if response['Items'] else None
+    
+    def key(self, review_id, timestamp=None):
+        """Primary key of a review, querying for the latest item only when the sort key is unknown"""
+        if timestamp:
+            return {'reviewId': review_id, 'timestamp': timestamp}
+        
+        # Payloads queued before the sort key was carried along
+        item = self.get_latest(review_id)
+        if item is None:
+            return None
+        return {'reviewId': review_id, 'timestamp': item['timestamp']}
+    
+    def transition_update(self, key, status, attributes=None, remove=()):
+        """Parameters of the conditional update behind transition, shared with transactions"""
+        update_expression = "SET #status = :status, #updatedAt = :updatedAt"
+        expression_attribute_names = {
+            '#status': 'status',
+            '#updatedAt': 'updatedAt'
+        }
+        expression_attribute_values = {
+            ':status': status,
+            ':updatedAt': datetime.utcnow().isoformat()
+        }
+        
+        for name, value in (attributes or {}).items():
+            update_expression += f", #{name} = :{name}"
+            expression_attribute_names[f'#{name}'] = name
+            expression_attribute_values[f':{name}'] = value
+        
+        if remove:
+            update_expression += " REMOVE " + ", ".join(f"#{name}" for name in remove)
+            expression_attribute_names.update({f'#{name}': name for name in remove})
+        
+        placeholders = []
+        for i, previous in enumerate(REVIEW_STATUS_TRANSITIONS[status]):
+            placeholders.append(f':from{i}')
+            expression_attribute_values[f':from{i}'] = previous
+        
+        return {
+            'Key': key,
+            'UpdateExpression': update_expression,
+            'ConditionExpression': f"attribute_exists(reviewId) AND #status IN ({', '.join(placeholders)})",
+            'ExpressionAttributeNames': expression_attribute_names,
+            'ExpressionAttributeValues': expression_attribute_values
+        }
+    
+    def transition(self, key, status, attributes=None, remove=()):
+        """
+        Atomically set status (and extra attributes) if the transition moves forward
+        
+        Attributes named in remove are deleted in the same write.
+        Returns False when the review is missing or already in a later status.
+        """
+        try:
+            self.table.update_item(**self.transition_update(key, status, attributes, remove))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                logger.warning(f"Skipped {status} update for review {key['reviewId']}: missing or already past it")
+                return False
+            raise
+        finally:
+            # Also after errors: the write may have been applied before the failure surfaced
+            self.invalidate(key['reviewId'])
+        
+        return True
+    
+    def transition_many(self, keys, status):
+        """
+        Apply the same forward-only transition to many reviews with TransactWriteItems
+        
+        Returns one outcome per key, in order: True, False (missing, already past
+        the status, or a repeat of an earlier key) or the exception that prevented
+        the write. A transaction cancelled by failed conditions is retried without
+        those items, so one stale review does not hold back the others.
+        """
+        outcomes = [False] * len(keys)
+        pending = []
+        seen = set()
+        for index, key in enumerate(keys):
+            # A transaction may not touch the same item twice
+            if key is not None and (key['reviewId'], key['timestamp']) not in seen:
+                seen.add((key['reviewId'], key['timestamp']))
+                pending.append(index)
+        
+        for start in range(0, len(pending), TRANSACT_MAX_ITEMS):
+            chunk = pending[start:start + TRANSACT_MAX_ITEMS]
+            while chunk:
+                try:
+                    self.table.meta.client.transact_write_items(TransactItems=[
+                        {'Update': {**self.transition_update(keys[index], status), 'TableName': self.table_name}}
+                        for index in chunk
+                    ])
+                except ClientError as e:
+                    reasons = e.response.get('CancellationReasons')
+                    if e.response.get('Error', {}).get('Code') != 'TransactionCanceledException' or not reasons:
+                        for index in chunk:
+                            outcomes[index] = e
+                        break
+                    
+                    codes = [reason.get('Code', 'None') for reason in reasons]
+                    if any(code not in ('None', 'ConditionalCheckFailed') for code in codes):
+                        # Conflicts or throttling: settle each item on its own
+                        for index in chunk:
+                            try:
+                                outcomes[index] = self.transition(keys[index], status)
+                            except Exception as item_error:
+                                outcomes[index] = item_error
+                        break
+                    
+                    chunk = [index for index, code in zip(chunk, codes) if code == 'None']
+                    continue
+                
+                for index in chunk:
+                    outcomes[index] = True
+                break
+        
+        for index in pending:
+            self.invalidate(keys[index]['reviewId'])
+        return outcomes
+    
+    def update_status(self, review_id, status, error_message=None, timestamp=None):
+        """Move a review to status; returns False if the review is missing or already past it"""
+        key = self.key(review_id, timestamp)
+        if key is None:
+            logger.error(f"Review {review_id} not found for status update")
+            return False
+        
+        updated = self.transition(key, status, {'errorMessage': error_message} if error_message else None)
+        if updated:
+            logger.info(f"Updated review {review_id} status to {status}")
+        return updated
+    
+    def complete(self, review_id, findings, recommendations, score, timestamp=None):
+        """
+        Store results and mark the review COMPLETED
+        
+        Result sets above RESULTS_INLINE_MAX_BYTES are written to the results
+        store and only a summary and the object key are kept on the item, well
+        clear of the 400 KB item limit. Smaller ones stay inline.
+        """
+        key = self.key(review_id, timestamp)
+        if key is None:
+            logger.error(f"Review {review_id} not found when saving results")
+            return False
+        
+        attributes = summarize_results(findings, recommendations)
+        if score is not None:
+            attributes['score'] = Decimal(str(score))
+        if self.results_store and results_size(findings, recommendations) > RESULTS_INLINE_MAX_BYTES:
+            attributes['resultsKey'] = self.results_store.put(
+                review_id, key['timestamp'], findings, recommendations
+            )
+            # Drop the partial lists written while the review was streaming
+            return self.transition(key, 'COMPLETED', attributes, remove=('findings', 'recommendations'))
+        
+        attributes['findings'] = to_dynamodb(findings)
+        attributes['recommendations'] = to_dynamodb(recommendations)
+        return self.transition(key, 'COMPLETED', attributes)
+    
+    def append_results(self, key, findings, recommendations, inline=True):
+        """
+        Append a batch of partial results to an IN_PROGRESS review
+        
+        Counts are always incremented; with inline=False only the counts are
+        updated so a long-running review cannot outgrow the item size limit.
+        Returns False once the review has left IN_PROGRESS.
+        """
+        update_expression = "SET #updatedAt = :updatedAt"
+        expression_attribute_values = {
+            ':updatedAt': datetime.utcnow().isoformat(),
+            ':inProgress': 'IN_PROGRESS',
+            ':findingsCount': len(findings),
+            ':recommendationsCount': len(recommendations)
+        }
+        
+        if inline:
+            update_expression += (
+                ", #findings = list_append(if_not_exists(#findings, :empty), :findings)"
+                ", #recommendations = list_append(if_not_exists(#recommendations, :empty), :recommendations)"
+            )
+            expression_attribute_values[':empty'] = []
+            expression_attribute_values[':findings'] = to_dynamodb(findings)
+            expression_attribute_values[':recommendations'] = to_dynamodb(recommendations)
+        
+        update_expression += " ADD #findingsCount :findingsCount, #recommendationsCount :recommendationsCount"
+        expression_attribute_names = {
+            '#status': 'status',
+            '#updatedAt': 'updatedAt',
+            '#findingsCount': 'findingsCount',
+            '#recommendationsCount': 'recommendationsCount'
+        }
+        if inline:
+            expression_attribute_names['#findings'] = 'findings'
+            expression_attribute_names['#recommendations'] = 'recommendations'
+        
+        try:
+            self.table.update_item(
+                Key=key,
+                UpdateExpression=update_expression,
+                ConditionExpression="#status = :inProgress",
+                ExpressionAttributeNames=expression_attribute_names,
+                ExpressionAttributeValues=expression_attribute_values
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                logger.warning(f"Dropped partial results for review {key['reviewId']}: no longer IN_PROGRESS")
+                return False
+            raise
+        finally:
+            self.invalidate(key['reviewId'])
+        
+        return True
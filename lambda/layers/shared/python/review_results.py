@@ -0,0 +1,70 @@
+import gzip
+import json
+import os
+from collections import Counter
+from aws_clients import get_client
+
+REVIEW_RESULTS_BUCKET = os.environ.get('REVIEW_RESULTS_BUCKET')
+RESULTS_URL_EXPIRY_SECONDS = int(os.environ.get('RESULTS_URL_EXPIRY_SECONDS', '300'))
+# Result sets larger than this (serialized) are moved off the review item
+RESULTS_INLINE_MAX_BYTES = int(os.environ.get('RESULTS_INLINE_MAX_BYTES', str(64 * 1024)))
+
+def results_size(findings, recommendations):
+    """Approximate stored size of the result lists in bytes"""
+    return len(json.dumps([findings, recommendations], default=str, separators=(',', ':')))
+
+def summarize_results(findings, recommendations):
+    """Small summary kept on the review item in place of the full result lists"""
+    return {
+        'findingsCount': len(findings),
+        'recommendationsCount': len(recommendations),
+        'findingsBySeverity': dict(Counter(f.get('severity', 'UNKNOWN') for f in findings)),
+        'findingsByPillar': dict(Counter(f.get('pillar', 'Unknown') for f in findings))
+    }
+
+class ReviewResultsStore:
+    """Gzip-compressed findings and recommendations stored in S3, one object per review"""
+    
+    def __init__(self, bucket_name=REVIEW_RESULTS_BUCKET, s3_client=None):
+        self.bucket_name = bucket_name
+        self._s3 = s3_client
+    
+    @property
+    def s3(self):
+        if self._s3 is None:
+            self._s3 = get_client('s3')
+        return self._s3
+    
+    @staticmethod
+    def object_key(review_id, timestamp):
+        return f"reviews/{review_id}/{timestamp}/results.json.gz"
+    
+    def put(self, review_id, timestamp, findings, recommendations):
+        """Store the result lists and return the object key"""
+        key = self.object_key(review_id, timestamp)
+        body = json.dumps({'findings': findings, 'recommendations': recommendations}, default=str)
+        self.s3.put_object(
+            Bucket=self.bucket_name,
+            Key=key,
+            Body=gzip.compress(body.encode('utf-8')),
+            ContentType='application/json',
+            ContentEncoding='gzip'
+        )
+        return key
+    
+    def get(self, key):
+        """Return the stored {'findings': [...], 'recommendations': [...]}"""
+        response = self.s3.get_object(Bucket=self.bucket_name, Key=key)
+        return json.loads(gzip.decompress(response['Body'].read()).decode('utf-8'))
+    
+    def presigned_url(self, key, expires_in=RESULTS_URL_EXPIRY_SECONDS):
+        """Time-limited URL the client can stream the results from directly"""
+        return self.s3.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket_name, 'Key': key},
+            ExpiresIn=expires_in
+        )
+
+def create_results_store():
+    """The configured results store, or None to keep results inline on the item"""
+    return ReviewResultsStore() if REVIEW_RESULTS_BUCKET else None
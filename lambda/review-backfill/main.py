@@ -0,0 +1,33 @@
+import os
+import time
+from aws_lambda_powertools import Logger
+from review_repository import ReviewRepository
+
+logger = Logger()
+
+TABLE_NAME = os.environ['DYNAMODB_TABLE_NAME']
+# Time left for the last update and the response when a backfill pass stops
+BACKFILL_MARGIN_SECONDS = int(os.environ.get('BACKFILL_MARGIN_SECONDS', '60'))
+
+reviews = ReviewRepository(TABLE_NAME)
+
+@logger.inject_lambda_context
+def on_event(event, context):
+    """
+    Custom resource request handler of the recordType backfill
+    
+    The work happens in is_complete, which the provider polls until it is done.
+    """
+    logger.info(f"Received {event['RequestType']} request")
+    return {'PhysicalResourceId': event.get('PhysicalResourceId') or f"{TABLE_NAME}-record-type-backfill"}
+
+@logger.inject_lambda_context
+def is_complete(event, context):
+    """Backfill recordType until the invocation's time runs short; complete when no review lacks it"""
+    if event['RequestType'] == 'Delete':
+        return {'IsComplete': True}
+    
+    deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000 - BACKFILL_MARGIN_SECONDS
+    updated, done = reviews.backfill_record_type(deadline)
+    logger.info(f"Set recordType on {updated} reviews; {'done' if done else 'more remaining'}")
+    return {'IsComplete': done}
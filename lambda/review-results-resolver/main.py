@@ -0,0 +1,27 @@
+import os
+from functools import lru_cache
+from aws_lambda_powertools import Logger
+from review_results import ReviewResultsStore
+
+logger = Logger()
+
+# Result objects are written once per review, so warm containers keep the most recent ones
+RESULTS_CACHE_SIZE = int(os.environ.get('RESULTS_CACHE_SIZE', '16'))
+
+results_store = ReviewResultsStore()
+
+@lru_cache(maxsize=RESULTS_CACHE_SIZE)
+def load_results(results_key):
+    return results_store.get(results_key)
+
+@logger.inject_lambda_context
+def handler(event, context):
+    """
+    AppSync resolver for Review.findings and Review.recommendations moved to the results bucket
+    
+    Invoked only for reviews whose item carries resultsKey; the others are
+    answered from the item by the request mapping template.
+    """
+    field = event['field']
+    logger.info(f"Loading {field} from {event['resultsKey']}")
+    return load_results(event['resultsKey'])[field]
@@ -3,16 +3,24 @@ import { Construct } from 'constructs';
 import * as lambda from 'aws-cdk-lib/aws-lambda';
 import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
 import * as iam from 'aws-cdk-lib/aws-iam';
+import * as appsync from 'aws-cdk-lib/aws-appsync';
 import { bedrock } from '@cdklabs/generative-ai-cdk-constructs';
 
 export interface AiAgentConstructProps {
   dynamodbTable: dynamodb.Table;
+  sharedLayer: lambda.ILayerVersion;
+  reviewResultsBucket: cdk.aws_s3.IBucket;
+  appSyncApi: appsync.GraphqlApi;
+  idempotencyTable: dynamodb.ITable;
 }
 
 export class AiAgentConstruct extends Construct {
   public readonly agentFunction: lambda.Function;
+  // Published version with SnapStart; invoke this rather than $LATEST
+  public readonly agentAlias: lambda.Alias;
   public readonly bedrockAgent: bedrock.Agent;
   public readonly knowledgeBase: bedrock.VectorKnowledgeBase;
+  public readonly bedrockModelId = 'us.anthropic.claude-3-7-sonnet-20250219-v1:0';
 
   constructor(scope: Construct, id: string, props: AiAgentConstructProps) {
     super(scope, id);
@@ -30,6 +38,17 @@ export class AiAgentConstruct extends Construct {
       autoDeleteObjects: true
     });
 
+    const inventoryCacheBucket = new cdk.aws_s3.Bucket(this, 'InventoryCacheBucket', {
+      blockPublicAccess: cdk.aws_s3.BlockPublicAccess.BLOCK_ALL,
+      encryption: cdk.aws_s3.BucketEncryption.S3_MANAGED,
+      enforceSSL: true,
+      lifecycleRules: [{
+        expiration: cdk.Duration.days(1)
+      }],
+      removalPolicy: cdk.RemovalPolicy.DESTROY,
+      autoDeleteObjects: true
+    });
+
     // Knowledge Base creation will be done manually or in a separate stack
     // due to Docker dependency in CDK synthesis
     this.knowledgeBase = undefined as any;
@@ -38,7 +57,35 @@ export class AiAgentConstruct extends Construct {
       DYNAMODB_TABLE_NAME: props.dynamodbTable.tableName,
       KNOWLEDGE_BASE_ID: 'manual-kb-id', // Will be set manually
       REGION: cdk.Stack.of(this).region,
-      BEDROCK_MODEL_ID: 'us.anthropic.claude-3-7-sonnet-20250219-v1:0'
+      AWS_MAX_POOL_CONNECTIONS: '32',
+      REVIEW_RESULTS_BUCKET: props.reviewResultsBucket.bucketName,
+      APPSYNC_API_URL: props.appSyncApi.graphqlUrl,
+      APPSYNC_MIN_INTERVAL_SECONDS: '2',
+      BEDROCK_MODEL_ID: this.bedrockModelId,
+      ANALYZER_MAX_WORKERS: '6',
+      ANALYZER_SERVICE_TIMEOUT: '120',
+      S3_PROBE_WORKERS: '16',
+      INVENTORY_CACHE_BUCKET: inventoryCacheBucket.bucketName,
+      DIGEST_TOKEN_BUDGET: '4000',
+      DIGEST_MAX_EXAMPLES: '5',
+      REVIEW_FANOUT: 'true',
+      FANOUT_MAX_CONCURRENCY: '4',
+      SWEEP_ROLE_NAME: 'WellArchitectedReviewRole',
+      SWEEP_MAX_WORKERS: '16',
+      SWEEP_ACCOUNT_RATE: '10',
+      SWEEP_ACCOUNT_BURST: '20',
+      SWEEP_ACCOUNT_CONCURRENCY: '3',
+      SWEEP_GLOBAL_SERVICES: 's3,iam',
+      IDEMPOTENCY_TABLE_NAME: props.idempotencyTable.tableName,
+      REVIEW_IDEMPOTENCY_TTL_SECONDS: '86400',
+      CHECKPOINT_MARGIN_SECONDS: '90',
+      CHECKPOINT_MAX_CONTINUATIONS: '4',
+      AGENT_PRIME_ON_INIT: 'false',
+      BEDROCK_PROMPT_CACHE: 'true',
+      REVIEW_INCREMENTAL: 'true',
+      BASELINE_MAX_AGE_SECONDS: '604800',
+      AGENT_TOOL_MEMO: 'true',
+      INVENTORY_COLUMNAR: 'true'
     };
 
     this.agentFunction = new lambda.Function(this, 'StrandsAgentFunction', {
@@ -52,8 +99,11 @@ export class AiAgentConstruct extends Construct {
       architecture: lambda.Architecture.ARM_64,
       tracing: lambda.Tracing.ACTIVE,
       logRetention: cdk.aws_logs.RetentionDays.ONE_WEEK,
+      // Restores a snapshot taken after strands and the AWS clients are primed
+      snapStart: lambda.SnapStartConf.ON_PUBLISHED_VERSIONS,
       // Reserved concurrency removed to avoid account limits in demo environment
       layers: [
+        props.sharedLayer,
         new lambda.LayerVersion(this, 'StrandsAgentsLayer', {
           layerVersionName: 'strands-agents-layer',
           code: lambda.Code.fromAsset('lambda/layers/strands-agents'),
@@ -64,7 +114,16 @@ export class AiAgentConstruct extends Construct {
       ]
     });
 
+    this.agentAlias = new lambda.Alias(this, 'StrandsAgentAlias', {
+      aliasName: 'live',
+      version: this.agentFunction.currentVersion
+    });
+
     props.dynamodbTable.grantReadWriteData(this.agentFunction);
+    inventoryCacheBucket.grantReadWrite(this.agentFunction);
+    props.reviewResultsBucket.grantReadWrite(this.agentFunction);
+    props.appSyncApi.grantMutation(this.agentFunction);
+    props.idempotencyTable.grantReadWriteData(this.agentFunction);
 
     this.agentFunction.addToRolePolicy(new iam.PolicyStatement({
       effect: iam.Effect.ALLOW,
@@ -112,6 +171,9 @@ export class AiAgentConstruct extends Construct {
         's3:GetBucketPolicy',
         's3:GetBucketEncryption',
         's3:GetBucketVersioning',
+        's3:GetBucketPublicAccessBlock',
+        's3:GetLifecycleConfiguration',
+        's3:GetBucketLogging',
         'rds:DescribeDBInstances',
         'rds:DescribeDBClusters',
         'lambda:ListFunctions',
@@ -122,6 +184,32 @@ export class AiAgentConstruct extends Construct {
       resources: ['*']
     }));
 
+    // Reviews near the timeout checkpoint and invoke a continuation of themselves,
+    // through the alias they were invoked with. The ARN is built from the fixed
+    // name to avoid a dependency cycle with the role.
+    const agentFunctionArn = `arn:aws:lambda:${cdk.Stack.of(this).region}:${cdk.Stack.of(this).account}:function:strands-agents-well-architected-agent`;
+    this.agentFunction.addToRolePolicy(new iam.PolicyStatement({
+      effect: iam.Effect.ALLOW,
+      actions: ['lambda:InvokeFunction'],
+      resources: [agentFunctionArn, `${agentFunctionArn}:*`]
+    }));
+
+    // Organization sweeps assume the review role in each member account
+    this.agentFunction.addToRolePolicy(new iam.PolicyStatement({
+      effect: iam.Effect.ALLOW,
+      actions: ['sts:AssumeRole'],
+      resources: ['arn:aws:iam::*:role/WellArchitectedReviewRole']
+    }));
+
+    this.agentFunction.addToRolePolicy(new iam.PolicyStatement({
+      effect: iam.Effect.ALLOW,
+      actions: [
+        'organizations:ListAccounts',
+        'ec2:DescribeRegions'
+      ],
+      resources: ['*']
+    }));
+
     this.agentFunction.addToRolePolicy(new iam.PolicyStatement({
       effect: iam.Effect.ALLOW,
       actions: [
@@ -3,9 +3,16 @@ import { Construct } from 'constructs';
 import * as appsync from 'aws-cdk-lib/aws-appsync';
 import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
 import * as iam from 'aws-cdk-lib/aws-iam';
+import * as lambda from 'aws-cdk-lib/aws-lambda';
+import { NagSuppressions } from 'cdk-nag';
 
 export interface AppSyncConstructProps {
   dynamodbTable: dynamodb.Table;
+  // List access patterns whose index is deployed; the others fall back to a scan
+  listAccessPatterns: string[];
+  // Large findings/recommendations sets offloaded from review items
+  reviewResultsBucket: cdk.aws_s3.IBucket;
+  sharedLayer: lambda.ILayerVersion;
 }
 
 export class AppSyncConstruct extends Construct {
@@ -21,7 +28,7 @@ export class AppSyncConstruct extends Construct {
         reviewId: String!
         timestamp: String!
         status: ReviewStatus!
-        awsAccountId: String!
+        awsAccountId: String
         region: String!
         pillar: String
         findings: [Finding]
@@ -132,7 +139,11 @@ export class AppSyncConstruct extends Construct {
             description: 'Frontend API Key',
             expires: cdk.Expiration.after(cdk.Duration.days(365))
           }
-        }
+        },
+        // Backend Lambdas publish review updates with IAM-signed mutations
+        additionalAuthorizationModes: [{
+          authorizationType: appsync.AuthorizationType.IAM
+        }]
       },
       logConfig: {
         fieldLogLevel: appsync.FieldLogLevel.ALL,
@@ -158,7 +169,22 @@ export class AppSyncConstruct extends Construct {
     this.dataSource.createResolver('ListReviewsResolver', {
       typeName: 'Query',
       fieldName: 'listReviews',
-      requestMappingTemplate: appsync.MappingTemplate.fromString(`
+      requestMappingTemplate: appsync.MappingTemplate.fromString(props.listAccessPatterns.includes('recent') ? `
+        {
+          "version": "2017-02-28",
+          "operation": "Query",
+          "index": "recordType-createdAt-index",
+          "query": {
+            "expression": "recordType = :recordType",
+            "expressionValues": {
+              ":recordType": $util.dynamodb.toDynamoDBJson("REVIEW")
+            }
+          },
+          "scanIndexForward": false,
+          "limit": $util.defaultIfNull($context.arguments.limit, 20),
+          "nextToken": $util.toJson($util.defaultIfNullOrBlank($context.arguments.nextToken, null))
+        }
+      ` : `
         {
           "version": "2017-02-28",
           "operation": "Scan",
@@ -174,6 +200,52 @@ export class AppSyncConstruct extends Construct {
       `)
     });
 
+    this.dataSource.createResolver('GetReviewsByStatusResolver', {
+      typeName: 'Query',
+      fieldName: 'getReviewsByStatus',
+      requestMappingTemplate: appsync.MappingTemplate.fromString(props.listAccessPatterns.includes('status') ? `
+        {
+          "version": "2017-02-28",
+          "operation": "Query",
+          "index": "status-createdAt-index",
+          "query": {
+            "expression": "#status = :status",
+            "expressionNames": {
+              "#status": "status"
+            },
+            "expressionValues": {
+              ":status": $util.dynamodb.toDynamoDBJson($context.arguments.status)
+            }
+          },
+          "scanIndexForward": false,
+          "limit": $util.defaultIfNull($context.arguments.limit, 20),
+          "nextToken": $util.toJson($util.defaultIfNullOrBlank($context.arguments.nextToken, null))
+        }
+      ` : `
+        {
+          "version": "2017-02-28",
+          "operation": "Scan",
+          "filter": {
+            "expression": "#status = :status",
+            "expressionNames": {
+              "#status": "status"
+            },
+            "expressionValues": {
+              ":status": $util.dynamodb.toDynamoDBJson($context.arguments.status)
+            }
+          },
+          "limit": $util.defaultIfNull($context.arguments.limit, 20),
+          "nextToken": $util.toJson($util.defaultIfNullOrBlank($context.arguments.nextToken, null))
+        }
+      `),
+      responseMappingTemplate: appsync.MappingTemplate.fromString(`
+        {
+          "items": $util.toJson($context.result.items),
+          "nextToken": $util.toJson($util.defaultIfNullOrBlank($context.result.nextToken, null))
+        }
+      `)
+    });
+
     this.dataSource.createResolver('UpdateReviewResolver', {
       typeName: 'Mutation',
       fieldName: 'updateReview',
@@ -183,7 +255,7 @@ export class AppSyncConstruct extends Construct {
           "operation": "UpdateItem",
           "key": {
             "reviewId": $util.dynamodb.toDynamoDBJson($context.arguments.input.reviewId),
-            "timestamp": $util.dynamodb.toDynamoDBJson($context.stash.timestamp)
+            "timestamp": $util.dynamodb.toDynamoDBJson($util.defaultIfNull($context.arguments.input.timestamp, $context.stash.timestamp))
           },
           "update": {
             "expression": "SET #updatedAt = :updatedAt",
@@ -208,7 +280,7 @@ export class AppSyncConstruct extends Construct {
           "operation": "UpdateItem",
           "key": {
             "reviewId": $util.dynamodb.toDynamoDBJson($context.arguments.reviewId),
-            "timestamp": $util.dynamodb.toDynamoDBJson($context.stash.timestamp)
+            "timestamp": $util.dynamodb.toDynamoDBJson($util.defaultIfNull($context.arguments.timestamp, $context.stash.timestamp))
           },
           "update": {
             "expression": "SET #status = :status, #updatedAt = :updatedAt",
@@ -226,6 +298,63 @@ export class AppSyncConstruct extends Construct {
       responseMappingTemplate: appsync.MappingTemplate.dynamoDbResultItem()
     });
 
-    // API Key authentication - no IAM grants needed
+    // Offloaded results are read back from S3, so every Review query and
+    // subscription returns the full lists whether or not they were moved off the item
+    const resultsFunction = new lambda.Function(this, 'ReviewResultsResolverFunction', {
+      runtime: lambda.Runtime.PYTHON_3_12,
+      code: lambda.Code.fromAsset('lambda/review-results-resolver'),
+      handler: 'main.handler',
+      timeout: cdk.Duration.seconds(10),
+      environment: {
+        REVIEW_RESULTS_BUCKET: props.reviewResultsBucket.bucketName,
+        RESULTS_CACHE_SIZE: '16'
+      },
+      memorySize: 256,
+      architecture: lambda.Architecture.ARM_64,
+      tracing: lambda.Tracing.ACTIVE,
+      layers: [props.sharedLayer],
+      logRetention: cdk.aws_logs.RetentionDays.ONE_WEEK
+    });
+    props.reviewResultsBucket.grantRead(resultsFunction);
+
+    const resultsDataSource = this.api.addLambdaDataSource('ReviewResultsDataSource', resultsFunction, {
+      description: 'Findings and recommendations offloaded to the results bucket'
+    });
+
+    for (const fieldName of ['findings', 'recommendations']) {
+      resultsDataSource.createResolver(`Review${fieldName.charAt(0).toUpperCase()}${fieldName.slice(1)}Resolver`, {
+        typeName: 'Review',
+        fieldName: fieldName,
+        // Inline results are returned from the item without invoking the function
+        requestMappingTemplate: appsync.MappingTemplate.fromString(`
+          #if($util.isNullOrBlank($context.source.resultsKey))
+            #return($context.source.${fieldName})
+          #end
+          {
+            "version": "2018-05-29",
+            "operation": "Invoke",
+            "payload": {
+              "resultsKey": $util.toJson($context.source.resultsKey),
+              "field": "${fieldName}"
+            }
+          }
+        `),
+        responseMappingTemplate: appsync.MappingTemplate.fromString(`
+          #if($context.error)
+            $util.error($context.error.message, $context.error.type)
+          #end
+          $util.toJson($context.result)
+        `)
+      });
+    }
+
+    NagSuppressions.addResourceSuppressions([resultsFunction, resultsDataSource], [
+      {
+        id: 'AwsSolutions-IAM5',
+        reason: 'Reads result objects keyed per review under the results bucket and invokes the resolver function versions'
+      }
+    ], true);
+
+    // Frontend uses the API key; backend functions are granted IAM access to mutations
   }
 }
\ No newline at end of file
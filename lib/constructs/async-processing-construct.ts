@@ -5,11 +5,16 @@ import * as lambda from 'aws-cdk-lib/aws-lambda';
 import * as sqs from 'aws-cdk-lib/aws-sqs';
 import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
 import * as iam from 'aws-cdk-lib/aws-iam';
+import * as appsync from 'aws-cdk-lib/aws-appsync';
 
 export interface AsyncProcessingConstructProps {
   sqsQueue: sqs.Queue;
   dynamodbTable: dynamodb.Table;
-  aiAgentFunction: lambda.Function;
+  aiAgentFunction: lambda.IFunction;
+  sharedLayer: lambda.ILayerVersion;
+  admissionTable: dynamodb.ITable;
+  bedrockModelId: string;
+  appSyncApi: appsync.GraphqlApi;
 }
 
 export class AsyncProcessingConstruct extends Construct {
@@ -21,7 +26,14 @@ export class AsyncProcessingConstruct extends Construct {
     const environment = {
       DYNAMODB_TABLE_NAME: props.dynamodbTable.tableName,
       AI_AGENT_FUNCTION_NAME: props.aiAgentFunction.functionName,
-      REGION: cdk.Stack.of(this).region
+      REGION: cdk.Stack.of(this).region,
+      DISPATCH_MAX_WORKERS: '10',
+      BEDROCK_MODEL_ID: props.bedrockModelId,
+      ADMISSION_TABLE_NAME: props.admissionTable.tableName,
+      ADMISSION_TOKENS_PER_MINUTE: '200000',
+      ADMISSION_TOKENS_PER_PILLAR: '25000',
+      APPSYNC_API_URL: props.appSyncApi.graphqlUrl,
+      APPSYNC_BATCH_SIZE: '10'
     };
 
     const sqsToLambda = new sqs_lambda.SqsToLambda(this, 'SqsToLambda', {
@@ -36,10 +48,11 @@ export class AsyncProcessingConstruct extends Construct {
         memorySize: 512,
         architecture: lambda.Architecture.ARM_64,
         tracing: lambda.Tracing.ACTIVE,
+        layers: [props.sharedLayer],
         // Reserved concurrency removed to avoid account limits in demo environment
       },
       sqsEventSourceProps: {
-        batchSize: 1,
+        batchSize: 50,
         maxBatchingWindow: cdk.Duration.seconds(5),
         reportBatchItemFailures: true
       }
@@ -48,6 +61,11 @@ export class AsyncProcessingConstruct extends Construct {
     this.processingFunction = sqsToLambda.lambdaFunction;
 
     props.dynamodbTable.grantReadWriteData(this.processingFunction);
+    props.admissionTable.grantReadWriteData(this.processingFunction);
+    // Reviews held back by admission control are re-queued with a delay
+    props.sqsQueue.grantSendMessages(this.processingFunction);
+    // Started and failed reviews are pushed to onReviewUpdated subscribers
+    props.appSyncApi.grantMutation(this.processingFunction);
 
     this.processingFunction.addToRolePolicy(new iam.PolicyStatement({
       effect: iam.Effect.ALLOW,
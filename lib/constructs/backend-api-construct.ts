@@ -12,6 +12,11 @@ export interface BackendApiConstructProps {
   sqsQueue: sqs.Queue;
   dynamodbTable: dynamodb.Table;
   cloudFrontDistribution: cloudfront.Distribution;
+  sharedLayer: lambda.ILayerVersion;
+  reviewResultsBucket: cdk.aws_s3.IBucket;
+  idempotencyTable: dynamodb.ITable;
+  // List access patterns whose index is deployed; the others fall back to a scan
+  listAccessPatterns: string[];
 }
 
 export class BackendApiConstruct extends Construct {
@@ -21,10 +26,24 @@ export class BackendApiConstruct extends Construct {
   constructor(scope: Construct, id: string, props: BackendApiConstructProps) {
     super(scope, id);
 
+    const cursorSigningSecret = new cdk.aws_secretsmanager.Secret(this, 'CursorSigningSecret', {
+      description: 'HMAC key for list pagination cursors',
+      generateSecretString: {
+        passwordLength: 64,
+        excludePunctuation: true
+      }
+    });
+
     const environment = {
       SQS_QUEUE_URL: props.sqsQueue.queueUrl,
       DYNAMODB_TABLE_NAME: props.dynamodbTable.tableName,
-      REGION: cdk.Stack.of(this).region
+      REGION: cdk.Stack.of(this).region,
+      CURSOR_SECRET_ARN: cursorSigningSecret.secretArn,
+      REVIEW_RESULTS_BUCKET: props.reviewResultsBucket.bucketName,
+      IDEMPOTENCY_TABLE_NAME: props.idempotencyTable.tableName,
+      REVIEW_DEDUPE_WINDOW_SECONDS: '300',
+      REVIEW_CACHE_TTL_SECONDS: '5',
+      REVIEW_LIST_INDEXES: props.listAccessPatterns.join(',')
     };
 
     const apiGatewayToLambda = new apigateway_lambda.ApiGatewayToLambda(this, 'ApiGatewayToLambda', {
@@ -39,6 +58,7 @@ export class BackendApiConstruct extends Construct {
         architecture: lambda.Architecture.ARM_64,
         deadLetterQueueEnabled: true,
         tracing: lambda.Tracing.ACTIVE,
+        layers: [props.sharedLayer],
         logRetention: cdk.aws_logs.RetentionDays.ONE_WEEK
       },
       apiGatewayProps: {
@@ -51,7 +71,7 @@ export class BackendApiConstruct extends Construct {
             'http://localhost:3000'
           ],
           allowMethods: ['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
-          allowHeaders: ['Content-Type', 'Authorization', 'X-Amz-Date', 'X-Api-Key', 'X-Amz-Security-Token']
+          allowHeaders: ['Content-Type', 'Authorization', 'X-Amz-Date', 'X-Api-Key', 'X-Amz-Security-Token', 'If-None-Match']
         },
         deploy: true,
         deployOptions: {
@@ -76,6 +96,9 @@ export class BackendApiConstruct extends Construct {
 
     props.sqsQueue.grantSendMessages(this.lambda);
     props.dynamodbTable.grantReadWriteData(this.lambda);
+    cursorSigningSecret.grantRead(this.lambda);
+    props.reviewResultsBucket.grantRead(this.lambda);
+    props.idempotencyTable.grantReadWriteData(this.lambda);
 
     this.lambda.addToRolePolicy(new iam.PolicyStatement({
       effect: iam.Effect.ALLOW,
@@ -0,0 +1,69 @@
+import * as cdk from 'aws-cdk-lib';
+import { Construct } from 'constructs';
+import * as lambda from 'aws-cdk-lib/aws-lambda';
+import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
+import * as cr from 'aws-cdk-lib/custom-resources';
+import { NagSuppressions } from 'cdk-nag';
+
+export interface ReviewBackfillConstructProps {
+  dynamodbTable: dynamodb.Table;
+  sharedLayer: lambda.ILayerVersion;
+}
+
+export class ReviewBackfillConstruct extends Construct {
+  public readonly backfill: cdk.CustomResource;
+
+  constructor(scope: Construct, id: string, props: ReviewBackfillConstructProps) {
+    super(scope, id);
+
+    const functionProps = {
+      runtime: lambda.Runtime.PYTHON_3_12,
+      code: lambda.Code.fromAsset('lambda/review-backfill'),
+      timeout: cdk.Duration.minutes(15),
+      environment: {
+        DYNAMODB_TABLE_NAME: props.dynamodbTable.tableName,
+        REGION: cdk.Stack.of(this).region
+      },
+      memorySize: 256,
+      architecture: lambda.Architecture.ARM_64,
+      tracing: lambda.Tracing.ACTIVE,
+      layers: [props.sharedLayer],
+      logRetention: cdk.aws_logs.RetentionDays.ONE_WEEK
+    };
+
+    const onEventFunction = new lambda.Function(this, 'OnEventFunction', {
+      ...functionProps,
+      handler: 'main.on_event'
+    });
+
+    // Polled by the provider until every review carries recordType
+    const isCompleteFunction = new lambda.Function(this, 'IsCompleteFunction', {
+      ...functionProps,
+      handler: 'main.is_complete'
+    });
+    props.dynamodbTable.grantReadWriteData(isCompleteFunction);
+
+    const provider = new cr.Provider(this, 'Provider', {
+      onEventHandler: onEventFunction,
+      isCompleteHandler: isCompleteFunction,
+      queryInterval: cdk.Duration.seconds(30),
+      totalTimeout: cdk.Duration.hours(2)
+    });
+
+    // Runs on creation; bump Version to backfill again
+    this.backfill = new cdk.CustomResource(this, 'RecordTypeBackfill', {
+      serviceToken: provider.serviceToken,
+      properties: {
+        TableName: props.dynamodbTable.tableName,
+        Version: '1'
+      }
+    });
+
+    NagSuppressions.addResourceSuppressions(this, [
+      {
+        id: 'AwsSolutions-IAM5',
+        reason: 'Table index access granted by grantReadWriteData and provider framework invoke permissions use wildcards'
+      }
+    ], true);
+  }
+}
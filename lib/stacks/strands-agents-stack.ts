@@ -6,6 +6,7 @@ import { BackendApiConstruct } from '../constructs/backend-api-construct';
 import { AsyncProcessingConstruct } from '../constructs/async-processing-construct';
 import { AiAgentConstruct } from '../constructs/ai-agent-construct';
 import { AppSyncConstruct } from '../constructs/appsync-construct';
+import { ReviewBackfillConstruct } from '../constructs/review-backfill-construct';
 
 export class StrandsAgentsWellArchitectedStack extends cdk.Stack {
   constructor(scope: Construct, id: string, props?: cdk.StackProps) {
@@ -23,6 +24,55 @@ export class StrandsAgentsWellArchitectedStack extends cdk.Stack {
       removalPolicy: cdk.RemovalPolicy.DESTROY
     });
 
+    // List access patterns, newest first. Only summary attributes are projected
+    // so list views never read findings/recommendations.
+    // DynamoDB adds one GSI per table update, so a stack deployed before these
+    // indexes is upgraded in steps: cdk deploy -c reviewListIndexes=1, then 2,
+    // then 3 (the default). Access patterns whose index is not deployed yet
+    // fall back to a scan.
+    const reviewSummaryAttributes = ['status', 'awsAccountId', 'region', 'pillars', 'score', 'updatedAt', 'errorMessage'];
+    const reviewListIndexes: [string, string, string][] = [
+      ['recent', 'recordType-createdAt-index', 'recordType'],
+      ['status', 'status-createdAt-index', 'status'],
+      ['account', 'account-createdAt-index', 'awsAccountId']
+    ];
+    const deployedListIndexes = reviewListIndexes.slice(
+      0, Number(this.node.tryGetContext('reviewListIndexes') ?? reviewListIndexes.length)
+    );
+    for (const [, indexName, partitionKey] of deployedListIndexes) {
+      dynamodbTable.addGlobalSecondaryIndex({
+        indexName: indexName,
+        partitionKey: { name: partitionKey, type: cdk.aws_dynamodb.AttributeType.STRING },
+        sortKey: { name: 'createdAt', type: cdk.aws_dynamodb.AttributeType.STRING },
+        projectionType: cdk.aws_dynamodb.ProjectionType.INCLUDE,
+        nonKeyAttributes: reviewSummaryAttributes.filter(attribute => attribute !== partitionKey)
+      });
+    }
+    const listAccessPatterns = deployedListIndexes.map(([accessPattern]) => accessPattern);
+
+    // Powertools idempotency records: duplicate review deliveries and create requests
+    const idempotencyTable = new cdk.aws_dynamodb.Table(this, 'IdempotencyTable', {
+      partitionKey: { name: 'id', type: cdk.aws_dynamodb.AttributeType.STRING },
+      billingMode: cdk.aws_dynamodb.BillingMode.PAY_PER_REQUEST,
+      encryption: cdk.aws_dynamodb.TableEncryption.AWS_MANAGED,
+      timeToLiveAttribute: 'expiration',
+      pointInTimeRecoverySpecification: {
+        pointInTimeRecoveryEnabled: true
+      },
+      removalPolicy: cdk.RemovalPolicy.DESTROY
+    });
+
+    // Token buckets that gate how much Bedrock-bound review work starts per model
+    const admissionTable = new cdk.aws_dynamodb.Table(this, 'AdmissionTable', {
+      partitionKey: { name: 'bucket', type: cdk.aws_dynamodb.AttributeType.STRING },
+      billingMode: cdk.aws_dynamodb.BillingMode.PAY_PER_REQUEST,
+      encryption: cdk.aws_dynamodb.TableEncryption.AWS_MANAGED,
+      pointInTimeRecoverySpecification: {
+        pointInTimeRecoveryEnabled: true
+      },
+      removalPolicy: cdk.RemovalPolicy.DESTROY
+    });
+
     // Dead Letter Queue with HTTPS enforcement
     const dlq = new cdk.aws_sqs.Queue(this, 'ReviewProcessingDLQ', {
       queueName: 'well-architected-review-dlq',
@@ -69,26 +119,69 @@ export class StrandsAgentsWellArchitectedStack extends cdk.Stack {
       }
     }));
 
+    // Large findings/recommendations sets, offloaded from the review items
+    const reviewResultsBucket = new cdk.aws_s3.Bucket(this, 'ReviewResultsBucket', {
+      blockPublicAccess: cdk.aws_s3.BlockPublicAccess.BLOCK_ALL,
+      encryption: cdk.aws_s3.BucketEncryption.S3_MANAGED,
+      enforceSSL: true,
+      removalPolicy: cdk.RemovalPolicy.DESTROY,
+      autoDeleteObjects: true
+    });
+
+    // Shared boto3 client configuration and review data access for all Lambdas
+    const sharedLayer = new cdk.aws_lambda.LayerVersion(this, 'SharedLayer', {
+      layerVersionName: 'strands-agents-shared',
+      code: cdk.aws_lambda.Code.fromAsset('lambda/layers/shared'),
+      compatibleRuntimes: [cdk.aws_lambda.Runtime.PYTHON_3_12],
+      compatibleArchitectures: [cdk.aws_lambda.Architecture.ARM_64],
+      description: 'Tuned AWS clients and review repository shared by all functions'
+    });
+
     const frontend = new FrontendConstruct(this, 'Frontend');
 
+    // Sets recordType on reviews written before the creation-time index existed
+    const reviewBackfill = new ReviewBackfillConstruct(this, 'ReviewBackfill', {
+      dynamodbTable: dynamodbTable,
+      sharedLayer: sharedLayer
+    });
+
     const appSync = new AppSyncConstruct(this, 'AppSync', {
-      dynamodbTable: dynamodbTable
+      dynamodbTable: dynamodbTable,
+      listAccessPatterns: listAccessPatterns,
+      reviewResultsBucket: reviewResultsBucket,
+      sharedLayer: sharedLayer
     });
 
     const backendApi = new BackendApiConstruct(this, 'BackendApi', {
       sqsQueue: sqsQueue,
       dynamodbTable: dynamodbTable,
-      cloudFrontDistribution: frontend.distribution
+      cloudFrontDistribution: frontend.distribution,
+      sharedLayer: sharedLayer,
+      reviewResultsBucket: reviewResultsBucket,
+      idempotencyTable: idempotencyTable,
+      listAccessPatterns: listAccessPatterns
     });
 
+    // List views switch to the new indexes only once older reviews carry recordType
+    appSync.node.addDependency(reviewBackfill);
+    backendApi.node.addDependency(reviewBackfill);
+
     const aiAgent = new AiAgentConstruct(this, 'AiAgent', {
-      dynamodbTable: dynamodbTable
+      dynamodbTable: dynamodbTable,
+      sharedLayer: sharedLayer,
+      reviewResultsBucket: reviewResultsBucket,
+      appSyncApi: appSync.api,
+      idempotencyTable: idempotencyTable
     });
 
     const asyncProcessing = new AsyncProcessingConstruct(this, 'AsyncProcessing', {
       sqsQueue: sqsQueue,
       dynamodbTable: dynamodbTable,
-      aiAgentFunction: aiAgent.agentFunction
+      aiAgentFunction: aiAgent.agentAlias,
+      sharedLayer: sharedLayer,
+      admissionTable: admissionTable,
+      bedrockModelId: aiAgent.bedrockModelId,
+      appSyncApi: appSync.api
     });
 
     new cdk.CfnOutput(this, 'CloudFrontURL', {
@@ -184,6 +277,8 @@ export class StrandsAgentsWellArchitectedStack extends cdk.Stack {
           'Resource::*',
           'Action::trustedadvisor:Describe*',
           'Action::bedrock:InvokeModel*',
+          'Resource::arn:aws:iam::*:role/WellArchitectedReviewRole',
+          'Resource::arn:aws:lambda:ap-northeast-1:975050047634:function:strands-agents-well-architected-agent:*',
           'Resource::arn:<AWS::Partition>:logs:<AWS::Region>:<AWS::AccountId>:log-group:/aws/lambda/*',
           'Resource::arn:aws:bedrock:ap-northeast-1:975050047634:knowledge-base/*',
           'Resource::arn:aws:appsync:ap-northeast-1:975050047634:apis/*/types/Mutation/*',
@@ -208,6 +303,14 @@ export class StrandsAgentsWellArchitectedStack extends cdk.Stack {
       }
     ]);
 
+    // Secrets Manager suppressions
+    NagSuppressions.addStackSuppressions(this, [
+      {
+        id: 'AwsSolutions-SMG4',
+        reason: 'Cursor signing key only protects pagination tokens; rotation would invalidate in-flight cursors'
+      }
+    ]);
+
     // S3 bucket suppressions
     NagSuppressions.addStackSuppressions(this, [
       {